@@ -7,8 +7,11 @@ Entry point for the Streamlit app. This file provides a home/landing page and li
 Run with: streamlit run app.py
 """
 
+import pandas as pd
 import streamlit as st
 from utils.auth import login
+from utils.cache import cache_stats
+from utils.db import read_routing_status
 
 # require login before doing anything else
 login()
@@ -33,6 +36,38 @@ st.markdown(
     """
 )
 
+with st.expander("Cache usage"):
+    stats = cache_stats()
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("Cached MB", f"{stats['bytes'] / 1e6:,.1f}", help=f"Budget {stats['max_bytes'] / 1e6:,.0f} MB")
+    c2.metric("Entries", stats["entries"])
+    c3.metric("Hit rate", f"{stats['hit_rate']:.0%}" if stats["hit_rate"] is not None else "–")
+    c4.metric("Evictions", stats["evictions"])
+    c5.metric("Queries saved", stats["coalesced"],
+              help="Concurrent misses that waited for an identical query already running")
+    st.caption(
+        f"{stats['hits']} hits, {stats['misses']} misses, {stats['expirations']} expired, "
+        f"{stats['rejected']} too large to keep"
+    )
+    if stats["bytes_by_function"]:
+        st.dataframe(
+            pd.Series(stats["bytes_by_function"], name="bytes").sort_values(ascending=False)
+            .rename_axis("function").reset_index()
+        )
+
+routing = read_routing_status()
+if routing["configured"]:
+    with st.expander("Read replica"):
+        c1, c2 = st.columns(2)
+        c1.metric("Reads served by", routing["target"].title())
+        lag = routing["lag_seconds"]
+        c2.metric("Replica lag (s)", f"{lag:,.1f}" if lag is not None else "–",
+                  help=f"Reads fall back to the primary above {routing['max_lag_seconds']:.0f} s")
+        if routing["error"]:
+            st.caption(f"Replica unreachable: {routing['error']}")
+        elif routing["primary_after_write"]:
+            st.caption("Recent write from this server: reads stay on the primary until the replica catches up")
+
 st.sidebar.header("Quick actions")
 if st.sidebar.button("Refresh data cache"):
     st.rerun()
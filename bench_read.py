@@ -0,0 +1,72 @@
+"""Command-line benchmark of the reader engines in ``utils.db``.
+
+Times every reader over the same date range with each read method
+(``sql`` = pd.read_sql_query, ``copy`` = COPY TO STDOUT + columnar CSV
+parse) and checks that both return the same rows.  Pick a range of 1M+
+rows to see the difference that matters for the pages.
+
+Usage (from workspace root, after activating your venv):
+    python bench_read.py START_DATE END_DATE [repeats] [reader ...]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from utils.db import READ_METHODS, read_feeder_load, read_line_load, read_outages, read_transformer_load
+
+READERS = {
+    "feeder_load": read_feeder_load,
+    "transformer_load": read_transformer_load,
+    "line_load": read_line_load,
+    "outages": read_outages,
+}
+
+
+def _time_reader(reader, start_date: str, end_date: str, method: str, repeats: int):
+    best, data = float("inf"), None
+    for _ in range(repeats):
+        reader.clear()
+        t0 = time.perf_counter()
+        data = reader(start_date, end_date, method=method)
+        best = min(best, time.perf_counter() - t0)
+    return best, data
+
+
+def _same_rows(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    if a.shape != b.shape or list(a.columns) != list(b.columns):
+        return False
+    # compare as text: the engines differ in dtypes, not in values
+    left = a.astype(str).replace({"<NA>": "nan", "None": "nan", "NaT": "nan"})
+    right = b.astype(str).replace({"<NA>": "nan", "None": "nan", "NaT": "nan"})
+    return left.equals(right)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__.strip().splitlines()[-1].strip(), file=sys.stderr)
+        sys.exit(1)
+    start_date, end_date = sys.argv[1], sys.argv[2]
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    names = sys.argv[4:] or list(READERS)
+    unknown = [n for n in names if n not in READERS]
+    if unknown:
+        print(f"Unknown reader(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"{'reader':<18}{'rows':>12}" + "".join(f"{m + ' s':>10}" for m in READ_METHODS) + f"{'speedup':>10}  match")
+    for name in names:
+        timings, frames = {}, {}
+        for method in READ_METHODS:
+            timings[method], frames[method] = _time_reader(READERS[name], start_date, end_date, method, repeats)
+        rows = len(frames["sql"])
+        speedup = timings["sql"] / timings["copy"] if timings["copy"] else float("nan")
+        match = _same_rows(frames["sql"], frames["copy"])
+        print(
+            f"{name:<18}{rows:>12,}" + "".join(f"{timings[m]:>10.2f}" for m in READ_METHODS)
+            + f"{speedup:>9.1f}x  {'yes' if match else 'NO'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
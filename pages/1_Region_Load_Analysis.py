@@ -8,12 +8,23 @@ import streamlit as st
 from utils.auth import login
 import plotly.express as px
 import pandas as pd
-from utils.db import read_feeder_load
+import numpy as np
+from utils.db import time_order
+from utils.load_cube import get_load_cube, has_data, hourly_frame, nansum_cells
 from utils.pdf_generator import generate_pdf
+from utils.export import render_export
+from utils.figures import cached_figure, cached_image
+from utils.period_compare import (
+    COMPARISON_MODES, asset_means, compare_values, comparison_profile, comparison_window, load_stats, metric_delta,
+)
+from utils.profiler import start_profiler
 from datetime import date, timedelta
 
+prof = start_profiler("Region Load Analysis")
+
 # enforce authentication
 login()
+prof.mark("login")
 
 st.set_page_config(page_title="Region Load Analysis", layout="wide")
 
@@ -23,6 +34,8 @@ st.title("Region Load Analysis")
 today = date.today()
 start_default = today - timedelta(days=7)
 start_date, end_date = st.date_input("Select date range", value=[start_default, today])
+compare = st.selectbox("Compare with", options=COMPARISON_MODES, key="region_compare",
+                       help="Previous period: the same number of days just before; last year: 52 weeks earlier")
 
 if start_date > end_date:
     st.error("Start date must be before end date")
@@ -30,70 +43,115 @@ if start_date > end_date:
 
 # Fetch data
 with st.spinner("Loading feeder data..."):
-    feeder_df = read_feeder_load(str(start_date), str(end_date))
+    cube = get_load_cube("feeder")
+values, dates = cube.window(start_date, end_date)
+active = has_data(values)
+prof.mark("fetch")
 
-if feeder_df.empty:
+if not active.any():
     st.warning("No feeder load data for this date range")
     st.stop()
 
-# Aggregate by region and reading_time
-# Group by reading_date and reading_time, summing the 
-
-region_group = (
-    feeder_df.groupby(["reading_date", "reading_time", "region"])["load_mw"]
-    .sum()
-    .reset_index()
-)
-
-
+# Total load per (reading_date, reading_time) across all feeders
+grouped_data = nansum_cells(values, axis=0)
 
-grouped_data = feeder_df.groupby(['reading_date', 'reading_time'])['load_mw'].sum().reset_index()
-grouped_data = grouped_data.sort_values(by=['reading_date', 'reading_time'])
+# comparison period: the same cube, day i of the window against day i of the shifted range
+prev_values = comparison_window(cube, dates, start_date, end_date, compare)
+prev_stats = load_stats(None if prev_values is None else nansum_cells(prev_values, axis=0))
 
 # KPI row
 col1, col2, col3, col4 = st.columns(4)
-max_load_row = grouped_data.loc[grouped_data['load_mw'].idxmax()]
-max_load = max_load_row['load_mw']
-max_date = max_load_row['reading_date']
-max_time = max_load_row['reading_time']
-
-min_load_row = grouped_data.loc[grouped_data['load_mw'].idxmin()]
-min_load = min_load_row['load_mw']
-min_date = min_load_row['reading_date']
-min_time = min_load_row['reading_time']
-
-avg_load = grouped_data["load_mw"].mean()
-unique_regions = feeder_df["region"].nunique()
-
-col1.metric(f"Max Load (MW)", f"{max_load:.3f}", help=f"Date {max_date} at {max_time}")
-col2.metric("Avg Load (MW)", f"{avg_load:.3f}")
-col3.metric(f"Min Load (MW)", f"{min_load:.3f}", help=f"Date {min_date} at {min_time}")
+max_day, max_hour = np.unravel_index(np.nanargmax(grouped_data), grouped_data.shape)
+max_load = grouped_data[max_day, max_hour]
+max_date = dates[max_day]
+max_time = time_order[max_hour]
+
+min_day, min_hour = np.unravel_index(np.nanargmin(grouped_data), grouped_data.shape)
+min_load = grouped_data[min_day, min_hour]
+min_date = dates[min_day]
+min_time = time_order[min_hour]
+
+avg_load = np.nanmean(grouped_data)
+regions = cube.labels("region_id")
+unique_regions = pd.Series(regions[active]).nunique()
+prof.mark("transform")
+
+col1.metric(f"Max Load (MW)", f"{max_load:.3f}", delta=metric_delta(max_load, prev_stats["max"]),
+            help=f"Date {max_date} at {max_time}")
+col2.metric("Avg Load (MW)", f"{avg_load:.3f}", delta=metric_delta(avg_load, prev_stats["avg"]))
+col3.metric(f"Min Load (MW)", f"{min_load:.3f}", delta=metric_delta(min_load, prev_stats["min"]),
+            help=f"Date {min_date} at {min_time}")
 col4.metric("Regions", f"{unique_regions}")
 
 
 
 # Region selector
-region = st.selectbox("Select Region", options=sorted(feeder_df["region"].dropna().unique()))
-region_df = feeder_df[feeder_df["region"] == region]
+region = st.selectbox("Select Region", options=sorted(pd.Series(regions[active]).dropna().unique()))
+region_mask = active & (regions == region)
+region_values = values[region_mask]
+# charts are only rebuilt when the cube, the range, the region or the comparison changes
+fig_key = (cube.version, str(start_date), str(end_date), region, compare)
+prof.mark("transform")
+
 
 # Hourly line plot for selected region (sum across feeders)
-region_hourly = region_df.groupby(["reading_time"])["load_mw"].sum().reset_index()
-region_hourly = region_hourly.sort_values("reading_time")
+def _region_hourly_figure():
+    profile = nansum_cells(region_values, axis=(0, 1))
+    if prev_values is None:
+        return px.line(hourly_frame(profile), x="reading_time", y="load_mw", title=f"Hourly Load for {region}")
+    prev_profile = nansum_cells(prev_values[regions == region], axis=(0, 1))
+    return px.line(comparison_profile(profile, prev_profile), x="reading_time", y="load_mw", color="period",
+                   title=f"Hourly Load for {region} ({compare.lower()})")
+
 
-fig = px.line(region_hourly, x="reading_time", y="load_mw", title=f"Hourly Load for {region}")
+fig = cached_figure(("region_hourly",) + fig_key, _region_hourly_figure)
+prof.mark("figure")
 st.plotly_chart(fig, use_container_width=True)
+prof.mark("chart")
+
 
 # Top feeders in region
-top_feed = region_df.groupby("feeder_33kv")["load_mw"].mean().reset_index().sort_values("load_mw", ascending=False).head(10)
-fig2 = px.bar(top_feed, x="feeder_33kv", y="load_mw", title=f"Top 10 Feeders by Avg Load ({region})")
+def _top_feeders_figure():
+    top_feed = pd.DataFrame({
+        "feeder_33kv": cube.labels("feeder_id")[region_mask],
+        "load_mw": np.nanmean(region_values, axis=(1, 2)),
+    }).sort_values("load_mw", ascending=False).head(10)
+    return px.bar(top_feed, x="feeder_33kv", y="load_mw", title=f"Top 10 Feeders by Avg Load ({region})")
+
+
+fig2 = cached_figure(("region_top_feeders",) + fig_key, _top_feeders_figure)
+prof.mark("figure")
 st.plotly_chart(fig2, use_container_width=True)
+prof.mark("chart")
+
+if prev_values is not None:
+    st.caption(f"Average load per feeder vs {compare.lower()} ({region})")
+    region_feeders = regions == region
+    region_feeder_names = cube.labels("feeder_id")[region_feeders]
+    feeder_change = compare_values(
+        pd.Series(asset_means(values[region_feeders]), index=region_feeder_names),
+        pd.Series(asset_means(prev_values[region_feeders]), index=region_feeder_names),
+    ).dropna(subset=["current", "previous"], how="all").rename_axis("feeder_33kv")
+    st.dataframe(feeder_change.sort_values("delta", ascending=False))
+    prof.mark("render")
+
+# Export filtered rows
+render_export("feeder_load", start_date, end_date, {"region": region}, key="region_page")
 
 # Export to PDF
 if st.button("Generate PDF Report (Region)"):
     tmp_img1 = "region_hourly.png"
     tmp_img2 = "region_top_feed.png"
-    fig.write_image(tmp_img1)
-    fig2.write_image(tmp_img2)
+    # images are cached under the same keys as the figures
+    images = {
+        tmp_img1: cached_image(("region_hourly",) + fig_key, fig),
+        tmp_img2: cached_image(("region_top_feeders",) + fig_key, fig2),
+    }
+    for path, image in images.items():
+        with open(path, "wb") as f:
+            f.write(image)
     pdf_path = generate_pdf(f"Region Load Report — {region}", [tmp_img1, tmp_img2], out_path=f"region_report_{region}.pdf")
     with open(pdf_path, "rb") as f:
         st.download_button("Download PDF", data=f, file_name=pdf_path)
+
+prof.finish()
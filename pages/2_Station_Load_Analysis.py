@@ -7,10 +7,18 @@ import streamlit as st
 from utils.auth import login
 import plotly.express as px
 import pandas as pd
-from utils.db import read_feeder_load
+import numpy as np
+from utils.db import time_order
+from utils.load_cube import get_load_cube, has_data, hourly_frame, nansum_cells
+from utils.export import render_export
+from utils.figures import cached_figure
+from utils.period_compare import COMPARISON_MODES, comparison_profile, comparison_window, load_stats, metric_delta
+from utils.profiler import start_profiler
 from datetime import date, timedelta
 
+prof = start_profiler("Station Load Analysis")
 login()
+prof.mark("login")
 
 st.set_page_config(page_title="Station Load Analysis", layout="wide")
 
@@ -19,44 +27,86 @@ st.title("Station Load Analysis")
 today = date.today()
 start_default = today - timedelta(days=7)
 start_date, end_date = st.date_input("Select date range", value=[start_default, today], key="station_dates")
+compare = st.selectbox("Compare with", options=COMPARISON_MODES, key="station_compare",
+                       help="Previous period: the same number of days just before; last year: 52 weeks earlier")
 
-feeder_df = read_feeder_load(str(start_date), str(end_date))
-if feeder_df.empty:
+cube = get_load_cube("feeder")
+values, dates = cube.window(start_date, end_date)
+active = has_data(values)
+prof.mark("fetch")
+if not active.any():
     st.warning("No data for this range")
     st.stop()
 
-station = st.selectbox("Select Station", options=sorted(feeder_df["station"].dropna().unique()))
-station_df = feeder_df[feeder_df["station"] == station]
+stations = cube.labels("station_id")
+station = st.selectbox("Select Station", options=sorted(pd.Series(stations[active]).dropna().unique()))
+station_mask = active & (stations == station)
+station_values = values[station_mask]
 
 # station KPIs
-grouped_data = station_df.groupby(['reading_date', 'reading_time'])['load_mw'].sum().reset_index()
-grouped_data = grouped_data.sort_values(by=['reading_date', 'reading_time'])
+grouped_data = nansum_cells(station_values, axis=0)
+# comparison period: the same cube, day i of the window against day i of the shifted range
+prev_values = comparison_window(cube, dates, start_date, end_date, compare)
+prev_station_values = None if prev_values is None else prev_values[stations == station]
+prev_stats = load_stats(None if prev_values is None else nansum_cells(prev_station_values, axis=0))
 
 col1, col2, col3, col4 = st.columns(4)
-max_load_row = grouped_data.loc[grouped_data['load_mw'].idxmax()]
-max_load = max_load_row['load_mw']
-max_date = max_load_row['reading_date']
-max_time = max_load_row['reading_time']
+max_day, max_hour = np.unravel_index(np.nanargmax(grouped_data), grouped_data.shape)
+max_load = grouped_data[max_day, max_hour]
+max_date = dates[max_day]
+max_time = time_order[max_hour]
 
-min_load_row = grouped_data.loc[grouped_data['load_mw'].idxmin()]
-min_load = min_load_row['load_mw']
-min_date = min_load_row['reading_date']
-min_time = min_load_row['reading_time']
+min_day, min_hour = np.unravel_index(np.nanargmin(grouped_data), grouped_data.shape)
+min_load = grouped_data[min_day, min_hour]
+min_date = dates[min_day]
+min_time = time_order[min_hour]
 
-unique_station = station_df["feeder_33kv"].nunique()
+unique_station = int(station_mask.sum())
+# charts are only rebuilt when the cube, the range, the station or the comparison changes
+fig_key = (cube.version, str(start_date), str(end_date), station, compare)
+prof.mark("transform")
 
 #col1.metric("Max Load (MW)", f"{station_df['load_mw'].max():.3f}")
-col1.metric(f"Max Load (MW)", f"{max_load:.3f}", help=f"Date: {max_date} @ {max_time}")
-col2.metric("Avg Load (MW)", f"{grouped_data['load_mw'].mean():.3f}")
-col3.metric(f"Min Load (MW) (Date {min_date} at {min_time})", f"{min_load:.3f}")
+col1.metric(f"Max Load (MW)", f"{max_load:.3f}", delta=metric_delta(max_load, prev_stats["max"]),
+            help=f"Date: {max_date} @ {max_time}")
+col2.metric("Avg Load (MW)", f"{np.nanmean(grouped_data):.3f}",
+            delta=metric_delta(np.nanmean(grouped_data), prev_stats["avg"]))
+col3.metric(f"Min Load (MW) (Date {min_date} at {min_time})", f"{min_load:.3f}",
+            delta=metric_delta(min_load, prev_stats["min"]))
 col4.metric("Feeders", f"{unique_station}")
 
 # plot hourly
-station_hourly = station_df.groupby(["reading_time"])["load_mw"].sum().reset_index()
-fig = px.line(station_hourly.sort_values("reading_time"), x="reading_time", y="load_mw", title=f"Station hourly load — {station}")
+def _station_hourly_figure():
+    profile = nansum_cells(station_values, axis=(0, 1))
+    if prev_station_values is None:
+        return px.line(hourly_frame(profile), x="reading_time", y="load_mw", title=f"Station hourly load — {station}")
+    return px.line(
+        comparison_profile(profile, nansum_cells(prev_station_values, axis=(0, 1))),
+        x="reading_time", y="load_mw", color="period", title=f"Station hourly load — {station} ({compare.lower()})",
+    )
+
+
+fig = cached_figure(("station_hourly",) + fig_key, _station_hourly_figure)
+prof.mark("figure")
 st.plotly_chart(fig, use_container_width=True)
+prof.mark("chart")
+
 
 # feeder contributions
-feed_contrib = station_df.groupby("feeder_33kv")["load_mw"].mean().reset_index().sort_values("load_mw", ascending=False)
-fig2 = px.pie(feed_contrib, names="feeder_33kv", values="load_mw", title="Feeder Contribution (Avg Load)")
-st.plotly_chart(fig2, use_container_width=True)
\ No newline at end of file
+def _feeder_contribution_figure():
+    feed_contrib = pd.DataFrame({
+        "feeder_33kv": cube.labels("feeder_id")[station_mask],
+        "load_mw": np.nanmean(station_values, axis=(1, 2)),
+    }).sort_values("load_mw", ascending=False)
+    return px.pie(feed_contrib, names="feeder_33kv", values="load_mw", title="Feeder Contribution (Avg Load)")
+
+
+fig2 = cached_figure(("station_feeder_contribution",) + fig_key, _feeder_contribution_figure)
+prof.mark("figure")
+st.plotly_chart(fig2, use_container_width=True)
+prof.mark("chart")
+
+# Export filtered rows
+render_export("feeder_load", start_date, end_date, {"station": station}, key="station_page")
+
+prof.finish()
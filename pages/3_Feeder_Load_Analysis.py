@@ -7,10 +7,18 @@ import streamlit as st
 from utils.auth import login
 import plotly.express as px
 import pandas as pd
-from utils.db import read_feeder_load
+import numpy as np
+from utils.db import time_order
+from utils.load_cube import get_load_cube, has_data, hourly_frame, nansum_cells
+from utils.export import render_export
+from utils.figures import cached_figure
+from utils.period_compare import COMPARISON_MODES, comparison_profile, comparison_window, load_stats, metric_delta
+from utils.profiler import start_profiler
 from datetime import date, timedelta
 
+prof = start_profiler("Feeder Load Analysis")
 login()
+prof.mark("login")
 
 st.set_page_config(page_title="Feeder Load Analysis", layout="wide")
 
@@ -19,31 +27,62 @@ st.title("Feeder Load Analysis")
 today = date.today()
 start_default = today - timedelta(days=7)
 start_date, end_date = st.date_input("Select date range", value=[start_default, today], key="feeder_dates")
+compare = st.selectbox("Compare with", options=COMPARISON_MODES, key="feeder_compare",
+                       help="Previous period: the same number of days just before; last year: 52 weeks earlier")
 
-feeder_df = read_feeder_load(str(start_date), str(end_date))
-if feeder_df.empty:
+cube = get_load_cube("feeder")
+values, dates = cube.window(start_date, end_date)
+active = has_data(values)
+prof.mark("fetch")
+if not active.any():
     st.warning("No data for this range")
     st.stop()
 
-feeder = st.selectbox("Select Feeder", options=sorted(feeder_df["feeder_33kv"].dropna().unique()))
-feeder_df_sel = feeder_df[feeder_df["feeder_33kv"] == feeder]
+feeders = cube.labels("feeder_id")
+feeder = st.selectbox("Select Feeder", options=sorted(pd.Series(feeders[active]).dropna().unique()))
+feeder_values = values[active & (feeders == feeder)]
+# comparison period: the same cube, day i of the window against day i of the shifted range
+prev_values = comparison_window(cube, dates, start_date, end_date, compare)
+prev_feeder_values = None if prev_values is None else prev_values[feeders == feeder]
+prev_stats = load_stats(None if prev_values is None else nansum_cells(prev_feeder_values, axis=0))
 
-max_idx = feeder_df_sel['load_mw'].idxmax()
-max_value = feeder_df_sel.loc[max_idx, 'load_mw']
-max_date = feeder_df_sel.loc[max_idx, 'reading_date']
-max_time = feeder_df_sel.loc[max_idx, 'reading_time']
+max_asset, max_day, max_hour = np.unravel_index(np.nanargmax(feeder_values), feeder_values.shape)
+max_value = feeder_values[max_asset, max_day, max_hour]
+max_date = dates[max_day]
+max_time = time_order[max_hour]
+prof.mark("transform")
 
 k1, k2, k3 = st.columns(3)
 k1.metric(
     "Max (MW)",
     f"{max_value:.3f}",
+    delta=metric_delta(max_value, prev_stats["max"]),
     help=f"Date: {max_date} @ {max_time}"
 )
 # k1.metric("Max (MW)", f"{feeder_df_sel['load_mw'].max():.3f}")
-k2.metric("Avg (MW)", f"{feeder_df_sel['load_mw'].mean():.3f}")
-k3.metric("Min (MW)", f"{feeder_df_sel['load_mw'].min():.3f}")
+k2.metric("Avg (MW)", f"{np.nanmean(feeder_values):.3f}", delta=metric_delta(np.nanmean(feeder_values), prev_stats["avg"]))
+k3.metric("Min (MW)", f"{np.nanmin(feeder_values):.3f}", delta=metric_delta(np.nanmin(feeder_values), prev_stats["min"]))
 
 # hourly
-feeder_hourly = feeder_df_sel.groupby(["reading_time"])["load_mw"].sum().reset_index()
-fig = px.line(feeder_hourly.sort_values("reading_time"), x="reading_time", y="load_mw", title=f"Feeder hourly load — {feeder}")
-st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+def _feeder_hourly_figure():
+    profile = nansum_cells(feeder_values, axis=(0, 1))
+    if prev_feeder_values is None:
+        return px.line(hourly_frame(profile), x="reading_time", y="load_mw", title=f"Feeder hourly load — {feeder}")
+    return px.line(
+        comparison_profile(profile, nansum_cells(prev_feeder_values, axis=(0, 1))),
+        x="reading_time", y="load_mw", color="period", title=f"Feeder hourly load — {feeder} ({compare.lower()})",
+    )
+
+
+# only rebuilt when the cube, the range, the feeder or the comparison changes
+fig = cached_figure(
+    ("feeder_hourly", cube.version, str(start_date), str(end_date), feeder, compare), _feeder_hourly_figure
+)
+prof.mark("figure")
+st.plotly_chart(fig, use_container_width=True)
+prof.mark("chart")
+
+# Export filtered rows
+render_export("feeder_load", start_date, end_date, {"feeder_33kv": feeder}, key="feeder_page")
+
+prof.finish()
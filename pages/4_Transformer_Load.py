@@ -7,10 +7,19 @@ import streamlit as st
 from utils.auth import login
 import plotly.express as px
 import pandas as pd
-from utils.db import read_transformer_load
+import numpy as np
+from utils.db import prefetch
+from utils.load_cube import get_load_cube, has_data
+from utils.export import render_export
+from utils.figures import cached_figure, data_token
+from utils.period_compare import COMPARISON_MODES, comparison_window, load_stats, metric_delta
+from utils.profiler import start_profiler
+from utils.transformer_screening import fleet_transformer_screening
 from datetime import date, timedelta
 
+prof = start_profiler("Transformer Load")
 login()
+prof.mark("login")
 
 st.set_page_config(page_title="Transformer Load", layout="wide")
 
@@ -19,19 +28,84 @@ st.title("Transformer Load Analysis")
 today = date.today()
 start_default = today - timedelta(days=7)
 start_date, end_date = st.date_input("Select date range", value=[start_default, today], key="transformer_dates")
+compare = st.selectbox("Compare with", options=COMPARISON_MODES, key="transformer_compare",
+                       help="Previous period: the same number of days just before; last year: 52 weeks earlier")
 
-trans_df = read_transformer_load(str(start_date), str(end_date))
-if trans_df.empty:
+cube = get_load_cube("transformer")
+# the fleet screening below does not depend on the station selection
+screening_job = prefetch(fleet_transformer_screening, str(start_date), str(end_date), cube.version)
+values, dates = cube.window(start_date, end_date)
+active = has_data(values)
+prof.mark("fetch")
+if not active.any():
     st.warning("No data for this range")
     st.stop()
 
-station = st.selectbox("Station", options=sorted(trans_df['station'].dropna().unique()))
-trans_sel = trans_df[trans_df['station'] == station]
+stations = cube.labels("station_id")
+station = st.selectbox("Station", options=sorted(pd.Series(stations[active]).dropna().unique()))
+station_mask = active & (stations == station)
+trans_values = values[station_mask]
+# comparison period: the same cube, day i of the window against day i of the shifted range
+prev_values = comparison_window(cube, dates, start_date, end_date, compare)
+prev_stats = load_stats(None if prev_values is None else prev_values[stations == station])
 
 k1, k2 = st.columns(2)
-k1.metric("Max Load (MW)", f"{trans_sel['load_mw'].max():.3f}")
-k2.metric("Avg Load (MW)", f"{trans_sel['load_mw'].mean():.3f}")
+k1.metric("Max Load (MW)", f"{np.nanmax(trans_values):.3f}",
+          delta=metric_delta(np.nanmax(trans_values), prev_stats["max"]))
+k2.metric("Avg Load (MW)", f"{np.nanmean(trans_values):.3f}",
+          delta=metric_delta(np.nanmean(trans_values), prev_stats["avg"]))
 
-load_by_tx = trans_sel.groupby('transformer_nomenclature')['load_mw'].mean().reset_index().sort_values('load_mw', ascending=False)
-fig = px.bar(load_by_tx.head(10), x='transformer_nomenclature', y='load_mw', title=f"Transformer Loading (Avg) — {station}")
-st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+
+def _transformer_loading_figure():
+    load_by_tx = pd.DataFrame({
+        "transformer_nomenclature": cube.labels("transformer_nomenclature")[station_mask],
+        "load_mw": np.nanmean(trans_values, axis=(1, 2)),
+    }).sort_values('load_mw', ascending=False)
+    return px.bar(load_by_tx.head(10), x='transformer_nomenclature', y='load_mw', title=f"Transformer Loading (Avg) — {station}")
+
+
+# only rebuilt when the cube, the range or the station changes
+fig = cached_figure(
+    ("transformer_loading", cube.version, str(start_date), str(end_date), station), _transformer_loading_figure
+)
+prof.mark("figure")
+st.plotly_chart(fig, use_container_width=True)
+prof.mark("chart")
+
+# Fleet-wide overload screening against the stored ratings
+st.subheader("Fleet overload screening")
+screening = screening_job.result()
+prof.mark("fetch")
+rated = screening["capacity_mw"].notna()
+overloaded = screening["hours_above_100"] > 0
+k1, k2, k3 = st.columns(3)
+k1.metric("Transformers rated", f"{int(rated.sum())} / {len(screening)}",
+          help="Upload ratings on the Upload Outages page")
+k2.metric("Overloaded (>100%)", f"{int(overloaded.sum())}")
+k3.metric("Above 80% at some hour", f"{int((screening['hours_above_80'] > 0).sum())}")
+
+if rated.any():
+    def _overload_figure():
+        top = screening[rated].head(20).assign(
+            transformer=lambda d: d["station"] + " / " + d["transformer_nomenclature"]
+        ).melt(
+            id_vars=["transformer"], value_vars=["hours_above_80", "hours_above_100"],
+            var_name="threshold", value_name="hours",
+        )
+        return px.bar(top, x="transformer", y="hours", color="threshold", barmode="group",
+                      title="Hours above 80% / 100% of rating (top 20)")
+
+    fig2 = cached_figure(("transformer_overload", data_token(screening), str(start_date), str(end_date)), _overload_figure)
+    prof.mark("figure")
+    st.plotly_chart(fig2, use_container_width=True)
+    prof.mark("chart")
+else:
+    st.info("No transformer ratings stored yet, so utilization cannot be screened.")
+
+st.dataframe(screening, hide_index=True)
+prof.mark("render")
+
+# Export filtered rows
+render_export("transformer_load", start_date, end_date, {"station": station}, key="transformer_page")
+
+prof.finish()
@@ -7,10 +7,20 @@ import streamlit as st
 from utils.auth import login
 import pandas as pd
 import plotly.express as px
-from utils.db import read_outages
+from utils.db import prefetch, read_outage_comparison, read_outages
+from utils.load_cube import get_load_cube
+from utils.energy_not_served import outage_energy_not_served, summarize_energy_not_served
+from utils.outage_concurrency import concurrency_peaks, concurrency_timeline
+from utils.export import render_export
+from utils.outage_search import render_outage_search
+from utils.figures import cached_figure, data_token
+from utils.period_compare import COMPARISON_MODES, PERIODS, compare_groups, metric_delta, previous_range
+from utils.profiler import start_profiler
 from datetime import date, timedelta
 
+prof = start_profiler("Outage Analytics")
 login()
+prof.mark("login")
 
 st.set_page_config(page_title="Outage Analytics", layout="wide")
 
@@ -19,8 +29,16 @@ st.title("Outage Analytics")
 today = date.today()
 start_default = today - timedelta(days=30)
 start_date, end_date = st.date_input("Select date range", value=[start_default, today], key="outage_dates")
+compare = st.selectbox("Compare with", options=COMPARISON_MODES, key="outage_compare",
+                       help="Previous period: the same number of days just before; last year: 52 weeks earlier")
 
-out_df = read_outages(str(start_date), str(end_date))
+# outages and the ENS join are independent of the filters below: start both now
+# (the ENS job's own read_outages call joins the one already in flight)
+outages_job = prefetch(read_outages, str(start_date), str(end_date))
+cube = get_load_cube("feeder")
+ens_job = prefetch(outage_energy_not_served, str(start_date), str(end_date), cube.version)
+out_df = outages_job.result()
+prof.mark("fetch")
 if out_df.empty:
     st.warning("No outage records for this range")
     st.stop()
@@ -43,6 +61,22 @@ station_sel = col4.selectbox("Station", options=["All"] + sorted(out_df["station
 if station_sel != "All":
     out_df = out_df[out_df["station"] == station_sel]
 
+# charts below are only rebuilt when the filtered outages change
+outages_key = data_token(out_df)
+
+# both periods come from one aggregated query; the raw rows above stay single-period
+comparison = None
+totals = pd.DataFrame(index=list(PERIODS), columns=["outages_count", "total_outage_min", "avg_outage_min"], dtype=float)
+if compare != "None":
+    prev_start, prev_end = previous_range(start_date, end_date, compare)
+    comparison = read_outage_comparison(
+        str(start_date), str(end_date), str(prev_start), str(prev_end),
+        region_sel, disco_sel, area_sel, station_sel,
+    )
+    prof.mark("fetch")
+    totals = comparison[comparison["level"] == "total"].set_index("period").reindex(list(PERIODS))
+    totals[["outages_count", "total_outage_min"]] = totals[["outages_count", "total_outage_min"]].fillna(0)
+
 # Simple KPIs
 col1, col2, col3 = st.columns(3)
 num_outages = len(out_df)
@@ -54,23 +88,178 @@ out_df['duration_min'] = (out_df['end_ts'] - out_df['start_ts']).dt.total_second
 total_outage_minutes = out_df['duration_min'].sum(skipna=True)
 avg_duration = out_df['duration_min'].mean()
 
-col1.metric("Number of outages", f"{num_outages}")
-col2.metric("Total outage minutes", f"{total_outage_minutes:.1f}")
-col3.metric("Avg outage (min)", f"{avg_duration:.1f}")
+
+def _delta(measure, fmt):
+    return metric_delta(totals.at["current", measure], totals.at["previous", measure], fmt)
+
+
+# more or longer outages than before is a deterioration, shown in red
+col1.metric("Number of outages", f"{num_outages}",
+            delta=_delta("outages_count", "{:+,.0f}"), delta_color="inverse")
+col2.metric("Total outage minutes", f"{total_outage_minutes:.1f}",
+            delta=_delta("total_outage_min", "{:+,.1f}"), delta_color="inverse")
+col3.metric("Avg outage (min)", f"{avg_duration:.1f}",
+            delta=_delta("avg_outage_min", "{:+,.1f}"), delta_color="inverse")
+
+prof.mark("transform")
+
+if comparison is not None:
+    st.subheader(f"Compared with {prev_start} to {prev_end}")
+    comparison_key = data_token(comparison)
+
+    def _hour_of_week_figure():
+        hours = comparison[comparison["level"] == "hour_of_week"]
+        grid = hours.assign(hour_of_week=(hours["dow"] - 1) * 24 + hours["hour"]).pivot_table(
+            index="hour_of_week", columns="period", values="outages_count", aggfunc="sum"
+        ).reindex(index=range(7 * 24), columns=list(PERIODS)).fillna(0)
+        profile = grid.rename_axis(columns=None).reset_index().melt(
+            id_vars="hour_of_week", var_name="period", value_name="outages"
+        )
+        return px.line(profile, x="hour_of_week", y="outages", color="period",
+                       title="Outages by hour of week (0 = Monday 00:00)")
+
+    fig_cmp = cached_figure(("outage_hour_of_week", comparison_key), _hour_of_week_figure)
+    prof.mark("figure")
+    st.plotly_chart(fig_cmp, use_container_width=True)
+    prof.mark("chart")
+
+    c1, c2 = st.columns(2)
+    c1.dataframe(compare_groups(comparison[comparison["level"] == "outage_class"], "outage_class", "outages_count")
+                 .sort_values("delta", ascending=False), hide_index=True)
+    c2.dataframe(compare_groups(comparison[comparison["level"] == "party"], "party_responsible", "outages_count")
+                 .sort_values("delta", ascending=False), hide_index=True)
+    st.caption("Feeders with the largest increase in outages")
+    st.dataframe(compare_groups(comparison[comparison["level"] == "feeder"], "feeder_33kv", "outages_count")
+                 .sort_values(["delta", "current"], ascending=False).head(20), hide_index=True)
+    prof.mark("render")
+
 
 # Outage cause pie
-cause_cnt = out_df['outage_class'].fillna('Unknown').value_counts().reset_index()
-cause_cnt.columns = ['outage_class', 'count']
-fig = px.pie(cause_cnt, names='outage_class', values='count', title='Outage Causes')
+def _cause_figure():
+    cause_cnt = out_df['outage_class'].fillna('Unknown').value_counts().reset_index()
+    cause_cnt.columns = ['outage_class', 'count']
+    return px.pie(cause_cnt, names='outage_class', values='count', title='Outage Causes')
+
+
+fig = cached_figure(("outage_causes", outages_key), _cause_figure)
+prof.mark("figure")
 st.plotly_chart(fig, use_container_width=True)
+prof.mark("chart")
+
+
 
 # Party responsible bar
-party = out_df['party_responsible'].fillna('Unknown').value_counts().reset_index()
-party.columns = ['party', 'count']
-fig2 = px.bar(party, x='party', y='count', title='Party Responsible (count)')
+def _party_figure():
+    party = out_df['party_responsible'].fillna('Unknown').value_counts().reset_index()
+    party.columns = ['party', 'count']
+    return px.bar(party, x='party', y='count', title='Party Responsible (count)')
+
+
+fig2 = cached_figure(("outage_parties", outages_key), _party_figure)
+prof.mark("figure")
 st.plotly_chart(fig2, use_container_width=True)
+prof.mark("chart")
+
+
 
 # Outage frequency by feeder
-feeder_cnt = out_df.groupby('feeder_33kv').size().reset_index(name='count').sort_values('count', ascending=False).head(20)
-fig3 = px.bar(feeder_cnt, x='feeder_33kv', y='count', title='Top feeders by outage count')
-st.plotly_chart(fig3, use_container_width=True)
\ No newline at end of file
+def _feeder_count_figure():
+    feeder_cnt = out_df.groupby('feeder_33kv', observed=True).size().reset_index(name='count').sort_values('count', ascending=False).head(20)
+    return px.bar(feeder_cnt, x='feeder_33kv', y='count', title='Top feeders by outage count')
+
+
+fig3 = cached_figure(("outage_feeders", outages_key), _feeder_count_figure)
+prof.mark("figure")
+st.plotly_chart(fig3, use_container_width=True)
+prof.mark("chart")
+
+# Energy not served from the feeder load profile
+st.subheader("Energy Not Served")
+tariff = st.number_input("Tariff (₦/MWh)", min_value=0.0, value=60000.0, step=1000.0)
+prof.mark("render")
+ens_df = ens_job.result()
+prof.mark("fetch")
+ens_df = ens_df[ens_df["id"].isin(out_df["id"])]
+ens_df["party_responsible"] = ens_df["party_responsible"].fillna("Unknown")
+
+total_ens = ens_df["ens_mwh"].sum(skipna=True)
+col1, col2, col3 = st.columns(3)
+col1.metric("Energy not served (MWh)", f"{total_ens:,.1f}")
+col2.metric("Revenue loss (₦)", f"{total_ens * tariff:,.0f}")
+col3.metric("Priced from actual readings", f"{ens_df['measured_pct'].mean():.0f}%",
+            help="Share of outage hours with a positive reading; the rest use the feeder's typical load for that "
+                 "hour, or the last load recorded on the outage when the feeder has no readings")
+unpriced = int(ens_df["ens_mwh"].isna().sum())
+if unpriced:
+    st.caption(f"{unpriced:,} outages have neither load readings nor a last load and are left out of the ENS total.")
+
+prof.mark("transform")
+
+# ENS charts plot MWh only, so the tariff is not part of their key
+ens_key = (outages_key, cube.version)
+fig4 = cached_figure(("ens_feeders",) + ens_key, lambda: px.bar(
+    summarize_energy_not_served(ens_df, "feeder_33kv").head(20),
+    x="feeder_33kv", y="ens_mwh", title="Top feeders by energy not served (MWh)",
+))
+prof.mark("figure")
+st.plotly_chart(fig4, use_container_width=True)
+prof.mark("chart")
+
+fig5 = cached_figure(("ens_parties",) + ens_key, lambda: px.bar(
+    summarize_energy_not_served(ens_df, "party_responsible"),
+    x="party_responsible", y="ens_mwh", title="Energy not served by party responsible (MWh)",
+))
+prof.mark("figure")
+st.plotly_chart(fig5, use_container_width=True)
+prof.mark("chart")
+
+st.dataframe(summarize_energy_not_served(ens_df, "station", tariff))
+
+# Concurrent outages (sweep line over outage start/end events)
+st.subheader("Concurrent Outages")
+level_sel = st.radio("Level", options=["Grid", "Region", "Station"], horizontal=True, key="concurrency_level")
+level = None if level_sel == "Grid" else level_sel.lower()
+timeline = concurrency_timeline(out_df, level)
+peaks = concurrency_peaks(timeline, level)
+
+if peaks.empty:
+    st.info("No outages with a valid start time in this selection")
+else:
+    group_col = level or "group"
+    group_sel = peaks[group_col].iloc[0]
+    if level:
+        group_sel = st.selectbox(f"{level_sel} timeline", options=peaks[group_col].tolist())
+    series = timeline[timeline[group_col] == group_sel]
+    # open outages run until "now", so key on the series itself
+    series_key = data_token(series)
+    prof.mark("transform")
+    fig6 = cached_figure(("concurrent_outages", series_key, group_sel), lambda: px.line(
+        series, x="ts", y="concurrent", line_shape="hv", title=f"Concurrent outages — {group_sel}",
+    ))
+    prof.mark("figure")
+    st.plotly_chart(fig6, use_container_width=True)
+    prof.mark("chart")
+    fig7 = cached_figure(("concurrent_lost_mw", series_key, group_sel), lambda: px.line(
+        series, x="ts", y="lost_mw", line_shape="hv", title=f"Concurrent load lost (MW) — {group_sel}",
+    ))
+    prof.mark("figure")
+    st.plotly_chart(fig7, use_container_width=True)
+    prof.mark("chart")
+    st.dataframe(peaks)
+
+# Full-text search over the outage free text, with the same filters
+render_outage_search(
+    start_date, end_date,
+    {"region": region_sel, "disco": disco_sel, "area": area_sel, "station": station_sel},
+    key="outage_search",
+)
+prof.mark("fetch")
+
+# Export filtered rows
+render_export(
+    "outages", start_date, end_date,
+    {"region": region_sel, "disco": disco_sel, "area": area_sel, "station": station_sel},
+    key="outage_page",
+)
+
+prof.finish()
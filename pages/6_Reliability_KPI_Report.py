@@ -6,12 +6,17 @@ This sample assumes a 'customers' column is NOT available, so it shows station-l
 
 import streamlit as st
 from utils.auth import login
-import pandas as pd
-from utils.db import read_outages
+from utils.db import read_outage_hierarchy, read_reliability_summary
+from utils.export import render_export
+from utils.outage_search import render_outage_search
+from utils.figures import cached_figure, data_token
+from utils.profiler import start_profiler
 from datetime import date, timedelta
 import plotly.express as px
 
+prof = start_profiler("Reliability KPI Report")
 login()
+prof.mark("login")
 
 st.set_page_config(page_title="Reliability KPIs", layout="wide")
 
@@ -21,75 +26,116 @@ today = date.today()
 start_default = today - timedelta(days=30)
 start_date, end_date = st.date_input("Select date range", value=[start_default, today], key="reliability_dates")
 
-out_df = read_outages(str(start_date), str(end_date))
-if out_df.empty:
+hierarchy = read_outage_hierarchy(str(start_date), str(end_date))
+prof.mark("fetch")
+if hierarchy.empty:
     st.warning("No outage records for this range")
     st.stop()
 
-# filtering controls
+# filtering controls (cascading over the distinct region/disco/area/station combinations)
 col1, col2, col3, col4 = st.columns(4)
-region_sel = col1.selectbox("Region", options=["All"] + sorted(out_df["region"].dropna().unique()))
+region_sel = col1.selectbox("Region", options=["All"] + sorted(hierarchy["region"].dropna().unique()))
 if region_sel != "All":
-    out_df = out_df[out_df["region"] == region_sel]
+    hierarchy = hierarchy[hierarchy["region"] == region_sel]
 
-disco_sel = col2.selectbox("Disco", options=["All"] + sorted(out_df["disco"].dropna().unique()))
+disco_sel = col2.selectbox("Disco", options=["All"] + sorted(hierarchy["disco"].dropna().unique()))
 if disco_sel != "All":
-    out_df = out_df[out_df["disco"] == disco_sel]
+    hierarchy = hierarchy[hierarchy["disco"] == disco_sel]
 
-area_sel = col3.selectbox("Area", options=["All"] + sorted(out_df["area"].dropna().unique()))
+area_sel = col3.selectbox("Area", options=["All"] + sorted(hierarchy["area"].dropna().unique()))
 if area_sel != "All":
-    out_df = out_df[out_df["area"] == area_sel]
+    hierarchy = hierarchy[hierarchy["area"] == area_sel]
 
-station_sel = col4.selectbox("Station", options=["All"] + sorted(out_df["station"].dropna().unique()))
-if station_sel != "All":
-    out_df = out_df[out_df["station"] == station_sel]
+station_sel = col4.selectbox("Station", options=["All"] + sorted(hierarchy["station"].dropna().unique()))
 
-# station outage summary
-out_df['start_ts'] = pd.to_datetime(out_df['date_off'].astype(str) + ' ' + out_df['time_off'].astype(str), errors='coerce')
-out_df['end_ts'] = pd.to_datetime(out_df['date_on'].astype(str) + ' ' + out_df['time_on'].astype(str), errors='coerce')
-out_df['duration_min'] = (out_df['end_ts'] - out_df['start_ts']).dt.total_seconds() / 60.0
+# every breakdown below comes from one GROUPING SETS query with the filters pushed down
+summary = read_reliability_summary(str(start_date), str(end_date), region_sel, disco_sel, area_sel, station_sel)
+prof.mark("fetch")
+levels = {level: rows for level, rows in summary.groupby("level", sort=False)}
+if "total" not in levels:
+    st.warning("No outage records for this selection")
+    st.stop()
+
+# charts are only rebuilt when the summary changes
+summary_key = data_token(summary)
 
-station_summary = out_df.groupby('station').agg(
-    outages_count=('id', 'count'),
-    total_outage_min=('duration_min', 'sum')
-).reset_index().sort_values('total_outage_min', ascending=False)
+total = levels["total"].iloc[0]
+k1, k2, k3 = st.columns(3)
+k1.metric("Outages", f"{int(total['outages_count'])}")
+k2.metric("Total outage hours", f"{total['total_outage_min'] / 60.0:,.1f}")
+k3.metric("Avg outage (min)", f"{total['total_outage_min'] / total['outages_count']:.1f}")
+
+# station outage summary
+station_summary = levels.get("station", summary.iloc[:0])[["station", "outages_count", "total_outage_min"]]
+station_summary = station_summary.sort_values('total_outage_min', ascending=False).reset_index(drop=True)
 
 station_summary['avg_outage_min'] = station_summary['total_outage_min'] / station_summary['outages_count']
 
 station_summary['outage_hour'] = station_summary['total_outage_min'] / 60.0
 
+prof.mark("transform")
 st.dataframe(station_summary)
+prof.mark("render")
 
-fig = px.bar(station_summary.head(20), x='station', y='total_outage_min', title='Top stations by total outage minutes')
+fig = cached_figure(("reliability_stations", summary_key), lambda: px.bar(
+    station_summary.head(20), x='station', y='total_outage_min', title='Top stations by total outage minutes'
+))
+prof.mark("figure")
 st.plotly_chart(fig, use_container_width=True)
+prof.mark("chart")
 
 st.subheader("📊 Outage Table")
-feeder_summary = out_df.groupby('feeder_33kv').agg(
-    outages_count=('id', 'count'),
-    total_outage_min=('duration_min', 'sum')
-).reset_index().sort_values('total_outage_min', ascending=False)
+feeder_summary = levels.get("feeder", summary.iloc[:0])[["feeder_33kv", "outages_count", "total_outage_min"]]
+feeder_summary = feeder_summary.sort_values('total_outage_min', ascending=False).reset_index(drop=True)
 
 feeder_summary['avg_outage_hrs'] = feeder_summary['total_outage_min'] / feeder_summary['outages_count'] / 60.0
 feeder_summary['outage_hrs'] = feeder_summary['total_outage_min'] / 60.0
 feeder_summary = feeder_summary.drop(columns=["total_outage_min"])
 
+prof.mark("transform")
 st.dataframe(feeder_summary)
+prof.mark("render")
 
 st.subheader("📊 Outage Table By Party Responsible")
-feeder_party_pivot = out_df.groupby(['feeder_33kv', 'party_responsible']).agg(
-    total_outage_hour=('duration_min', lambda x: x.sum() / 60)
-).reset_index().pivot_table(
+feeder_party = levels.get("feeder_party", summary.iloc[:0])
+feeder_party_pivot = feeder_party.assign(
+    total_outage_hour=feeder_party["total_outage_min"] / 60.0
+).pivot_table(
     index='feeder_33kv',
     columns='party_responsible',
     values='total_outage_hour',
     aggfunc='sum',
-    fill_value=0
+    fill_value=0,
+    observed=True
 )
 
 feeder_party_pivot.columns.name = None  # clean up column name
 feeder_party_pivot = feeder_party_pivot.reset_index()
 
+prof.mark("transform")
 st.dataframe(feeder_party_pivot)
+prof.mark("render")
 
-fig = px.bar(feeder_summary.head(20), x='feeder_33kv', y='outage_hrs', title='Top feeders by total outage minutes')
+fig = cached_figure(("reliability_feeders", summary_key), lambda: px.bar(
+    feeder_summary.head(20), x='feeder_33kv', y='outage_hrs', title='Top feeders by total outage minutes'
+))
+prof.mark("figure")
 st.plotly_chart(fig, use_container_width=True)
+prof.mark("chart")
+
+# Full-text search over the outage free text, with the same filters
+render_outage_search(
+    start_date, end_date,
+    {"region": region_sel, "disco": disco_sel, "area": area_sel, "station": station_sel},
+    key="reliability_search",
+)
+prof.mark("fetch")
+
+# Export filtered rows
+render_export(
+    "outages", start_date, end_date,
+    {"region": region_sel, "disco": disco_sel, "area": area_sel, "station": station_sel},
+    key="reliability_page",
+)
+
+prof.finish()
@@ -10,9 +10,16 @@ import streamlit as st
 from utils.auth import login
 import pandas as pd
 import numpy as np
-from utils.db import insert_outages, insert_outages_from_csv
-
+from utils.db import (
+    TRANSFORMER_RATING_COLUMNS, insert_outages, insert_outages_from_csv, preview_outage_changes,
+    read_transformer_ratings, upsert_transformer_ratings,
+)
+from utils.transformer_screening import fleet_transformer_screening
+from utils.profiler import start_profiler
+
+prof = start_profiler("Upload Outages")
 login()
+prof.mark("login")
 
 st.set_page_config(page_title="Upload Outages", layout="wide")
 
@@ -119,10 +126,28 @@ if upload is not None:
         ]
     ]
 
+    prof.mark("transform")
+
     st.subheader("Preview of parsed records")
     st.dataframe(insert_df.head())
     st.write(f"Total rows to upload: {len(insert_df)}")
 
+    # fingerprint diff against the stored outages, once per uploaded file
+    diff_key = f"outage_diff_{upload.file_id}"
+    if diff_key not in st.session_state:
+        try:
+            st.session_state[diff_key] = preview_outage_changes(insert_df)
+        except Exception as e:
+            st.session_state[diff_key] = None
+            st.warning(f"Could not compare with existing records: {e}")
+    changes = st.session_state[diff_key]
+    prof.mark("fetch")
+    if changes:
+        c1, c2, c3 = st.columns(3)
+        c1.metric("New", changes["new"])
+        c2.metric("Changed", changes["changed"])
+        c3.metric("Unchanged (skipped)", changes["unchanged"])
+
     # write processed dataframe to a temporary file so we can use COPY path
     import tempfile, os
     tmp_path = None
@@ -140,10 +165,15 @@ if upload is not None:
         try:
             if tmp_path and os.path.exists(tmp_path):
                 # prefer the faster CSV-based path when available
-                insert_outages_from_csv(tmp_path)
+                applied = insert_outages_from_csv(tmp_path)
             else:
-                insert_outages(insert_df)
-            st.success("Outage records successfully inserted into database")
+                applied = insert_outages(insert_df)
+            st.session_state.pop(diff_key, None)
+            prof.mark("fetch")
+            st.success(
+                "Outage records successfully inserted into database: "
+                f"{applied['new']} new, {applied['changed']} updated, {applied['unchanged']} unchanged"
+            )
         except Exception as e:
             st.error(f"Error inserting records: {e}")
         finally:
@@ -152,3 +182,35 @@ if upload is not None:
                     os.remove(tmp_path)
                 except Exception:
                     pass
+
+# Transformer ratings used by the overload screening on the Transformer Load page
+st.markdown("---")
+st.subheader("Transformer ratings")
+st.caption(
+    "CSV columns: " + ", ".join(TRANSFORMER_RATING_COLUMNS)
+    + " (power_factor is optional). Existing ratings are replaced."
+)
+ratings_upload = st.file_uploader("Choose transformer ratings CSV", type=["csv"], key="ratings_upload")
+if ratings_upload is not None:
+    ratings_df = pd.read_csv(ratings_upload)
+    missing = [c for c in TRANSFORMER_RATING_COLUMNS[:3] if c not in ratings_df.columns]
+    if missing:
+        st.error("Ratings file is missing expected columns: %s" % ", ".join(missing))
+    else:
+        ratings_df["rating_mva"] = pd.to_numeric(ratings_df["rating_mva"], errors="coerce")
+        invalid = ratings_df["rating_mva"].isna() | (ratings_df["rating_mva"] <= 0)
+        if invalid.any():
+            st.warning(f"Skipping {int(invalid.sum())} rows without a positive rating_mva")
+        ratings_df = ratings_df[~invalid]
+        st.dataframe(ratings_df.head())
+        if st.button("Upload ratings"):
+            try:
+                written = upsert_transformer_ratings(ratings_df)
+                read_transformer_ratings.clear()
+                fleet_transformer_screening.clear()
+                st.success(f"{written} transformer ratings stored")
+            except Exception as e:
+                st.error(f"Error storing ratings: {e}")
+    prof.mark("fetch")
+
+prof.finish()
@@ -0,0 +1,91 @@
+"""
+### FILE: pages/8_Data_Quality.py
+Fleet-wide data-quality scan of the 33kV feeder load readings: missing
+hours, duplicated readings, flat-lined meters and outliers.
+"""
+
+import time
+import streamlit as st
+from utils.auth import login
+import plotly.express as px
+from utils.db import read_feeder_load_keys, read_load_quality_issues, write_load_quality_issues
+from utils.data_quality import ISSUE_TYPES, scan_load_quality, summarize_issues
+from utils.figures import cached_figure, data_token
+from utils.profiler import start_profiler
+from datetime import date, timedelta
+
+prof = start_profiler("Data Quality")
+login()
+prof.mark("login")
+
+st.set_page_config(page_title="Data Quality", layout="wide")
+
+st.title("Load Data Quality")
+
+today = date.today()
+start_default = today - timedelta(days=30)
+start_date, end_date = st.date_input("Select date range", value=[start_default, today], key="dq_dates")
+
+with st.expander("Scan settings"):
+    c1, c2, c3 = st.columns(3)
+    stuck_hours = c1.number_input("Stuck run length (hours)", min_value=2, max_value=72, value=6)
+    z_threshold = c2.number_input("Outlier z-score", min_value=1.0, max_value=10.0, value=4.0, step=0.5)
+    iqr_factor = c3.number_input("Outlier IQR factor", min_value=1.0, max_value=10.0, value=3.0, step=0.5)
+
+if st.button("Run scan"):
+    t0 = time.perf_counter()
+    with st.spinner("Fetching readings..."):
+        readings = read_feeder_load_keys(str(start_date), str(end_date))
+    prof.mark("fetch")
+    t1 = time.perf_counter()
+    with st.spinner("Scanning..."):
+        found = scan_load_quality(
+            readings, start_date, end_date,
+            stuck_hours=int(stuck_hours), z_threshold=z_threshold, iqr_factor=iqr_factor,
+        )
+    t2 = time.perf_counter()
+    prof.mark("transform")
+    write_load_quality_issues(found, str(start_date), str(end_date))
+    read_load_quality_issues.clear()
+    prof.mark("write")
+    st.success(
+        f"Scanned {len(readings):,} readings: fetch {t1 - t0:.1f}s, scan {t2 - t1:.2f}s, "
+        f"{len(found):,} issues stored"
+    )
+
+issues = read_load_quality_issues(str(start_date), str(end_date))
+prof.mark("fetch")
+if issues.empty:
+    st.info("No stored issues for this range. Run a scan to check the readings.")
+    st.stop()
+
+st.caption(f"Last scanned: {issues['scanned_at'].max()}")
+
+counts = issues["issue"].value_counts()
+cols = st.columns(len(ISSUE_TYPES))
+for col, issue in zip(cols, ISSUE_TYPES):
+    col.metric(issue.replace("_", " ").title(), f"{int(counts.get(issue, 0)):,}")
+
+summary = summarize_issues(issues)
+prof.mark("transform")
+fig = cached_figure(("quality_feeders", data_token(summary)), lambda: px.bar(
+    summary.head(20), x="feeder_33kv", y=list(ISSUE_TYPES),
+    title="Feeders with the most data-quality issues",
+))
+prof.mark("figure")
+st.plotly_chart(fig, use_container_width=True)
+prof.mark("chart")
+
+st.subheader("Issues by feeder")
+prof.mark("transform")
+st.dataframe(summary)
+prof.mark("render")
+
+st.subheader("Issue details")
+issue_sel = st.selectbox("Issue type", options=["All"] + list(ISSUE_TYPES))
+detail = issues if issue_sel == "All" else issues[issues["issue"] == issue_sel]
+prof.mark("transform")
+st.dataframe(detail.drop(columns=["scanned_at"]))
+prof.mark("render")
+
+prof.finish()
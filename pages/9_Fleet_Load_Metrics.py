@@ -0,0 +1,86 @@
+"""
+### FILE: pages/9_Fleet_Load_Metrics.py
+Fleet-wide ranking of load factor, utilization, diversity factor and
+coincident vs non-coincident peaks for every asset and hierarchy level.
+"""
+
+import streamlit as st
+from utils.auth import login
+import plotly.express as px
+from utils.load_cube import get_load_cube
+from utils.load_metrics import fleet_load_metrics
+from utils.figures import cached_figure
+from utils.profiler import start_profiler
+from datetime import date, timedelta
+
+prof = start_profiler("Fleet Load Metrics")
+login()
+prof.mark("login")
+
+st.set_page_config(page_title="Fleet Load Metrics", layout="wide")
+
+st.title("Fleet Load Metrics")
+
+today = date.today()
+start_default = today - timedelta(days=7)
+start_date, end_date = st.date_input("Select date range", value=[start_default, today], key="fleet_dates")
+
+col1, col2, col3 = st.columns(3)
+kind = col1.radio("Assets", options=["feeder", "transformer"], format_func=str.title, horizontal=True)
+level = col2.selectbox("Level", options=["asset", "station", "area", "region"], format_func=str.title)
+
+cube = get_load_cube(kind)
+tables = fleet_load_metrics(kind, str(start_date), str(end_date), cube.version)
+prof.mark("fetch")
+if not tables:
+    st.warning("No load data for this range")
+    st.stop()
+
+table = tables[level]
+rank_options = ["peak_mw", "avg_mw", "energy_mwh", "load_factor", "utilization_pct"]
+if level == "asset":
+    rank_options.append("coincidence_factor")
+else:
+    rank_options += ["diversity_factor", "non_coincident_peak_mw"]
+rank_by = col3.selectbox("Rank by", options=rank_options)
+ascending = st.checkbox("Lowest first")
+
+ranked = table.sort_values(rank_by, ascending=ascending, na_position="last").reset_index(drop=True)
+ranked["rank"] = range(1, len(ranked) + 1)
+name_col = "asset" if level == "asset" else level
+
+if level != "asset":
+    k1, k2, k3 = st.columns(3)
+    k1.metric(f"{level.title()}s", f"{len(table)}")
+    k2.metric("Median load factor", f"{table['load_factor'].median():.2f}")
+    k3.metric("Median diversity factor", f"{table['diversity_factor'].median():.2f}")
+
+# charts are only rebuilt when the cube, the range or the ranking changes
+fig_key = (kind, str(start_date), str(end_date), cube.version, level, rank_by, ascending)
+prof.mark("transform")
+fig = cached_figure(("fleet_ranking",) + fig_key, lambda: px.bar(
+    ranked.head(20), x=name_col, y=rank_by, title=f"Top 20 {level}s by {rank_by}"
+))
+prof.mark("figure")
+st.plotly_chart(fig, use_container_width=True)
+prof.mark("chart")
+
+if level != "asset":
+    def _peaks_figure():
+        peaks = ranked.head(20).melt(
+            id_vars=[name_col], value_vars=["peak_mw", "non_coincident_peak_mw"],
+            var_name="peak", value_name="mw",
+        )
+        return px.bar(peaks, x=name_col, y="mw", color="peak", barmode="group",
+                      title="Coincident vs non-coincident peak")
+
+    fig2 = cached_figure(("fleet_peaks",) + fig_key, _peaks_figure)
+    prof.mark("figure")
+    st.plotly_chart(fig2, use_container_width=True)
+    prof.mark("chart")
+
+prof.mark("transform")
+st.dataframe(ranked)
+prof.mark("render")
+
+prof.finish()
@@ -0,0 +1,46 @@
+"""Command-line utility that maintains the asset dimension tables.
+
+Creates the ``dim_*`` tables, the integer key columns and their indexes,
+then resolves the keys of every fact row that only carries text names.
+Also adds and backfills the outage fingerprint and full-text search columns
+used by uploads and search.  Run it once after deploying; the dashboard refuses to start until it has
+been run.  Rows loaded later, including those of the external import jobs,
+are keyed by the running dashboard (before each load cube refresh and on
+every cache warmer cycle); running this again after a bulk load keys them
+right away.
+
+Usage (from workspace root, after activating your venv):
+    python sync_dimensions.py [table ...]
+"""
+import sys
+
+from utils.db import (
+    FACT_DIMENSIONS,
+    ensure_dimension_schema,
+    ensure_outage_fingerprints,
+    ensure_outage_search,
+    sync_dimension_keys,
+)
+from utils.load_cube import request_rebuild
+
+
+def main():
+    tables = sys.argv[1:] or list(FACT_DIMENSIONS)
+    unknown = [t for t in tables if t not in FACT_DIMENSIONS]
+    if unknown:
+        print(f"Unknown table(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        ensure_dimension_schema()
+        sync_dimension_keys(tables)
+        request_rebuild()  # re-keyed rows can move history between cube assets
+        ensure_outage_fingerprints()
+        ensure_outage_search()
+    except Exception as e:
+        print(f"Failed to sync dimensions: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Dimension keys synced for: {', '.join(tables)}")
+
+
+if __name__ == "__main__":
+    main()
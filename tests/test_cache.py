@@ -0,0 +1,125 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils.cache import MemoryCache
+
+MB = 1024 * 1024
+
+
+def _block(mb: float) -> np.ndarray:
+    return np.zeros(int(mb * MB), dtype=np.uint8)
+
+
+def _run_concurrently(n, target):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_misses_compute_once():
+    cache = MemoryCache(10 * MB)
+    calls, results = [], []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    _run_concurrently(8, lambda: results.append(cache.get_or_compute(("k",), compute, ttl=60)))
+
+    assert len(calls) == 1
+    assert results == ["value"] * 8
+    stats = cache.stats()
+    assert stats["coalesced"] == 7
+    assert stats["inflight"] == 0
+    assert cache.get(("k",)) == (True, "value")
+
+
+def test_waiters_share_the_leader_error():
+    cache = MemoryCache(10 * MB)
+    calls, errors = [], []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        raise RuntimeError("boom")
+
+    def call():
+        try:
+            cache.get_or_compute(("k",), compute, ttl=60)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    _run_concurrently(4, call)
+
+    assert len(calls) == 1
+    assert errors == ["boom"] * 4
+    assert cache.get(("k",)) == (False, None)
+
+
+def test_clear_during_compute_does_not_store_result():
+    cache = MemoryCache(10 * MB)
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait()
+        return "old"
+
+    leader = threading.Thread(target=lambda: cache.get_or_compute(("k",), compute, ttl=60))
+    leader.start()
+    started.wait()
+    cache.clear()
+    release.set()
+    leader.join()
+
+    assert cache.get(("k",)) == (False, None)
+    assert cache.get_or_compute(("k",), lambda: "new", ttl=60) == "new"
+
+
+def test_greedy_dual_evicts_cheapest_per_byte_first():
+    cache = MemoryCache(3 * MB)
+    cache.put(("expensive",), _block(1), cost=10.0, ttl=60)
+    cache.put(("cheap",), _block(1), cost=0.01, ttl=60)
+    cache.put(("medium",), _block(1), cost=1.0, ttl=60)
+
+    cache.put(("new",), _block(1), cost=1.0, ttl=60)
+
+    assert cache.get(("cheap",))[0] is False
+    assert all(cache.get((k,))[0] for k in ("expensive", "medium", "new"))
+    assert cache.stats()["evictions"] == 1
+    assert cache.bytes <= cache.max_bytes
+
+
+def test_greedy_dual_ages_out_idle_entries():
+    cache = MemoryCache(2 * MB)
+    cache.put(("idle",), _block(1), cost=1.0, ttl=60)
+    # each eviction raises the clock to the evicted priority, so newer
+    # entries outrank an older, slightly costlier one that is never hit
+    for i in range(3):
+        cache.put(("busy", i), _block(1), cost=0.9, ttl=60)
+
+    assert cache.get(("idle",))[0] is False
+
+
+def test_entry_larger_than_budget_is_served_not_kept():
+    cache = MemoryCache(1 * MB)
+    value = cache.get_or_compute(("big",), lambda: _block(2), ttl=60)
+
+    assert value.nbytes == 2 * MB
+    assert cache.get(("big",)) == (False, None)
+    assert cache.stats()["rejected"] == 1
+
+
+@pytest.mark.parametrize("ttl", [0.0, -1.0])
+def test_expired_entries_are_misses(ttl):
+    cache = MemoryCache(1 * MB)
+    cache.put(("k",), "value", cost=1.0, ttl=ttl)
+
+    assert cache.get(("k",)) == (False, None)
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_quality import scan_load_quality
+from utils.db import time_order
+
+
+def _readings(feeder_id, day, loads):
+    return pd.DataFrame({
+        "feeder_id": feeder_id, "reading_date": day,
+        "reading_time": time_order[: len(loads)], "load_mw": loads,
+    })
+
+
+def _issues(found, issue):
+    return found[found["issue"] == issue].reset_index(drop=True)
+
+
+def test_clean_feeder_reports_nothing():
+    rng = np.random.default_rng(0)
+    readings = _readings(1, "2024-01-01", 10 + rng.normal(0, 0.5, len(time_order)))
+
+    assert scan_load_quality(readings, "2024-01-01", "2024-01-01").empty
+
+
+def test_missing_duplicate_and_stuck_readings():
+    loads = np.arange(1.0, len(time_order) + 1)
+    loads[5:12] = 7.0  # seven equal readings in a row
+    day1 = _readings(1, "2024-01-01", loads)
+    day2 = _readings(1, "2024-01-02", np.arange(1.0, 21.0))  # four hours short
+    readings = pd.concat([day1, day1.iloc[[3]], day2], ignore_index=True)
+
+    found = scan_load_quality(readings, "2024-01-01", "2024-01-02", stuck_hours=6)
+
+    missing = _issues(found, "missing_hours")
+    assert missing[["reading_date", "value"]].values.tolist() == [[pd.Timestamp("2024-01-02").date(), 4.0]]
+    duplicate = _issues(found, "duplicate")
+    assert duplicate[["reading_time", "value"]].values.tolist() == [[time_order[3], 1.0]]
+    stuck = _issues(found, "stuck")
+    assert stuck[["reading_time", "value"]].values.tolist() == [[time_order[5], 7.0]]
+
+
+def test_outlier_against_the_feeders_own_distribution():
+    rng = np.random.default_rng(1)
+    loads = 10 + rng.normal(0, 0.5, len(time_order))
+    loads[14] = 80.0
+    found = scan_load_quality(_readings(1, "2024-01-01", loads), "2024-01-01", "2024-01-01")
+
+    outlier = _issues(found, "outlier")
+    assert outlier["reading_time"].tolist() == [time_order[14]]
+    assert outlier["value"].iloc[0] > 4.0  # z-score
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.energy_not_served import estimate_energy_not_served
+
+
+class FakeCube:
+    """Constant-load feeder cube over ``days`` starting 2024-01-01."""
+
+    def __init__(self, feeders, days=30, load=10.0):
+        self.feeders = np.asarray(feeders, dtype=object)
+        self.values = np.full((len(feeders), days, 24), load, dtype=np.float32)
+        self.dates = np.datetime64("2024-01-01") + np.arange(days)
+
+    def window(self, start_date, end_date):
+        return self.values, self.dates
+
+    def labels(self, column):
+        return self.feeders
+
+
+def _outages(*rows):
+    return pd.DataFrame([
+        {"id": i, "feeder_33kv": feeder, "station": "S1", "party_responsible": "P",
+         "date_off": "2024-01-20", "time_off": off, "date_on": "2024-01-20", "time_on": on, "last_load": last}
+        for i, (feeder, off, on, last) in enumerate(rows, start=1)
+    ])
+
+
+def test_partial_hours_are_weighted_by_overlap():
+    ens = estimate_energy_not_served(
+        _outages(("F1", "10:30:00", "12:15:00", None)), FakeCube(["F1"]), "2024-01-15", "2024-01-25",
+    )
+
+    assert ens["outage_hours"].iloc[0] == pytest.approx(1.75)
+    assert ens["ens_mwh"].iloc[0] == pytest.approx(17.5)
+    assert ens["measured_pct"].iloc[0] == pytest.approx(100.0)
+
+
+def test_zero_readings_use_the_typical_hour_profile():
+    cube = FakeCube(["F1"])
+    cube.values[0, 19, 10:12] = 0.0  # feeder reads zero while it is out
+
+    ens = estimate_energy_not_served(
+        _outages(("F1", "10:00:00", "12:00:00", 99.0)), cube, "2024-01-15", "2024-01-25",
+    )
+
+    assert ens["ens_mwh"].iloc[0] == pytest.approx(20.0)
+    assert ens["measured_pct"].iloc[0] == pytest.approx(0.0)
+
+
+def test_feeders_without_readings_fall_back_to_last_load():
+    ens = estimate_energy_not_served(
+        _outages(("F1", "10:00:00", "11:00:00", None), ("F9", "10:30:00", "12:00:00", 4.0),
+                 ("F8", "10:00:00", "11:00:00", None)),
+        FakeCube(["F1"]), "2024-01-15", "2024-01-25",
+    )
+
+    assert ens["ens_mwh"].iloc[1] == pytest.approx(6.0)
+    assert ens["outage_hours"].iloc[1] == pytest.approx(1.5)
+    assert ens["measured_pct"].iloc[1] == 0.0
+    assert np.isnan(ens["ens_mwh"].iloc[2])
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import load_cube
+from utils.db import time_order
+from utils.load_cube import LoadCube
+
+
+class FakeSource:
+    """In-memory stand-in for the feeder load table behind the cube."""
+
+    def __init__(self, days, feeders=(1, 2)):
+        self.rows = pd.DataFrame([
+            {"feeder_id": f, "region_id": 1, "area_id": 1, "station_id": 10 + f,
+             "reading_date": day, "reading_time": t, "load_mw": float(f)}
+            for day in days for f in feeders for t in time_order
+        ])
+        self.cell_reads = []
+
+    def digest(self, kind, since=None):
+        rows = self.rows if since is None else self.rows[self.rows["reading_date"] >= since]
+        return rows.groupby("reading_date", as_index=False).agg(
+            n_rows=("load_mw", "size"), load_sum=("load_mw", "sum"), key_sum=("feeder_id", "sum"),
+        )
+
+    def cells(self, kind, dates=None):
+        self.cell_reads.append(None if dates is None else list(dates))
+        if dates is None:
+            return self.rows.copy()
+        return self.rows[self.rows["reading_date"].isin(list(dates))].copy()
+
+
+@pytest.fixture
+def source(monkeypatch):
+    days = [str(d.date()) for d in pd.date_range("2024-01-01", periods=10)]
+    fake = FakeSource(days)
+    monkeypatch.setattr(load_cube, "read_load_digest", fake.digest)
+    monkeypatch.setattr(load_cube, "read_load_cells", fake.cells)
+    monkeypatch.setattr(load_cube, "sync_dimension_keys", lambda tables=None: 0)
+    return fake
+
+
+def test_refresh_rereads_only_the_changed_day(source, tmp_path):
+    cube = LoadCube("feeder", str(tmp_path)).refresh(max_age=0)
+    assert (cube.n_assets, cube.n_days) == (2, 10)
+    version = cube.version
+
+    cube.refresh(max_age=0)
+    assert cube.version == version
+    assert source.cell_reads == [None]
+
+    source.rows.loc[(source.rows["reading_date"] == "2024-01-09") & (source.rows["feeder_id"] == 2)
+                    & (source.rows["reading_time"] == "05:00"), "load_mw"] = 7.5
+    cube.refresh(max_age=0)
+
+    assert source.cell_reads[-1] == ["2024-01-09"]
+    assert cube.version == version + 1
+    row = cube.assets.index[cube.assets["feeder_id"] == 2][0]
+    assert cube.values[row, 8, time_order.index("05:00")] == 7.5
+    assert np.nansum(cube.values[row, 7]) == 2.0 * len(time_order)
+
+
+def test_new_day_and_asset_are_appended(source, tmp_path):
+    cube = LoadCube("feeder", str(tmp_path)).refresh(max_age=0)
+    extra = source.rows[source.rows["reading_date"] == "2024-01-10"].assign(reading_date="2024-01-11")
+    new_feeder = extra[extra["feeder_id"] == 1].assign(feeder_id=3, load_mw=3.0)
+    source.rows = pd.concat([source.rows, extra, new_feeder], ignore_index=True)
+
+    cube.refresh(max_age=0)
+
+    assert source.cell_reads[-1] == ["2024-01-11"]
+    assert (cube.n_assets, cube.n_days) == (3, 11)
+    row = cube.assets.index[cube.assets["feeder_id"] == 3][0]
+    assert np.isnan(cube.values[row, :10]).all()
+    assert (cube.values[row, 10] == 3.0).all()
+
+
+def test_changes_before_the_digest_window_wait_for_a_full_rebuild(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(load_cube, "DIGEST_DAYS", 3)
+    cube = LoadCube("feeder", str(tmp_path)).refresh(max_age=0)
+    version = cube.version
+    source.rows.loc[source.rows["reading_date"] == "2024-01-02", "load_mw"] = 9.0
+
+    cube.refresh(max_age=0)
+    assert cube.version == version
+    assert cube.values[0, 1, 0] != 9.0
+
+    cube.refresh(max_age=0, full=True)
+    assert cube.version == version + 1
+    assert (cube.values[:, 1] == 9.0).all()
+
+
+def test_reopened_cube_shares_the_stored_state(source, tmp_path):
+    cube = LoadCube("feeder", str(tmp_path)).refresh(max_age=0)
+    other = LoadCube("feeder", str(tmp_path))
+
+    assert other.version == cube.version
+    np.testing.assert_array_equal(other.values, cube.values)
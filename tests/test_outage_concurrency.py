@@ -0,0 +1,47 @@
+import pandas as pd
+
+from utils.outage_concurrency import concurrency_peaks, concurrency_timeline
+
+
+def _outages(*rows):
+    return pd.DataFrame([
+        {"station": station, "date_off": "2024-01-01", "time_off": off,
+         "date_on": "2024-01-01", "time_on": on, "last_load": load}
+        for station, off, on, load in rows
+    ])
+
+
+def test_overlapping_outages_add_up():
+    timeline = concurrency_timeline(_outages(
+        ("S1", "10:00:00", "12:00:00", 5.0),
+        ("S1", "11:00:00", "13:00:00", 3.0),
+    ))
+
+    assert timeline["concurrent"].tolist() == [1, 2, 1, 0]
+    assert timeline["lost_mw"].tolist() == [5.0, 8.0, 3.0, 0.0]
+    peaks = concurrency_peaks(timeline)
+    assert peaks["peak_concurrent"].iloc[0] == 2
+    assert peaks["peak_concurrent_at"].iloc[0] == pd.Timestamp("2024-01-01 11:00")
+
+
+def test_back_to_back_outages_do_not_overlap():
+    timeline = concurrency_timeline(_outages(
+        ("S1", "10:00:00", "11:00:00", 1.0),
+        ("S1", "11:00:00", "12:00:00", 1.0),
+    ))
+
+    assert timeline["concurrent"].max() == 1
+
+
+def test_groups_are_swept_independently():
+    timeline = concurrency_timeline(_outages(
+        ("S1", "10:00:00", "12:00:00", 1.0),
+        ("S2", "11:00:00", "12:00:00", 2.0),
+        ("S2", "11:30:00", "13:00:00", 2.0),
+    ), level="station")
+
+    peaks = concurrency_peaks(timeline, level="station").set_index("station")
+    assert peaks.loc["S1", "peak_concurrent"] == 1
+    assert peaks.loc["S2", "peak_concurrent"] == 2
+    assert peaks.loc["S2", "peak_lost_mw"] == 4.0
+    assert (timeline.groupby("station")["concurrent"].last() == 0).all()
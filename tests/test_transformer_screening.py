@@ -0,0 +1,18 @@
+import numpy as np
+
+from utils.transformer_screening import longest_run
+
+
+def test_longest_run_per_row():
+    mask = np.array([
+        [1, 1, 0, 1, 1, 1, 0],
+        [0, 0, 0, 0, 0, 0, 0],
+        [1, 1, 1, 1, 1, 1, 1],
+        [0, 1, 0, 1, 0, 1, 1],
+    ], dtype=bool)
+
+    assert longest_run(mask).tolist() == [3, 0, 7, 2]
+
+
+def test_longest_run_without_hours():
+    assert longest_run(np.zeros((3, 0), dtype=bool)).tolist() == [0, 0, 0]
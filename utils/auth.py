@@ -1,8 +1,15 @@
+import os
+
 import streamlit as st
 from sqlalchemy import text
 import bcrypt
 
-from .db import get_engine
+from .cache_warmer import start_cache_warmer
+from .db import SchemaNotReady, get_read_engine, require_schema
+
+
+# comma-separated usernames that see admin-only diagnostics
+ADMIN_USERS = {u.strip() for u in os.getenv("ADMIN_USERS", "").split(",") if u.strip()}
 
 
 def _hash_password(password: str) -> str:
@@ -26,7 +33,7 @@ def authenticate(username: str, password: str) -> bool:
     if not username or not password:
         return False
 
-    engine = get_engine()
+    engine = get_read_engine()
     query = text("SELECT password_hash FROM users WHERE username = :u")
     try:
         with engine.connect() as conn:
@@ -41,6 +48,11 @@ def authenticate(username: str, password: str) -> bool:
     return _verify_password(password, stored_hash)
 
 
+def is_admin() -> bool:
+    """True when the logged-in user is listed in ``ADMIN_USERS``."""
+    return bool(st.session_state.get("logged_in")) and st.session_state.get("username") in ADMIN_USERS
+
+
 def login():
     """Render a minimal login form in the sidebar and enforce authentication.
 
@@ -50,6 +62,14 @@ def login():
     shown.  If the user fails or has not yet submitted credentials the
     execution is stopped so that the rest of the app doesn't render.
     """
+    try:
+        require_schema()
+    except SchemaNotReady as e:
+        st.error(str(e))
+        st.stop()
+    # keep the default dashboard windows warm for everyone (once per process)
+    start_cache_warmer()
+
     if "logged_in" not in st.session_state:
         st.session_state.logged_in = False
         st.session_state.username = None
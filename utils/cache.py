@@ -0,0 +1,267 @@
+"""
+### FILE: utils/cache.py
+Memory-bounded result cache for the database readers.
+
+``st.cache_data`` has no memory cap: every distinct date range picked by any
+user keeps another full DataFrame alive until its TTL runs out.  ``cached``
+replaces it for the readers with one process-wide cache that
+
+* measures every entry in bytes (``DataFrame.memory_usage(deep=True)``),
+* keeps the total under ``CACHE_MAX_MB`` (environment, default 1024),
+* evicts cost-aware LRU (GreedyDual-Size): an entry's priority is the
+  eviction clock plus ``compute seconds / MB``, refreshed on every hit, so
+  cheap-to-rebuild and large entries go first and idle entries age out,
+* coalesces concurrent misses (single flight): the first caller for a key
+  runs the query, callers arriving while it runs wait for and share its
+  result instead of sending the identical scan to PostgreSQL again,
+* counts hits, misses, coalesced misses (queries saved), evictions and
+  expirations (``cache_stats``).
+
+Callers get a copy of the cached value, as with ``st.cache_data``, so pages
+may add columns to what they receive.  ``fn.clear()`` drops all entries of
+one function and ``fn.clear(*args)`` a single entry.  ``cached_value`` puts
+other shared objects (the Plotly figures of ``utils.figures``) under the
+same byte budget, uncopied.
+"""
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", "1024"))
+
+
+def value_nbytes(value: Any) -> int:
+    """Approximate in-memory size of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(value_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(value_nbytes(v) for v in value)
+    if hasattr(value, "to_plotly_json"):
+        # Plotly figure: trace arrays and layout as plain dicts/lists/arrays
+        return value_nbytes(value.to_plotly_json())
+    nbytes = getattr(value, "nbytes", None)
+    return int(nbytes) if nbytes is not None else sys.getsizeof(value)
+
+
+def copy_value(value: Any) -> Any:
+    """Copy pandas objects (also inside dicts) so callers cannot mutate the cache."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: copy_value(v) for k, v in value.items()}
+    return value
+
+
+@dataclass
+class _Entry:
+    value: Any
+    nbytes: int
+    cost: float  # seconds it took to compute
+    expires: float
+    priority: float = 0.0
+
+
+class _Flight:
+    """One in-progress computation that concurrent callers of the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.stale = False  # cleared while running: serve the waiters, don't store
+
+
+class MemoryCache:
+    """Byte-budgeted key/value store shared by every ``cached`` function."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: Dict[tuple, _Entry] = {}
+        self._inflight: Dict[tuple, _Flight] = {}
+        self._lock = threading.Lock()
+        self._clock = 0.0
+        self.bytes = 0
+        self.hits = self.misses = self.coalesced = self.evictions = self.expirations = self.rejected = 0
+
+    def _priority(self, entry: _Entry) -> float:
+        return self._clock + entry.cost / max(entry.nbytes / 1e6, 1e-3)
+
+    def _drop(self, key: tuple) -> None:
+        entry = self._entries.pop(key)
+        self.bytes -= entry.nbytes
+
+    def _lookup(self, key: tuple):
+        # caller holds the lock
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        if entry.expires <= time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+        entry.priority = self._priority(entry)
+        self.hits += 1
+        return True, entry.value
+
+    def get(self, key: tuple):
+        """Return ``(True, value)`` for a live entry, ``(False, None)`` otherwise."""
+        with self._lock:
+            return self._lookup(key)
+
+    def get_or_compute(self, key: tuple, compute: Callable[[], Any], ttl: float) -> Any:
+        """Cached value of ``key``; on a miss only one caller runs ``compute()``.
+
+        Callers missing the same key while it runs wait for that result (or
+        its exception) instead of computing it again.
+        """
+        with self._lock:
+            hit, value = self._lookup(key)
+            if hit:
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            started = time.perf_counter()
+            flight.value = compute()
+            self.put(key, flight.value, time.perf_counter() - started, ttl, flight)
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.done.set()
+
+    def put(self, key: tuple, value: Any, cost: float, ttl: float, flight: Optional[_Flight] = None) -> None:
+        entry = _Entry(value, value_nbytes(value), cost, time.monotonic() + ttl)
+        with self._lock:
+            if flight is not None and flight.stale:
+                # cleared while ``flight`` was computing (checked under the
+                # lock, so a concurrent clear cannot slip in before the store)
+                return
+            if key in self._entries:
+                self._drop(key)
+            if entry.nbytes > self.max_bytes:
+                # larger than the whole budget: serve it once, never keep it
+                self.rejected += 1
+                return
+            self._evict(self.max_bytes - entry.nbytes)
+            entry.priority = self._priority(entry)
+            self._entries[key] = entry
+            self.bytes += entry.nbytes
+
+    def _evict(self, target: int) -> None:
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if e.expires <= now]:
+            self._drop(key)
+            self.expirations += 1
+        while self.bytes > target and self._entries:
+            key = min(self._entries, key=lambda k: self._entries[k].priority)
+            self._clock = self._entries[key].priority
+            self._drop(key)
+            self.evictions += 1
+
+    def clear(self, match: Optional[Callable[[tuple], bool]] = None) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if match is None or match(k)]:
+                self._drop(key)
+            # queries already running may predate the change that triggered
+            # the clear: later callers start a fresh one
+            for key in [k for k in self._inflight if match is None or match(k)]:
+                self._inflight.pop(key).stale = True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            per_function: Dict[str, int] = {}
+            for key, entry in self._entries.items():
+                per_function[key[0]] = per_function.get(key[0], 0) + entry.nbytes
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "coalesced": self.coalesced,
+                "inflight": len(self._inflight),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "rejected": self.rejected,
+                "bytes_by_function": per_function,
+            }
+
+
+_cache = MemoryCache(int(CACHE_MAX_MB * 1024 * 1024))
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters and current bytes of the process-wide cache."""
+    return _cache.stats()
+
+
+def cached_value(key: tuple, compute: Callable[[], Any], ttl: float = float("inf")) -> Any:
+    """``compute()`` cached under ``key`` (``key[0]`` names the owner in ``cache_stats``).
+
+    The value is returned as stored, not copied; callers must not mutate it.
+    """
+    return _cache.get_or_compute(key, compute, ttl)
+
+
+def cached(ttl: float) -> Callable:
+    """Decorator: cache a reader's result in the memory-bounded cache for ``ttl`` seconds.
+
+    Arguments must be hashable; defaults are bound first, so ``f(a)`` and
+    ``f(a, b=default)`` share an entry.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        def make_key(args, kwargs) -> tuple:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return (name, tuple(bound.arguments.items()))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            value = _cache.get_or_compute(key, lambda: func(*args, **kwargs), ttl)
+            return copy_value(value)
+
+        def clear(*args, **kwargs) -> None:
+            if args or kwargs:
+                key = make_key(args, kwargs)
+                _cache.clear(lambda k: k == key)
+            else:
+                _cache.clear(lambda k: k[0] == name)
+
+        wrapper.clear = clear
+        return wrapper
+
+    return decorator
@@ -0,0 +1,122 @@
+"""
+### FILE: utils/cache_warmer.py
+Background warmer for the dashboards' default date windows.
+
+Every page opens on "last 7 days" or "last 30 days" ending today, so the
+first operator after each ``CACHE_TTL`` expiry used to pay the full query and
+aggregation cost.  One daemon thread per server process recomputes those
+default windows ``WARM_LEAD_SECONDS`` before they expire: each entry is
+cleared and immediately rebuilt, so interactive users nearly always hit a
+warm cache.
+
+The load pages (1–4, 9) read the feeder/transformer load cubes rather than
+``read_feeder_load``/``read_transformer_load``, so the cubes are what gets
+warmed for them.  Each cycle first keys the fact rows loaded since the last
+one (``sync_dimension_keys``).  Set ``CACHE_WARMER=0`` to disable the thread.
+"""
+import os
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, List, Tuple
+
+from .db import (
+    CACHE_TTL,
+    read_line_load_hourly,
+    read_line_load_peaks,
+    read_line_load_voltage_breakdown,
+    read_outage_hierarchy,
+    read_outages,
+    read_reliability_summary,
+    sync_dimension_keys,
+)
+from .energy_not_served import outage_energy_not_served
+from .load_cube import get_load_cube
+from .load_metrics import fleet_load_metrics
+from .transformer_screening import fleet_transformer_screening
+
+CACHE_WARMER = os.getenv("CACHE_WARMER", "1") != "0"
+# how long before expiry each default window is rebuilt
+WARM_LEAD_SECONDS = 60
+
+# default window lengths of the pages, in days
+LOAD_WINDOW_DAYS = 7
+OUTAGE_WINDOW_DAYS = 30
+
+_lock = threading.Lock()
+_thread = None
+
+
+def _window(days: int, today: date) -> Tuple[str, str]:
+    return str(today - timedelta(days=days)), str(today)
+
+
+def default_window_jobs(today: date = None) -> List[Tuple[Callable, Tuple[Any, ...]]]:
+    """``(cached function, args)`` for every default page window of ``today``.
+
+    Cube versions are read when the jobs are built, so refresh the cubes
+    first (see :func:`warm_default_windows`).
+    """
+    today = today or date.today()
+    week = _window(LOAD_WINDOW_DAYS, today)
+    month = _window(OUTAGE_WINDOW_DAYS, today)
+    feeder_version = get_load_cube("feeder").version
+    transformer_version = get_load_cube("transformer").version
+    return [
+        (read_outages, month),
+        (outage_energy_not_served, (*month, feeder_version)),
+        (read_outage_hierarchy, month),
+        (read_reliability_summary, (*month, "All", "All", "All", "All")),
+        (fleet_load_metrics, ("feeder", *week, feeder_version)),
+        (fleet_load_metrics, ("transformer", *week, transformer_version)),
+        (fleet_transformer_screening, (*week, transformer_version)),
+        (read_line_load_hourly, (*week, "transmission_interface", 10)),
+        (read_line_load_peaks, (*week, "transmission_interface")),
+        (read_line_load_voltage_breakdown, (*week, "transmission_interface")),
+    ]
+
+
+def warm_default_windows(today: date = None) -> int:
+    """Rebuild every default window once; returns the number of jobs warmed."""
+    warmed = 0
+    try:
+        sync_dimension_keys()  # rows loaded since the last cycle
+    except Exception as e:
+        print(f"Cache warmer: key sync failed: {e}", file=sys.stderr)
+    for kind in ("feeder", "transformer"):
+        try:
+            get_load_cube(kind)
+        except Exception as e:
+            print(f"Cache warmer: {kind} cube refresh failed: {e}", file=sys.stderr)
+    try:
+        jobs = default_window_jobs(today)
+    except Exception as e:
+        print(f"Cache warmer: could not build jobs: {e}", file=sys.stderr)
+        return warmed
+    for fn, args in jobs:
+        try:
+            fn.clear(*args)
+            fn(*args)
+            warmed += 1
+        except Exception as e:
+            print(f"Cache warmer: {fn.__name__}{args} failed: {e}", file=sys.stderr)
+    return warmed
+
+
+def _run() -> None:
+    while True:
+        warm_default_windows()
+        time.sleep(max(CACHE_TTL - WARM_LEAD_SECONDS, 30))
+
+
+def start_cache_warmer() -> bool:
+    """Start the warmer thread once per process; safe to call on every rerun."""
+    global _thread
+    if not CACHE_WARMER:
+        return False
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name="cache-warmer", daemon=True)
+            _thread.start()
+    return True
@@ -0,0 +1,146 @@
+"""
+### FILE: utils/data_quality.py
+Vectorized data-quality checks for hourly load readings.
+
+Readings are laid out on a dense (feeder, day, hour) grid so that every
+check is a handful of NumPy passes over the whole fleet instead of a
+per-feeder loop.  The scanner reports:
+
+* ``missing_hours`` – feeder-days with fewer than 24 ``time_order`` slots
+* ``duplicate``     – extra readings for an already filled slot
+* ``stuck``         – runs of identical consecutive values (flat-lined meter)
+* ``outlier``       – values far outside the feeder's own distribution
+"""
+import warnings
+from datetime import date
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from .db import time_order
+
+ISSUE_TYPES = ("missing_hours", "duplicate", "stuck", "outlier")
+
+_HOURS = len(time_order)
+
+
+def _issue_frame(asset_ids, days, slots, issue, values, start) -> pd.DataFrame:
+    reading_time = np.asarray(time_order, dtype=object)[slots] if slots is not None else None
+    return pd.DataFrame({
+        "feeder_id": asset_ids,
+        "reading_date": (np.datetime64(start, "D") + days).astype("datetime64[D]").astype(object),
+        "reading_time": reading_time,
+        "issue": issue,
+        "value": np.asarray(values, dtype=float),
+    })
+
+
+def _runs(mask: np.ndarray):
+    """Return ``(starts, lengths)`` of the True runs in a 1-D boolean array."""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[::2], edges[1::2] - edges[::2]
+
+
+def scan_load_quality(
+    readings: pd.DataFrame,
+    start_date: Union[str, date],
+    end_date: Union[str, date],
+    stuck_hours: int = 6,
+    z_threshold: float = 4.0,
+    iqr_factor: float = 3.0,
+) -> pd.DataFrame:
+    """Scan ``readings`` and return one row per detected issue.
+
+    ``readings`` needs ``feeder_id``, ``reading_date``, ``reading_time`` and
+    ``load_mw`` columns (see ``utils.db.read_feeder_load_keys``).  Zero
+    readings are treated as "feeder off": they are neither reported as stuck
+    nor used for the outlier statistics.
+    """
+    start = np.datetime64(pd.Timestamp(start_date).date(), "D")
+    n_days = int((np.datetime64(pd.Timestamp(end_date).date(), "D") - start).astype(int)) + 1
+    empty = pd.DataFrame(columns=["feeder_id", "reading_date", "reading_time", "issue", "value"])
+    if readings.empty or n_days <= 0:
+        return empty
+
+    slots = pd.Categorical(readings["reading_time"], categories=time_order).codes.astype(np.int64)
+    days = (pd.to_datetime(readings["reading_date"]).to_numpy().astype("datetime64[D]") - start).astype(np.int64)
+    keys = readings["feeder_id"].to_numpy()
+    valid = (slots >= 0) & (days >= 0) & (days < n_days) & pd.notna(keys)
+    asset_ids, asset_idx = np.unique(keys[valid].astype(np.int64), return_inverse=True)
+    n_assets = len(asset_ids)
+    if n_assets == 0:
+        return empty
+
+    cells = (asset_idx * n_days + days[valid]) * _HOURS + slots[valid]
+    counts = np.bincount(cells, minlength=n_assets * n_days * _HOURS)
+    frames = []
+
+    # duplicates: every reading beyond the first in a slot
+    dup = np.flatnonzero(counts > 1)
+    if len(dup):
+        a, rest = np.divmod(dup, n_days * _HOURS)
+        d, s = np.divmod(rest, _HOURS)
+        frames.append(_issue_frame(asset_ids[a], d, s, "duplicate", counts[dup] - 1, start))
+
+    # completeness per feeder-day, between each feeder's first and last day
+    present = (counts > 0).reshape(n_assets, n_days, _HOURS).sum(axis=2)
+    has_data = present > 0
+    first = has_data.argmax(axis=1)
+    last = n_days - 1 - has_data[:, ::-1].argmax(axis=1)
+    day_range = np.arange(n_days)
+    in_service = (day_range >= first[:, None]) & (day_range <= last[:, None])
+    a, d = np.nonzero(in_service & (present < _HOURS))
+    if len(a):
+        frames.append(_issue_frame(asset_ids[a], d, None, "missing_hours", _HOURS - present[a, d], start))
+
+    # dense feeder x hour timeline (one value per slot)
+    values = np.full(n_assets * n_days * _HOURS, np.nan)
+    values[cells] = readings["load_mw"].to_numpy(dtype=float)[valid]
+    values = values.reshape(n_assets, n_days * _HOURS)
+
+    # stuck meters: runs of equal, non-zero consecutive readings.  A trailing
+    # False column keeps runs from crossing into the next feeder's row.
+    same = (values[:, 1:] == values[:, :-1]) & (values[:, 1:] != 0)
+    same = np.concatenate([same, np.zeros((n_assets, 1), dtype=bool)], axis=1).ravel()
+    run_start, run_len = _runs(same)
+    run_len = run_len + 1  # n equal neighbours span n + 1 readings
+    keep = run_len >= stuck_hours
+    if keep.any():
+        a, pos = np.divmod(run_start[keep], n_days * _HOURS)
+        d, s = np.divmod(pos, _HOURS)
+        frames.append(_issue_frame(asset_ids[a], d, s, "stuck", run_len[keep], start))
+
+    # outliers against each feeder's own z-score and IQR fences
+    stats = np.where(values > 0, values, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # feeders without any positive reading yield all-NaN rows
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        mean = np.nanmean(stats, axis=1, keepdims=True)
+        std = np.nanstd(stats, axis=1, keepdims=True)
+        q1, q3 = np.nanpercentile(stats, [25, 75], axis=1, keepdims=True)
+        z = (stats - mean) / std
+        iqr = q3 - q1
+        outside = (stats < q1 - iqr_factor * iqr) | (stats > q3 + iqr_factor * iqr)
+        flagged = (np.abs(z) > z_threshold) | outside
+    a, pos = np.nonzero(flagged)
+    if len(a):
+        d, s = np.divmod(pos, _HOURS)
+        frames.append(_issue_frame(asset_ids[a], d, s, "outlier", z[a, pos], start))
+
+    if not frames:
+        return empty
+    issues = pd.concat(frames, ignore_index=True)
+    return issues.sort_values(["reading_date", "feeder_id", "issue"], kind="stable").reset_index(drop=True)
+
+
+def summarize_issues(issues: pd.DataFrame) -> pd.DataFrame:
+    """Count issues per feeder and type, worst feeders first."""
+    if issues.empty:
+        return pd.DataFrame(columns=["feeder_33kv", *ISSUE_TYPES, "total"])
+    summary = pd.crosstab(issues["feeder_33kv"], issues["issue"])
+    summary = summary.reindex(columns=list(ISSUE_TYPES), fill_value=0)
+    summary["total"] = summary.sum(axis=1)
+    summary.columns.name = None
+    return summary.sort_values("total", ascending=False).reset_index()
@@ -1,10 +1,17 @@
-from typing import Tuple
+from typing import Callable, Dict, Generic, Iterable, Optional, Tuple, TypeVar
+from io import BytesIO
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from sqlalchemy import create_engine, text
 import streamlit as st
 import pandas as pd
 
+from .cache import cached
+
 # if a .env file exists, load variables from it (python-dotenv)
 from dotenv import load_dotenv
 load_dotenv()
@@ -27,6 +34,10 @@ if not DATABASE_URL:
         UserWarning,
     )
 
+# lifetime (seconds) of every cached query result; the background cache
+# warmer (utils/cache_warmer.py) refreshes the default windows just ahead of it
+CACHE_TTL = 300
+
 # -----------------------------
 # CACHE ENGINE AS RESOURCE
 # -----------------------------
@@ -34,6 +45,447 @@ if not DATABASE_URL:
 def get_engine():
     return create_engine(DATABASE_URL, pool_pre_ping=True)
 
+# -----------------------------
+# READ REPLICA
+# -----------------------------
+# Dashboard readers can run against a streaming replica given by
+# READ_DATABASE_URL, with its own connection pool, so heavy scans do not
+# compete with the COPY + upsert loads of the upload page.  Writes, temp-table
+# staging and schema setup always use ``get_engine()``.
+#
+# ``get_read_engine()`` returns the replica only while its replay lag is at
+# most REPLICA_MAX_LAG_SECONDS and falls back to the primary when the replica
+# lags further behind or cannot be reached.  The lag is measured every
+# REPLICA_LAG_CHECK_SECONDS by a background thread, so routing a read never
+# waits on the replica connection.  For REPLICA_MAX_LAG_SECONDS
+# after a write from this process reads also stay on the primary, so a page
+# that clears its caches after an upload does not re-cache stale rows.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "30"))
+REPLICA_LAG_CHECK_SECONDS = 10
+REPLICA_CONNECT_TIMEOUT = 5
+
+# 0 when the replica has replayed everything it streamed, otherwise the age
+# of the last replayed transaction; a server not in recovery reports 0.
+# pg_stat_wal_receiver.status is NULL unless the replica role is granted
+# pg_read_all_stats (GRANT pg_read_all_stats TO <role>); without the grant a
+# running WAL receiver counts as streaming.
+_REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (
+                 SELECT 1 FROM pg_stat_wal_receiver WHERE COALESCE(status, 'streaming') = 'streaming'
+             ) THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END::float8
+"""
+
+_replica_lock = threading.Lock()
+_replica_state = {"checked_at": None, "lag": None, "error": None, "primary_until": 0.0}
+_replica_thread: Optional[threading.Thread] = None
+
+
+@st.cache_resource
+def get_replica_engine():
+    return create_engine(
+        READ_DATABASE_URL, pool_pre_ping=True, connect_args={"connect_timeout": REPLICA_CONNECT_TIMEOUT}
+    )
+
+
+def _check_replica_lag() -> None:
+    # runs without _replica_lock, connecting can take REPLICA_CONNECT_TIMEOUT
+    try:
+        with get_replica_engine().connect() as conn:
+            lag = conn.execute(text(_REPLICA_LAG_QUERY)).scalar()
+        result = {"lag": float(lag), "error": None}
+    except Exception as exc:
+        result = {"lag": None, "error": str(exc).strip().splitlines()[0]}
+    with _replica_lock:
+        _replica_state.update(result, checked_at=time.monotonic())
+
+
+def _watch_replica_lag() -> None:
+    while True:
+        _check_replica_lag()
+        time.sleep(REPLICA_LAG_CHECK_SECONDS)
+
+
+def _start_replica_watch() -> None:
+    """Start the lag-measuring thread once per process."""
+    global _replica_thread
+    with _replica_lock:
+        if _replica_thread is None or not _replica_thread.is_alive():
+            _replica_thread = threading.Thread(target=_watch_replica_lag, name="replica-lag", daemon=True)
+            _replica_thread.start()
+
+
+def _mark_primary_write() -> None:
+    """Keep this process' reads on the primary until the replica has caught up."""
+    with _replica_lock:
+        _replica_state["primary_until"] = time.monotonic() + REPLICA_MAX_LAG_SECONDS
+
+
+def _use_replica() -> bool:
+    if not READ_DATABASE_URL:
+        return False
+    # reads go to the primary until the first measurement is in, and again
+    # when the watcher has been stuck on an unresponsive replica
+    _start_replica_watch()
+    now = time.monotonic()
+    with _replica_lock:
+        lag, checked_at = _replica_state["lag"], _replica_state["checked_at"]
+        return (
+            lag is not None and lag <= REPLICA_MAX_LAG_SECONDS
+            and now - checked_at <= REPLICA_LAG_CHECK_SECONDS + REPLICA_MAX_LAG_SECONDS
+            and now >= _replica_state["primary_until"]
+        )
+
+
+def get_read_engine():
+    """Engine for read-only queries: the replica when it is fresh enough, else the primary."""
+    require_schema()
+    return get_replica_engine() if _use_replica() else get_engine()
+
+
+def read_routing_status() -> dict:
+    """Where reads currently go, with the last measured replica lag."""
+    using_replica = _use_replica()
+    with _replica_lock:
+        return {
+            "configured": bool(READ_DATABASE_URL),
+            "target": "replica" if using_replica else "primary",
+            "lag_seconds": _replica_state["lag"],
+            "max_lag_seconds": REPLICA_MAX_LAG_SECONDS,
+            "error": _replica_state["error"],
+            "primary_after_write": time.monotonic() < _replica_state["primary_until"],
+        }
+
+# -----------------------------
+# CONCURRENT PREFETCH
+# -----------------------------
+# Pages start their independent readers up front with ``prefetch`` and wait
+# on the results where they render them, so a page costs about its slowest
+# query instead of the sum:
+#
+#     hourly = prefetch(read_line_load_hourly, start, end, group_by, top_n)
+#     peaks = prefetch(read_line_load_peaks, start, end, group_by)
+#     ...
+#     st.dataframe(peaks.result())
+#
+# The calls run on one process-wide thread pool over the engines' connection
+# pools and go through the reader caches as usual (identical concurrent calls
+# are coalesced there).
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "8"))
+
+T = TypeVar("T")
+
+
+@st.cache_resource
+def _prefetch_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+
+
+class Prefetch(Generic[T]):
+    """A reader call running on the prefetch pool; ``result()`` waits for its value."""
+
+    def __init__(self, fn: Callable[..., T], args: tuple, kwargs: dict):
+        self._call = (fn, args, kwargs)
+        self._future = _prefetch_pool().submit(fn, *args, **kwargs)
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def result(self, timeout: Optional[float] = None) -> T:
+        """The call's return value; its exception is re-raised here."""
+        if self._future.cancel():
+            # still queued behind other sessions' prefetches: run it here
+            # rather than wait for a free worker
+            fn, args, kwargs = self._call
+            return fn(*args, **kwargs)
+        return self._future.result(timeout)
+
+
+def prefetch(fn: Callable[..., T], *args, **kwargs) -> Prefetch[T]:
+    """Start ``fn(*args, **kwargs)`` in the background and return its handle."""
+    return Prefetch(fn, args, kwargs)
+
+# -----------------------------
+# DIMENSION TABLES
+# -----------------------------
+# The asset hierarchy (region, area, station, ...) used to be repeated as
+# text on every fact row.  Each name now lives once in a small ``dim_<name>``
+# table and the fact tables carry an integer ``<name>_id`` key next to the
+# original text column.  Readers fetch the keys and decode them into pandas
+# categoricals, so only integers travel over the wire.
+DIMENSIONS = ("region", "area", "station", "feeder", "disco", "customer")
+
+# fact table -> {dimension: text column holding the dimension name}
+FACT_DIMENSIONS: Dict[str, Dict[str, str]] = {
+    "feeder_33kv_load": {
+        "region": "region", "area": "area", "station": "station",
+        "feeder": "feeder", "customer": "customer",
+    },
+    "transformer_load": {"region": "region", "area": "area", "station": "station"},
+    "line_load": {"region": "region", "area": "area", "disco": "disco"},
+    "outages": {
+        "disco": "disco", "region": "region", "area": "area",
+        "station": "station", "feeder": "feeder_33kv",
+    },
+}
+
+# composite indexes matching the reader access paths (asset key + date)
+FACT_KEY_INDEXES = {
+    "feeder_33kv_load": ("feeder_id", "reading_date"),
+    "transformer_load": ("station_id", "reading_date"),
+    "line_load": ("disco_id", "reading_date"),
+    "outages": ("feeder_id", "date_off"),
+}
+
+# reading_date indexes behind the trailing-window digest of the load cubes
+FACT_DATE_INDEXES = ("feeder_33kv_load", "transformer_load")
+
+
+def _unkeyed(table: str, alias: str = "") -> str:
+    """SQL condition matching the fact rows with a name but no key for some dimension."""
+    return " OR ".join(
+        f"({alias}{dim}_id IS NULL AND {alias}{col} IS NOT NULL)" for dim, col in FACT_DIMENSIONS[table].items()
+    )
+
+
+def ensure_dimension_schema() -> None:
+    """Create the ``dim_*`` tables, the integer key columns and their indexes if missing.
+
+    Safe to run repeatedly.  Besides the reader index, each fact table gets a
+    partial ``ix_<table>_unkeyed`` index over the rows still missing a key,
+    so ``sync_dimension_keys`` finds freshly loaded rows without a scan, and
+    the load cube sources a ``reading_date`` index for ``read_load_digest``.
+    """
+    engine = get_engine()
+    with engine.begin() as conn:
+        for dim in DIMENSIONS:
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS dim_{dim} (
+                    id SERIAL PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE
+                )
+            """))
+        for table, dims in FACT_DIMENSIONS.items():
+            for dim in dims:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {dim}_id INTEGER REFERENCES dim_{dim} (id)"
+                ))
+            cols = FACT_KEY_INDEXES[table]
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{'_'.join(cols)} ON {table} ({', '.join(cols)})"
+            ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_unkeyed ON {table} (id) WHERE {_unkeyed(table)}"
+            ))
+            if table in FACT_DATE_INDEXES:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_reading_date ON {table} (reading_date)"))
+            # per-row key triggers of earlier deployments slowed bulk loads
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS trg_{table}_keys ON {table}")
+            conn.exec_driver_sql(f"DROP FUNCTION IF EXISTS fill_{table}_keys()")
+    _mark_primary_write()
+
+
+class SchemaNotReady(RuntimeError):
+    """The database lacks the columns or indexes created by ``sync_dimensions.py``."""
+
+
+# table -> columns the readers rely on
+REQUIRED_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    table: tuple(f"{dim}_id" for dim in dims) for table, dims in FACT_DIMENSIONS.items()
+}
+REQUIRED_COLUMNS["outages"] += ("row_hash", "search_vector")
+_schema_ready = False
+
+
+def schema_problems() -> list:
+    """Human-readable list of what is missing from the schema (empty when ready)."""
+    with get_engine().connect() as conn:
+        present = set(conn.execute(text("""
+            SELECT table_name, column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = ANY(:tables)
+        """), {"tables": list(REQUIRED_COLUMNS)}).fetchall())
+        required_indexes = [f"ix_{table}_unkeyed" for table in FACT_DIMENSIONS]
+        indexes = set(conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND indexname = ANY(:names)"
+        ), {"names": required_indexes}).scalars())
+    problems = [
+        f"column {table}.{col}"
+        for table, cols in REQUIRED_COLUMNS.items() for col in cols if (table, col) not in present
+    ]
+    problems += [f"index {name}" for name in required_indexes if name not in indexes]
+    return problems
+
+
+def require_schema() -> None:
+    """Raise ``SchemaNotReady`` naming what is missing; checked once per process."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    problems = schema_problems()
+    if problems:
+        raise SchemaNotReady(
+            "The database schema is not set up (missing: " + ", ".join(problems[:6])
+            + (", ..." if len(problems) > 6 else "") + "). Run `python sync_dimensions.py` once."
+        )
+    _schema_ready = True
+
+
+def _upsert_dimension_names(cur, source: str, dims: Dict[str, str]) -> None:
+    """Add every name found in ``source`` to its dimension table, in bulk."""
+    for dim, col in dims.items():
+        cur.execute(f"""
+            INSERT INTO dim_{dim} (name)
+            SELECT DISTINCT {col} FROM {source} WHERE {col} IS NOT NULL
+            ON CONFLICT (name) DO NOTHING
+        """)
+
+
+def sync_dimension_keys(tables: Optional[Iterable[str]] = None) -> int:
+    """Resolve missing ``<dimension>_id`` keys on the fact tables; returns the rows keyed.
+
+    Load tables are filled by external jobs that only write the text
+    columns.  Their new rows are keyed here, set-based and off the load
+    path: before every load cube refresh, on every cache warmer cycle and by
+    ``sync_dimensions.py``.  Rows are found through the partial
+    ``ix_<table>_unkeyed`` index, so a call with nothing to do is cheap, and
+    each table is keyed with one ``UPDATE ... FROM`` over all its dimensions.
+    """
+    engine = get_engine()
+    raw_conn = engine.raw_connection()
+    keyed = 0
+    try:
+        cur = raw_conn.cursor()
+        for table in tables or FACT_DIMENSIONS:
+            dims = FACT_DIMENSIONS[table]
+            cur.execute(f"""
+                CREATE TEMP TABLE unkeyed_rows ON COMMIT DROP AS
+                SELECT id, {', '.join(dims.values())} FROM {table} WHERE {_unkeyed(table)}
+            """)
+            if cur.rowcount == 0:
+                cur.execute("DROP TABLE unkeyed_rows")
+                continue
+            _upsert_dimension_names(cur, "unkeyed_rows", dims)
+            joins = "".join(
+                f" LEFT JOIN dim_{dim} AS d_{dim} ON d_{dim}.name = n.{col}" for dim, col in dims.items()
+            )
+            cur.execute(f"""
+                UPDATE {table} AS f
+                SET {', '.join(f"{dim}_id = d_{dim}.id" for dim in dims)}
+                FROM unkeyed_rows AS n{joins}
+                WHERE f.id = n.id
+            """)
+            keyed += cur.rowcount
+            cur.execute("DROP TABLE unkeyed_rows")
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+    if keyed:
+        _mark_primary_write()
+    return keyed
+
+
+@cached(ttl=CACHE_TTL)
+def read_dimension(dimension: str) -> pd.Series:
+    """Return the ``id -> name`` lookup of one dimension table."""
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown dimension: {dimension}")
+    engine = get_read_engine()
+    data = pd.read_sql_query(text(f"SELECT id, name FROM dim_{dimension} ORDER BY name"), engine)
+    return pd.Series(data["name"].to_numpy(), index=data["id"].to_numpy(), name=dimension)
+
+
+def decode_dimensions(data: pd.DataFrame, columns: Dict[str, str]) -> pd.DataFrame:
+    """Replace ``<dimension>_id`` key columns by categorical name columns.
+
+    ``columns`` maps each dimension to the output column name, e.g.
+    ``{"feeder": "feeder_33kv"}``.  The categorical only keeps the names that
+    actually occur in ``data``.
+    """
+    for dim, out_col in columns.items():
+        key_col = f"{dim}_id"
+        keys = data[key_col]
+        lookup = read_dimension(dim)
+        codes = lookup.index.get_indexer(keys)
+        if ((codes < 0) & keys.notna().to_numpy()).any():
+            # a name was added after the lookup was cached
+            read_dimension.clear()
+            lookup = read_dimension(dim)
+            codes = lookup.index.get_indexer(keys)
+        names = pd.Categorical.from_codes(codes, categories=pd.Index(lookup.to_numpy()))
+        loc = data.columns.get_loc(key_col)
+        data = data.drop(columns=[key_col])
+        data.insert(loc, out_col, names.remove_unused_categories())
+    return data
+
+# -----------------------------
+# READ ENGINES
+# -----------------------------
+# "sql"  - pd.read_sql_query: psycopg2 builds one Python tuple per row and
+#          pandas infers object columns from them.
+# "copy" - COPY (query) TO STDOUT WITH CSV into an in-memory buffer, parsed
+#          by pandas' columnar CSV reader (pyarrow when installed) with a
+#          predeclared dtype schema.  Dates come back as datetime64 and
+#          times as strings.
+# READ_METHOD picks the default; every reader also takes ``method=``.
+READ_METHODS = ("sql", "copy")
+READ_METHOD = os.getenv("READ_METHOD", "sql")
+
+_BIND_PARAM = re.compile(r"(?<!:):(\w+)")
+
+
+def _read_copy(query: str, params: dict, dtypes: Dict[str, str], date_columns: Tuple[str, ...] = ()) -> pd.DataFrame:
+    engine = get_read_engine()
+    raw_conn = engine.raw_connection()
+    try:
+        cur = raw_conn.cursor()
+        # COPY takes no bind parameters, so render them as literals first
+        sql = cur.mogrify(_BIND_PARAM.sub(r"%(\1)s", query), params).decode("utf-8")
+        buffer = BytesIO()
+        cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH CSV HEADER", buffer)
+    finally:
+        raw_conn.close()
+    buffer.seek(0)
+    try:
+        import pyarrow  # noqa: F401
+        csv_engine = "pyarrow"
+    except ImportError:
+        csv_engine = "c"
+    return pd.read_csv(buffer, dtype=dtypes, parse_dates=list(date_columns), engine=csv_engine)
+
+
+def _read_frame(query: str, params: dict, method: str, dtypes: Dict[str, str], date_columns: Tuple[str, ...] = ()) -> pd.DataFrame:
+    """Run a reader query with the selected read engine."""
+    if method not in READ_METHODS:
+        raise ValueError(f"Unknown read method: {method}")
+    if method == "copy":
+        return _read_copy(query, params, dtypes, date_columns)
+    return pd.read_sql_query(text(query), get_read_engine(), params=params)
+
+
+FEEDER_LOAD_DTYPES = {
+    "reading_time": "string", "region_id": "Int32", "area_id": "Int32", "feeder_id": "Int32",
+    "customer_id": "Int32", "station_id": "Int32", "load_mw": "float64",
+}
+LINE_LOAD_DTYPES = {
+    "reading_time": "string", "region_id": "Int32", "area_id": "Int32", "transmission_interface": "string",
+    "disco_id": "Int32", "line_voltage": "string", "line_nomenclature": "string", "load_mw": "float64",
+}
+TRANSFORMER_LOAD_DTYPES = {
+    "reading_time": "string", "region_id": "Int32", "area_id": "Int32", "station_id": "Int32",
+    "transformer_nomenclature": "string", "load_mw": "float64",
+}
+OUTAGE_DTYPES = {
+    "id": "int64", "disco_id": "Int32", "region_id": "Int32", "area_id": "Int32", "station_id": "Int32",
+    "feeder_id": "Int32", "time_off": "string", "time_on": "string", "duration_outage": "string",
+    "outage_class": "string", "last_load": "float64", "event_indication": "string",
+    "party_responsible": "string", "weather_condition": "string",
+}
+
 # -----------------------------
 # CACHE DATA AS DATA (SERIALIZABLE)
 # -----------------------------
@@ -46,291 +498,903 @@ def order_reading_time(data):
     data['reading_time'] = pd.Categorical(data['reading_time'], categories=time_order, ordered=True)
     return data
 
-@st.cache_data(ttl=300)
-def read_feeder_load(start_date: str, end_date: str) -> pd.DataFrame:
-    engine = get_engine()
-    query = text("""
-        SELECT reading_date, reading_time, region, area, feeder as feeder_33kv, customer, station, load_mw
+@cached(ttl=CACHE_TTL)
+def read_feeder_load(start_date: str, end_date: str, method: str = READ_METHOD) -> pd.DataFrame:
+    query = """
+        SELECT reading_date, reading_time, region_id, area_id, feeder_id, customer_id, station_id, load_mw
         FROM feeder_33kv_load
         WHERE reading_date BETWEEN :start_date AND :end_date
         ORDER BY reading_date, reading_time
-    """)
+    """
     
-    data = pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date})
+    data = _read_frame(query, {"start_date": start_date, "end_date": end_date}, method,
+                       FEEDER_LOAD_DTYPES, ("reading_date",))
+    data = decode_dimensions(data, {
+        "region": "region", "area": "area", "feeder": "feeder_33kv",
+        "customer": "customer", "station": "station",
+    })
     return order_reading_time(data)
 
-@st.cache_data(ttl=300)
-def read_line_load(start_date: str, end_date: str) -> pd.DataFrame:
-    engine = get_engine()
-    query = text("""
-        SELECT reading_date, reading_time, region, area, transmission_interface, disco, line_voltage,
+@cached(ttl=CACHE_TTL)
+def read_line_load(start_date: str, end_date: str, method: str = READ_METHOD) -> pd.DataFrame:
+    query = """
+        SELECT reading_date, reading_time, region_id, area_id, transmission_interface, disco_id, line_voltage,
                line_nomenclature, load_mw
         FROM line_load
         WHERE reading_date BETWEEN :start_date AND :end_date
         ORDER BY reading_date, reading_time
-    """)
-    return pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date})
+    """
+    data = _read_frame(query, {"start_date": start_date, "end_date": end_date}, method,
+                       LINE_LOAD_DTYPES, ("reading_date",))
+    return decode_dimensions(data, {"region": "region", "area": "area", "disco": "disco"})
 
-@st.cache_data(ttl=300)
-def read_transformer_load(start_date: str, end_date: str) -> pd.DataFrame:
-    engine = get_engine()
-    query = text("""
-        SELECT reading_date, reading_time, region, area, station, transformer_nomenclature, load_mw
+@cached(ttl=CACHE_TTL)
+def read_transformer_load(start_date: str, end_date: str, method: str = READ_METHOD) -> pd.DataFrame:
+    query = """
+        SELECT reading_date, reading_time, region_id, area_id, station_id, transformer_nomenclature, load_mw
         FROM transformer_load
         WHERE reading_date BETWEEN :start_date AND :end_date
         ORDER BY reading_date, reading_time
-    """)
+    """
 
-    data = pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date})
-    print(f"The Data\n{data}")
+    data = _read_frame(query, {"start_date": start_date, "end_date": end_date}, method,
+                       TRANSFORMER_LOAD_DTYPES, ("reading_date",))
+    data = decode_dimensions(data, {"region": "region", "area": "area", "station": "station"})
     return order_reading_time(data)
-    #return pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date})
 
-@st.cache_data(ttl=300)
-def read_outages(start_date: str, end_date: str) -> pd.DataFrame:
-    engine = get_engine()
-    query = text("""
-        SELECT id, disco, region, area, station, feeder_33kv, date_off, time_off, date_on, time_on,
+@cached(ttl=CACHE_TTL)
+def read_outages(start_date: str, end_date: str, method: str = READ_METHOD) -> pd.DataFrame:
+    query = """
+        SELECT id, disco_id, region_id, area_id, station_id, feeder_id, date_off, time_off, date_on, time_on,
                duration_outage, outage_class, last_load, event_indication, party_responsible, weather_condition
         FROM outages
         WHERE date_off BETWEEN :start_date AND :end_date
         ORDER BY date_off, time_off
-    """)
-    return pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date})
+    """
+    data = _read_frame(query, {"start_date": start_date, "end_date": end_date}, method,
+                       OUTAGE_DTYPES, ("date_off", "date_on"))
+    return decode_dimensions(data, {
+        "disco": "disco", "region": "region", "area": "area",
+        "station": "station", "feeder": "feeder_33kv",
+    })
+
+
+# -----------------------------
+# OUTAGE UPSERT
+# -----------------------------
+# Both insert paths COPY into ``temp_outages`` and then share the merge below.
+_CREATE_TEMP_OUTAGES = """
+    DROP TABLE IF EXISTS temp_outages;
+    CREATE TEMP TABLE temp_outages (
+        disco TEXT,
+        region TEXT,
+        area TEXT,
+        station TEXT,
+        feeder_33kv TEXT,
+        date_off DATE,
+        time_off TIME,
+        date_on DATE,
+        time_on TIME,
+        duration_outage TEXT,
+        outage_class TEXT,
+        last_load NUMERIC,
+        event_indication TEXT,
+        party_responsible TEXT,
+        officer_confirming_interruption TEXT,
+        officer_confirming_restoration TEXT,
+        weather_condition TEXT,
+        remarks TEXT
+    )
+"""
+
+# Content fingerprint of the updatable outage columns.  ROW(...)::text keeps
+# NULL and '' apart; last_load is cast so 5 and 5.0 hash the same.
+_OUTAGE_ROW_HASH = """md5(ROW(
+        {t}.date_on, {t}.time_on, {t}.duration_outage, {t}.outage_class, {t}.last_load::float8,
+        {t}.event_indication, {t}.party_responsible, {t}.officer_confirming_interruption,
+        {t}.officer_confirming_restoration, {t}.weather_condition, {t}.remarks
+    )::text)::uuid"""
+
+# Full-text document of the free-text outage columns, weighted so that event
+# indications rank above remarks, weather and the confirming officers.
+OUTAGE_SEARCH_CONFIG = "english"
+_OUTAGE_SEARCH_VECTOR = f"""(
+        setweight(to_tsvector('{OUTAGE_SEARCH_CONFIG}', coalesce({{t}}.event_indication, '')), 'A')
+        || setweight(to_tsvector('{OUTAGE_SEARCH_CONFIG}', coalesce({{t}}.remarks, '')), 'B')
+        || setweight(to_tsvector('{OUTAGE_SEARCH_CONFIG}', coalesce({{t}}.weather_condition, '')), 'C')
+        || setweight(to_tsvector('{OUTAGE_SEARCH_CONFIG}', concat_ws(' ',
+            {{t}}.officer_confirming_interruption, {{t}}.officer_confirming_restoration)), 'D')
+    )"""
+
+# dedup the upload, fingerprint each row and classify it against the stored row
+_DIFF_TEMP_OUTAGES = f"""
+    DROP TABLE IF EXISTS temp_outages_diff;
+    CREATE TEMP TABLE temp_outages_diff AS
+    SELECT
+        t.*,
+        CASE
+            WHEN o.id IS NULL THEN 'new'
+            WHEN o.row_hash IS DISTINCT FROM t.row_hash THEN 'changed'
+            ELSE 'unchanged'
+        END AS change
+    FROM (
+        SELECT DISTINCT ON (station, feeder_33kv, date_off, time_off)
+            *, {_OUTAGE_ROW_HASH.format(t="temp_outages")} AS row_hash
+        FROM temp_outages
+        ORDER BY station, feeder_33kv, date_off, time_off, date_on DESC NULLS LAST, time_on DESC NULLS LAST
+    ) AS t
+    LEFT JOIN outages AS o
+        ON o.station = t.station AND o.feeder_33kv = t.feeder_33kv
+        AND o.date_off = t.date_off AND o.time_off = t.time_off;
+"""
+
+_MERGE_TEMP_OUTAGES = f"""
+    INSERT INTO outages (
+        disco,
+        region,
+        area,
+        station,
+        feeder_33kv,
+        disco_id,
+        region_id,
+        area_id,
+        station_id,
+        feeder_id,
+        date_off,
+        time_off,
+        date_on,
+        time_on,
+        duration_outage,
+        outage_class,
+        last_load,
+        event_indication,
+        party_responsible,
+        officer_confirming_interruption,
+        officer_confirming_restoration,
+        weather_condition,
+        remarks,
+        row_hash,
+        search_vector
+    )
+    SELECT
+        t.disco,
+        t.region,
+        t.area,
+        t.station,
+        t.feeder_33kv,
+        dd.id,
+        dr.id,
+        da.id,
+        ds.id,
+        df.id,
+        t.date_off,
+        t.time_off,
+        t.date_on,
+        t.time_on,
+        t.duration_outage,
+        t.outage_class,
+        t.last_load,
+        t.event_indication,
+        t.party_responsible,
+        t.officer_confirming_interruption,
+        t.officer_confirming_restoration,
+        t.weather_condition,
+        t.remarks,
+        t.row_hash,
+        {_OUTAGE_SEARCH_VECTOR.format(t="t")}
+    FROM temp_outages_diff AS t
+    LEFT JOIN dim_disco AS dd ON dd.name = t.disco
+    LEFT JOIN dim_region AS dr ON dr.name = t.region
+    LEFT JOIN dim_area AS da ON da.name = t.area
+    LEFT JOIN dim_station AS ds ON ds.name = t.station
+    LEFT JOIN dim_feeder AS df ON df.name = t.feeder_33kv
+    WHERE t.change <> 'unchanged'
+    ON CONFLICT (station, feeder_33kv, date_off, time_off)
+    DO UPDATE SET
+        date_on = EXCLUDED.date_on,
+        time_on = EXCLUDED.time_on,
+        duration_outage = EXCLUDED.duration_outage,
+        outage_class = EXCLUDED.outage_class,
+        last_load = EXCLUDED.last_load,
+        event_indication = EXCLUDED.event_indication,
+        party_responsible = EXCLUDED.party_responsible,
+        officer_confirming_interruption = EXCLUDED.officer_confirming_interruption,
+        officer_confirming_restoration = EXCLUDED.officer_confirming_restoration,
+        weather_condition = EXCLUDED.weather_condition,
+        remarks = EXCLUDED.remarks,
+        row_hash = EXCLUDED.row_hash,
+        search_vector = EXCLUDED.search_vector,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE outages.row_hash IS DISTINCT FROM EXCLUDED.row_hash;
+"""
+
+OUTAGE_CHANGES = ("new", "changed", "unchanged")
+
+
+OUTAGE_BACKFILL_BATCH = 20000
+
+
+def _backfill_outages(column: str, expression: str) -> None:
+    """Fill ``outages.<column>`` where it is NULL, committing every ``OUTAGE_BACKFILL_BATCH`` ids.
+
+    Short transactions keep row locks brief, so uploads and readers are not
+    blocked while a large history is backfilled.
+    """
+    with get_engine().connect() as conn:
+        low, high = conn.execute(text("SELECT MIN(id), MAX(id) FROM outages")).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, OUTAGE_BACKFILL_BATCH):
+        with get_engine().begin() as conn:
+            conn.execute(text(f"""
+                UPDATE outages SET {column} = {expression}
+                WHERE id >= :lo AND id < :hi AND {column} IS NULL
+            """), {"lo": start, "hi": start + OUTAGE_BACKFILL_BATCH})
+
+
+def ensure_outage_fingerprints() -> None:
+    """Add and backfill ``outages.row_hash`` (one-time setup, see ``sync_dimensions.py``)."""
+    with get_engine().begin() as conn:
+        conn.execute(text("ALTER TABLE outages ADD COLUMN IF NOT EXISTS row_hash UUID"))
+    _backfill_outages("row_hash", _OUTAGE_ROW_HASH.format(t="outages"))
+    _mark_primary_write()
+
+
+def _stage_outages(cur, fileobj) -> Dict[str, int]:
+    """COPY headerless CSV rows into ``temp_outages`` and diff them against ``outages``.
+
+    Returns the number of distinct upload rows per change class.
+    """
+    cur.execute(_CREATE_TEMP_OUTAGES)
+    cur.copy_expert("COPY temp_outages FROM STDIN WITH CSV", fileobj)
+    cur.execute(_DIFF_TEMP_OUTAGES)
+    cur.execute("SELECT change, count(*) FROM temp_outages_diff GROUP BY change")
+    counts = dict.fromkeys(OUTAGE_CHANGES, 0)
+    counts.update(dict(cur.fetchall()))
+    return counts
+
+
+def _merge_temp_outages(cur) -> None:
+    """Resolve dimension keys and merge the new/changed staged rows into ``outages``."""
+    _upsert_dimension_names(cur, "temp_outages", FACT_DIMENSIONS["outages"])
+    cur.execute(_MERGE_TEMP_OUTAGES)
 
 
-def insert_outages(df: pd.DataFrame) -> None:
+def _outages_csv_buffer(df: pd.DataFrame):
+    from io import StringIO
+    buffer = StringIO(df.to_csv(index=False))
+    next(buffer)  # skip header
+    return buffer
+
+
+def insert_outages(df: pd.DataFrame) -> Dict[str, int]:
     """Insert outage records contained in ``df`` into the permanent table.
 
     Internally this writes the dataframe to a CSV stream and uses a
-    ``COPY`` into a temporary table.  An ``ON CONFLICT`` clause ensures that
-    existing rows (keyed by station/feeder/date_off/time_off) are updated when
-    certain fields differ.  This mirrors ``insert_outages_from_csv`` but
-    operates on an already-loaded dataframe.
+    ``COPY`` into a temporary table.  Each row is fingerprinted and only
+    new rows and rows whose fingerprint differs from the stored one
+    (keyed by station/feeder/date_off/time_off) are written.  This mirrors
+    ``insert_outages_from_csv`` but operates on an already-loaded
+    dataframe.  Returns the new/changed/unchanged row counts.
     """
     engine = get_engine()
-    cols = [
-        "disco", "region", "area", "station", "feeder_33kv", "date_off", "time_off",
-        "date_on", "time_on", "duration_outage", "outage_class", "last_load",
-        "event_indication", "party_responsible", "officer_confirming_interruption",
-        "officer_confirming_restoration", "weather_condition", "remarks"
-    ]
-
-    # write df to csv buffer
-    csv_buffer = df.to_csv(index=False)
     raw_conn = engine.raw_connection()
     try:
         cur = raw_conn.cursor()
-        cur.execute("""
-            DROP TABLE IF EXISTS temp_outages;
-            CREATE TEMP TABLE temp_outages (
-                disco TEXT,
-                region TEXT,
-                area TEXT,
-                station TEXT,
-                feeder_33kv TEXT,
-                date_off DATE,
-                time_off TIME,
-                date_on DATE,
-                time_on TIME,
-                duration_outage TEXT,
-                outage_class TEXT,
-                last_load NUMERIC,
-                event_indication TEXT,
-                party_responsible TEXT,
-                officer_confirming_interruption TEXT,
-                officer_confirming_restoration TEXT,
-                weather_condition TEXT,
-                remarks TEXT
-            )
-        """)
-        # copy from buffer
-        from io import StringIO
-        buffer = StringIO(csv_buffer)
-        next(buffer)  # skip header
-        cur.copy_expert("COPY temp_outages FROM STDIN WITH CSV", buffer)
-
-        cur.execute("""
-            WITH dedup AS (
-                SELECT DISTINCT ON (station, feeder_33kv, date_off, time_off) *
-                FROM temp_outages
-                ORDER BY station, feeder_33kv, date_off, time_off, date_on DESC NULLS LAST, time_on DESC NULLS LAST
-            )
-            INSERT INTO outages (
-                disco,
-                region,
-                area,
-                station,
-                feeder_33kv,
-                date_off,
-                time_off,
-                date_on,
-                time_on,
-                duration_outage,
-                outage_class,
-                last_load,
-                event_indication,
-                party_responsible,
-                officer_confirming_interruption,
-                officer_confirming_restoration,
-                weather_condition,
-                remarks
-            )
-            SELECT
-                disco,
-                region,
-                area,
-                station,
-                feeder_33kv,
-                date_off,
-                time_off,
-                date_on,
-                time_on,
-                duration_outage,
-                outage_class,
-                last_load,
-                event_indication,
-                party_responsible,
-                officer_confirming_interruption,
-                officer_confirming_restoration,
-                weather_condition,
-                remarks
-            FROM dedup
-            ON CONFLICT (station, feeder_33kv, date_off, time_off)
-            DO UPDATE SET
-                date_on = EXCLUDED.date_on,
-                time_on = EXCLUDED.time_on,
-                duration_outage = EXCLUDED.duration_outage,
-                outage_class = EXCLUDED.outage_class,
-                last_load = EXCLUDED.last_load,
-                event_indication = EXCLUDED.event_indication,
-                party_responsible = EXCLUDED.party_responsible,
-                officer_confirming_interruption = EXCLUDED.officer_confirming_interruption,
-                officer_confirming_restoration = EXCLUDED.officer_confirming_restoration,
-                weather_condition = EXCLUDED.weather_condition,
-                remarks = EXCLUDED.remarks,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE
-                outages.date_on IS DISTINCT FROM EXCLUDED.date_on
-                OR outages.time_on IS DISTINCT FROM EXCLUDED.time_on
-                OR outages.duration_outage IS DISTINCT FROM EXCLUDED.duration_outage
-                OR outages.last_load IS DISTINCT FROM EXCLUDED.last_load
-                OR outages.remarks IS DISTINCT FROM EXCLUDED.remarks;
-        """)
+        counts = _stage_outages(cur, _outages_csv_buffer(df))
+        _merge_temp_outages(cur)
         raw_conn.commit()
+        _mark_primary_write()
     finally:
         raw_conn.close()
+    return counts
 
 
-
-def insert_outages_from_csv(csv_path: str) -> None:
+def insert_outages_from_csv(csv_path: str) -> Dict[str, int]:
     """Efficiently load a CSV file directly into ``outages`` using COPY.
 
     The CSV must have a header matching the expected outage columns with
     ``time_off``/``time_on`` already computed (i.e. the output of the
     Streamlit uploader).  Rows are merged on the unique key defined by
-    ``(station, feeder_33kv, date_off, time_off)`` with an update-if-changed
-    conflict clause.
+    ``(station, feeder_33kv, date_off, time_off)``; unchanged rows (same
+    fingerprint) are skipped.  Returns the new/changed/unchanged row counts.
     """
     engine = get_engine()
     raw_conn = engine.raw_connection()
     try:
         cur = raw_conn.cursor()
-        # create temp table
-        cur.execute("""
-            DROP TABLE IF EXISTS temp_outages;
-            CREATE TEMP TABLE temp_outages (
-                disco TEXT,
-                region TEXT,
-                area TEXT,
-                station TEXT,
-                feeder_33kv TEXT,
-                date_off DATE,
-                time_off TIME,
-                date_on DATE,
-                time_on TIME,
-                duration_outage TEXT,
-                outage_class TEXT,
-                last_load NUMERIC,
-                event_indication TEXT,
-                party_responsible TEXT,
-                officer_confirming_interruption TEXT,
-                officer_confirming_restoration TEXT,
-                weather_condition TEXT,
-                remarks TEXT
-            )
-        """)
         with open(csv_path, 'r', encoding='utf-8') as f:
             next(f)  # skip header
-            cur.copy_expert("COPY temp_outages FROM STDIN WITH CSV", f)
+            counts = _stage_outages(cur, f)
+        _merge_temp_outages(cur)
+        raw_conn.commit()
+        _mark_primary_write()
+    finally:
+        raw_conn.close()
+    return counts
 
-        cur.execute("""
-            WITH dedup AS (
-                SELECT DISTINCT ON (station, feeder_33kv, date_off, time_off) *
-                FROM temp_outages
-                ORDER BY station, feeder_33kv, date_off, time_off, date_on DESC NULLS LAST, time_on DESC NULLS LAST
+
+def preview_outage_changes(df: pd.DataFrame) -> Dict[str, int]:
+    """New/changed/unchanged counts ``insert_outages(df)`` would apply; writes nothing.
+
+    Only the session's temp tables are written, and they are rolled back.
+    """
+    engine = get_engine()
+    raw_conn = engine.raw_connection()
+    try:
+        counts = _stage_outages(raw_conn.cursor(), _outages_csv_buffer(df))
+    finally:
+        raw_conn.rollback()
+        raw_conn.close()
+    return counts
+
+
+# -----------------------------
+# LOAD DATA QUALITY
+# -----------------------------
+def read_feeder_load_keys(start_date: str, end_date: str) -> pd.DataFrame:
+    """Lean ``feeder_33kv_load`` extract for fleet-wide scans.
+
+    Only the integer feeder key, date, time and value are fetched and no
+    ``ORDER BY`` is requested; callers sort in NumPy.  Not cached because
+    scans run over long ranges that would crowd out the page caches.
+    """
+    engine = get_read_engine()
+    query = text("""
+        SELECT feeder_id, reading_date, reading_time, load_mw
+        FROM feeder_33kv_load
+        WHERE reading_date BETWEEN :start_date AND :end_date
+    """)
+    return pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date})
+
+
+def _table_exists(conn, table: str) -> bool:
+    # fast path only: the CREATE statements stay IF NOT EXISTS because two
+    # processes can both see the table missing
+    return conn.execute(text("SELECT to_regclass(:t)"), {"t": table}).scalar() is not None
+
+
+def _ensure_load_quality_table() -> None:
+    engine = get_engine()
+    with engine.begin() as conn:
+        if _table_exists(conn, "load_quality_issues"):
+            return
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS load_quality_issues (
+                feeder_id INTEGER,
+                reading_date DATE NOT NULL,
+                reading_time TEXT,
+                issue TEXT NOT NULL,
+                value DOUBLE PRECISION,
+                scanned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-            INSERT INTO outages (
-                disco,
-                region,
-                area,
-                station,
-                feeder_33kv,
-                date_off,
-                time_off,
-                date_on,
-                time_on,
-                duration_outage,
-                outage_class,
-                last_load,
-                event_indication,
-                party_responsible,
-                officer_confirming_interruption,
-                officer_confirming_restoration,
-                weather_condition,
-                remarks
+        """))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_load_quality_issues_date ON load_quality_issues (reading_date)"
+        ))
+    _mark_primary_write()
+
+
+def write_load_quality_issues(issues: pd.DataFrame, start_date: str, end_date: str) -> None:
+    """Replace the stored issues of ``[start_date, end_date]`` with ``issues``."""
+    engine = get_engine()
+    cols = ["feeder_id", "reading_date", "reading_time", "issue", "value"]
+    _ensure_load_quality_table()
+    raw_conn = engine.raw_connection()
+    try:
+        cur = raw_conn.cursor()
+        cur.execute(
+            "DELETE FROM load_quality_issues WHERE reading_date BETWEEN %s AND %s",
+            (start_date, end_date),
+        )
+        from io import StringIO
+        buffer = StringIO(issues[cols].to_csv(index=False, header=False))
+        cur.copy_expert(f"COPY load_quality_issues ({', '.join(cols)}) FROM STDIN WITH CSV", buffer)
+        raw_conn.commit()
+        _mark_primary_write()
+    finally:
+        raw_conn.close()
+
+
+@cached(ttl=CACHE_TTL)
+def read_load_quality_issues(start_date: str, end_date: str) -> pd.DataFrame:
+    _ensure_load_quality_table()
+    engine = get_read_engine()
+    query = text("""
+        SELECT feeder_id, reading_date, reading_time, issue, value, scanned_at
+        FROM load_quality_issues
+        WHERE reading_date BETWEEN :start_date AND :end_date
+        ORDER BY reading_date, reading_time
+    """)
+    data = pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date})
+    return decode_dimensions(data, {"feeder": "feeder_33kv"})
+
+
+# -----------------------------
+# TRANSFORMER RATINGS
+# -----------------------------
+# Nameplate rating per transformer, keyed like ``transformer_load`` by station
+# and transformer_nomenclature.  Loads are metered in MW, so the screening
+# capacity is ``rating_mva * power_factor``.
+TRANSFORMER_RATING_COLUMNS = ["station", "transformer_nomenclature", "rating_mva", "power_factor"]
+DEFAULT_POWER_FACTOR = 0.9
+
+
+def _ensure_transformer_ratings_table() -> None:
+    engine = get_engine()
+    with engine.begin() as conn:
+        if _table_exists(conn, "transformer_ratings"):
+            return
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS transformer_ratings (
+                station TEXT NOT NULL,
+                station_id INTEGER REFERENCES dim_station (id),
+                transformer_nomenclature TEXT NOT NULL,
+                rating_mva DOUBLE PRECISION NOT NULL CHECK (rating_mva > 0),
+                power_factor DOUBLE PRECISION NOT NULL DEFAULT {DEFAULT_POWER_FACTOR}
+                    CHECK (power_factor > 0 AND power_factor <= 1),
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (station, transformer_nomenclature)
             )
-            SELECT
-                disco,
-                region,
-                area,
-                station,
-                feeder_33kv,
-                date_off,
-                time_off,
-                date_on,
-                time_on,
-                duration_outage,
-                outage_class,
-                last_load,
-                event_indication,
-                party_responsible,
-                officer_confirming_interruption,
-                officer_confirming_restoration,
-                weather_condition,
-                remarks
-            FROM dedup
-            ON CONFLICT (station, feeder_33kv, date_off, time_off)
-            DO UPDATE SET
-                date_on = EXCLUDED.date_on,
-                time_on = EXCLUDED.time_on,
-                duration_outage = EXCLUDED.duration_outage,
-                outage_class = EXCLUDED.outage_class,
-                last_load = EXCLUDED.last_load,
-                event_indication = EXCLUDED.event_indication,
-                party_responsible = EXCLUDED.party_responsible,
-                officer_confirming_interruption = EXCLUDED.officer_confirming_interruption,
-                officer_confirming_restoration = EXCLUDED.officer_confirming_restoration,
-                weather_condition = EXCLUDED.weather_condition,
-                remarks = EXCLUDED.remarks,
+        """))
+    _mark_primary_write()
+
+
+def upsert_transformer_ratings(df: pd.DataFrame) -> int:
+    """Insert or replace transformer ratings; returns the number of rows written.
+
+    ``df`` needs ``station``, ``transformer_nomenclature`` and ``rating_mva``;
+    a missing or empty ``power_factor`` falls back to ``DEFAULT_POWER_FACTOR``.
+    """
+    _ensure_transformer_ratings_table()
+    ratings = df.reindex(columns=TRANSFORMER_RATING_COLUMNS).drop_duplicates(
+        ["station", "transformer_nomenclature"], keep="last"
+    )
+    ratings["power_factor"] = pd.to_numeric(ratings["power_factor"], errors="coerce").fillna(DEFAULT_POWER_FACTOR)
+    engine = get_engine()
+    raw_conn = engine.raw_connection()
+    try:
+        cur = raw_conn.cursor()
+        cur.execute("""
+            DROP TABLE IF EXISTS temp_transformer_ratings;
+            CREATE TEMP TABLE temp_transformer_ratings (
+                station TEXT, transformer_nomenclature TEXT, rating_mva DOUBLE PRECISION, power_factor DOUBLE PRECISION
+            )
+        """)
+        from io import StringIO
+        buffer = StringIO(ratings.to_csv(index=False, header=False))
+        cur.copy_expert("COPY temp_transformer_ratings FROM STDIN WITH CSV", buffer)
+        _upsert_dimension_names(cur, "temp_transformer_ratings", {"station": "station"})
+        cur.execute("""
+            INSERT INTO transformer_ratings (station, station_id, transformer_nomenclature, rating_mva, power_factor)
+            SELECT t.station, ds.id, t.transformer_nomenclature, t.rating_mva, t.power_factor
+            FROM temp_transformer_ratings AS t
+            LEFT JOIN dim_station AS ds ON ds.name = t.station
+            ON CONFLICT (station, transformer_nomenclature) DO UPDATE SET
+                station_id = EXCLUDED.station_id,
+                rating_mva = EXCLUDED.rating_mva,
+                power_factor = EXCLUDED.power_factor,
                 updated_at = CURRENT_TIMESTAMP
-            WHERE
-                outages.date_on IS DISTINCT FROM EXCLUDED.date_on
-                OR outages.time_on IS DISTINCT FROM EXCLUDED.time_on
-                OR outages.duration_outage IS DISTINCT FROM EXCLUDED.duration_outage
-                OR outages.last_load IS DISTINCT FROM EXCLUDED.last_load
-                OR outages.remarks IS DISTINCT FROM EXCLUDED.remarks;
         """)
+        written = cur.rowcount
         raw_conn.commit()
+        _mark_primary_write()
     finally:
         raw_conn.close()
+    return written
+
+
+@cached(ttl=CACHE_TTL)
+def read_transformer_ratings() -> pd.DataFrame:
+    """Ratings keyed by ``station_id`` + ``transformer_nomenclature`` (the transformer cube keys)."""
+    _ensure_transformer_ratings_table()
+    engine = get_read_engine()
+    query = text("""
+        SELECT station_id, transformer_nomenclature, rating_mva, power_factor
+        FROM transformer_ratings
+    """)
+    return pd.read_sql_query(query, engine)
+
+
+# -----------------------------
+# LOAD CUBE SOURCE
+# -----------------------------
+# One aggregated row per (asset, reading_date, reading_time).  Hierarchy keys
+# are taken with MAX() so an asset always maps to a single row of the cube.
+_LOAD_CELL_QUERIES = {
+    "feeder": """
+        SELECT feeder_id, MAX(region_id) AS region_id, MAX(area_id) AS area_id,
+               MAX(station_id) AS station_id, reading_date, reading_time, SUM(load_mw) AS load_mw
+        FROM feeder_33kv_load
+        WHERE feeder_id IS NOT NULL {dates}
+        GROUP BY feeder_id, reading_date, reading_time
+    """,
+    "transformer": """
+        SELECT station_id, transformer_nomenclature, MAX(region_id) AS region_id, MAX(area_id) AS area_id,
+               reading_date, reading_time, SUM(load_mw) AS load_mw
+        FROM transformer_load
+        WHERE station_id IS NOT NULL AND transformer_nomenclature IS NOT NULL {dates}
+        GROUP BY station_id, transformer_nomenclature, reading_date, reading_time
+    """,
+}
+
+# per-day fingerprint of the rows behind a cube: any insert, delete, load
+# correction or (late) key change alters the count, the load sum or the key sum
+_LOAD_DIGEST_QUERIES = {
+    "feeder": """
+        SELECT reading_date, COUNT(*) AS n_rows, SUM(load_mw)::float8 AS load_sum,
+               SUM(feeder_id::bigint + COALESCE(region_id, 0) + COALESCE(area_id, 0)
+                   + COALESCE(station_id, 0)) AS key_sum
+        FROM feeder_33kv_load
+        WHERE feeder_id IS NOT NULL {since}
+        GROUP BY reading_date
+    """,
+    "transformer": """
+        SELECT reading_date, COUNT(*) AS n_rows, SUM(load_mw)::float8 AS load_sum,
+               SUM(station_id::bigint + COALESCE(region_id, 0) + COALESCE(area_id, 0)
+                   + hashtext(transformer_nomenclature)) AS key_sum
+        FROM transformer_load
+        WHERE station_id IS NOT NULL AND transformer_nomenclature IS NOT NULL {since}
+        GROUP BY reading_date
+    """,
+}
+
+
+def read_load_cells(kind: str, dates: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Fetch hourly load cells for ``utils.load_cube``, optionally only for ``dates``."""
+    engine = get_read_engine()
+    if dates is None:
+        return pd.read_sql_query(text(_LOAD_CELL_QUERIES[kind].format(dates="")), engine)
+    query = text(_LOAD_CELL_QUERIES[kind].format(dates="AND reading_date = ANY(CAST(:dates AS date[]))"))
+    return pd.read_sql_query(query, engine, params={"dates": list(dates)})
+
+
+def read_load_digest(kind: str, since: Optional[str] = None) -> pd.DataFrame:
+    """Per-day ``n_rows``/``load_sum``/``key_sum`` of the rows behind a load cube, from ``since`` on."""
+    engine = get_read_engine()
+    if since is None:
+        return pd.read_sql_query(text(_LOAD_DIGEST_QUERIES[kind].format(since="")), engine)
+    query = text(_LOAD_DIGEST_QUERIES[kind].format(since="AND reading_date >= CAST(:since AS date)"))
+    return pd.read_sql_query(query, engine, params={"since": since})
+
+
+# -----------------------------
+# LINE LOAD (SERVER-SIDE AGGREGATES)
+# -----------------------------
+# ``line_load`` is the largest table, so the line page never pulls raw rows:
+# every reader below aggregates in PostgreSQL and returns at most
+# ``top_n``/``limit`` groups.  Group expressions are whitelisted here.
+LINE_LOAD_GROUPS = {
+    "transmission_interface": "l.transmission_interface",
+    "disco": "d.name",
+    "line_voltage": "l.line_voltage",
+    "line_nomenclature": "l.line_nomenclature",
+}
+
+_LINE_HOURLY_CTE = """
+    hourly AS (
+        SELECT l.reading_date, l.reading_time, COALESCE({expr}, 'Unknown') AS grp, SUM(l.load_mw) AS load_mw
+        FROM line_load AS l
+        LEFT JOIN dim_disco AS d ON d.id = l.disco_id
+        WHERE l.reading_date BETWEEN :start_date AND :end_date
+        GROUP BY l.reading_date, l.reading_time, COALESCE({expr}, 'Unknown')
+    )
+"""
+
+
+def _line_group_expr(group_by: str) -> str:
+    if group_by not in LINE_LOAD_GROUPS:
+        raise ValueError(f"Unsupported line load grouping: {group_by}")
+    return LINE_LOAD_GROUPS[group_by]
+
+
+@cached(ttl=CACHE_TTL)
+def read_line_load_hourly(start_date: str, end_date: str, group_by: str, top_n: int = 10) -> pd.DataFrame:
+    """Hourly line load totals for the ``top_n`` groups by energy, the rest as ``Other``."""
+    engine = get_read_engine()
+    expr = _line_group_expr(group_by)
+    query = text(f"""
+        WITH {_LINE_HOURLY_CTE.format(expr=expr)},
+        ranked AS (
+            SELECT grp FROM hourly GROUP BY grp ORDER BY SUM(load_mw) DESC NULLS LAST LIMIT :top_n
+        )
+        SELECT h.reading_date, h.reading_time, COALESCE(r.grp, 'Other') AS {group_by}, SUM(h.load_mw) AS load_mw
+        FROM hourly AS h
+        LEFT JOIN ranked AS r ON r.grp = h.grp
+        GROUP BY h.reading_date, h.reading_time, COALESCE(r.grp, 'Other')
+        ORDER BY h.reading_date, h.reading_time
+    """)
+    data = pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date, "top_n": top_n})
+    return order_reading_time(data)
+
+
+@cached(ttl=CACHE_TTL)
+def read_line_load_peaks(start_date: str, end_date: str, group_by: str, limit: int = 20) -> pd.DataFrame:
+    """Peak, average and minimum hourly load per group, highest peaks first."""
+    engine = get_read_engine()
+    expr = _line_group_expr(group_by)
+    query = text(f"""
+        WITH {_LINE_HOURLY_CTE.format(expr=expr)},
+        peaks AS (
+            SELECT DISTINCT ON (grp) grp, reading_date AS peak_date, reading_time AS peak_time, load_mw AS peak_mw
+            FROM hourly
+            ORDER BY grp, load_mw DESC NULLS LAST
+        ),
+        stats AS (
+            SELECT grp, AVG(load_mw) AS avg_mw, MIN(load_mw) AS min_mw, SUM(load_mw) AS energy_mwh, COUNT(*) AS hours
+            FROM hourly
+            GROUP BY grp
+        )
+        SELECT p.grp AS {group_by}, p.peak_mw, p.peak_date, p.peak_time, s.avg_mw, s.min_mw, s.energy_mwh, s.hours
+        FROM peaks AS p
+        JOIN stats AS s ON s.grp = p.grp
+        ORDER BY p.peak_mw DESC NULLS LAST
+        LIMIT :limit
+    """)
+    return pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date, "limit": limit})
+
+
+@cached(ttl=CACHE_TTL)
+def read_line_load_voltage_breakdown(start_date: str, end_date: str, group_by: str, top_n: int = 15) -> pd.DataFrame:
+    """Energy and average load per (group, line_voltage) for the ``top_n`` groups."""
+    engine = get_read_engine()
+    expr = _line_group_expr(group_by)
+    query = text(f"""
+        WITH totals AS (
+            SELECT COALESCE({expr}, 'Unknown') AS grp, COALESCE(l.line_voltage, 'Unknown') AS line_voltage,
+                   SUM(l.load_mw) AS energy_mwh, AVG(l.load_mw) AS avg_mw, MAX(l.load_mw) AS max_mw
+            FROM line_load AS l
+            LEFT JOIN dim_disco AS d ON d.id = l.disco_id
+            WHERE l.reading_date BETWEEN :start_date AND :end_date
+            GROUP BY 1, 2
+        ),
+        ranked AS (
+            SELECT grp FROM totals GROUP BY grp ORDER BY SUM(energy_mwh) DESC NULLS LAST LIMIT :top_n
+        )
+        SELECT t.grp AS {group_by}, t.line_voltage, t.energy_mwh, t.avg_mw, t.max_mw
+        FROM totals AS t
+        JOIN ranked AS r ON r.grp = t.grp
+        ORDER BY t.energy_mwh DESC
+    """)
+    return pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date, "top_n": top_n})
+
+
+# -----------------------------
+# RELIABILITY SUMMARY (GROUPING SETS)
+# -----------------------------
+# filter name -> outage key column; values are dimension names
+RELIABILITY_FILTERS = {"region": "region_id", "disco": "disco_id", "area": "area_id", "station": "station_id"}
+
+
+def _reliability_where(
+    filters: Dict[str, Optional[str]], condition: str = "o.date_off BETWEEN :start_date AND :end_date"
+) -> Tuple[str, dict]:
+    where = [condition]
+    params = {}
+    for name, value in filters.items():
+        if value is None or value == "All":
+            continue
+        where.append(f"o.{RELIABILITY_FILTERS[name]} = (SELECT id FROM dim_{name} WHERE name = :{name})")
+        params[name] = value
+    return " AND ".join(where), params
+
+
+@cached(ttl=CACHE_TTL)
+def read_reliability_summary(
+    start_date: str,
+    end_date: str,
+    region: Optional[str] = None,
+    disco: Optional[str] = None,
+    area: Optional[str] = None,
+    station: Optional[str] = None,
+) -> pd.DataFrame:
+    """Outage counts and minutes for every hierarchy level in one scan.
+
+    A single ``GROUPING SETS`` query returns one row per group of each
+    ``level``: ``total``, ``region``, ``disco``, ``area``, ``station``,
+    ``feeder``, ``party`` and ``feeder_party`` (feeder x party responsible;
+    outages without a party are left out of the party levels, those without
+    a station or feeder key out of the station and feeder levels).  Filters are
+    applied in the ``WHERE`` clause; ``None``/``"All"`` means unfiltered.
+    """
+    where, params = _reliability_where({"region": region, "disco": disco, "area": area, "station": station})
+    query = text(f"""
+        WITH o AS (
+            SELECT
+                o.region_id, o.disco_id, o.area_id, o.station_id, o.feeder_id, o.party_responsible,
+                EXTRACT(EPOCH FROM (o.date_on + o.time_on) - (o.date_off + o.time_off)) / 60.0 AS duration_min
+            FROM outages AS o
+            WHERE {where}
+        )
+        SELECT
+            CASE
+                WHEN GROUPING(feeder_id) = 0 AND GROUPING(party_responsible) = 0 THEN 'feeder_party'
+                WHEN GROUPING(feeder_id) = 0 THEN 'feeder'
+                WHEN GROUPING(station_id) = 0 THEN 'station'
+                WHEN GROUPING(area_id) = 0 THEN 'area'
+                WHEN GROUPING(disco_id) = 0 THEN 'disco'
+                WHEN GROUPING(region_id) = 0 THEN 'region'
+                WHEN GROUPING(party_responsible) = 0 THEN 'party'
+                ELSE 'total'
+            END AS level,
+            region_id, disco_id, area_id, station_id, feeder_id, party_responsible,
+            count(*) AS outages_count,
+            COALESCE(sum(duration_min), 0)::float8 AS total_outage_min
+        FROM o
+        GROUP BY GROUPING SETS (
+            (), (region_id), (disco_id), (area_id), (station_id), (feeder_id),
+            (party_responsible), (feeder_id, party_responsible)
+        )
+        HAVING (GROUPING(party_responsible) = 1 OR party_responsible IS NOT NULL)
+           AND (GROUPING(station_id) = 1 OR station_id IS NOT NULL)
+           AND (GROUPING(feeder_id) = 1 OR feeder_id IS NOT NULL)
+    """)
+    engine = get_read_engine()
+    data = pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date, **params})
+    return decode_dimensions(data, {
+        "region": "region", "disco": "disco", "area": "area",
+        "station": "station", "feeder": "feeder_33kv",
+    })
+
+
+@cached(ttl=CACHE_TTL)
+def read_outage_hierarchy(start_date: str, end_date: str) -> pd.DataFrame:
+    """Distinct region/disco/area/station combinations with outages in the range (filter options)."""
+    engine = get_read_engine()
+    query = text("""
+        SELECT DISTINCT region_id, disco_id, area_id, station_id
+        FROM outages
+        WHERE date_off BETWEEN :start_date AND :end_date
+    """)
+    data = pd.read_sql_query(query, engine, params={"start_date": start_date, "end_date": end_date})
+    return decode_dimensions(data, {"region": "region", "disco": "disco", "area": "area", "station": "station"})
+
+
+# -----------------------------
+# OUTAGE PERIOD COMPARISON
+# -----------------------------
+@cached(ttl=CACHE_TTL)
+def read_outage_comparison(
+    start_date: str,
+    end_date: str,
+    prev_start: str,
+    prev_end: str,
+    region: Optional[str] = None,
+    disco: Optional[str] = None,
+    area: Optional[str] = None,
+    station: Optional[str] = None,
+) -> pd.DataFrame:
+    """Outage counts and minutes of two periods in one scan (comparison mode).
+
+    Every row has a ``period`` (``current`` or ``previous``) and a ``level``:
+    ``total``, ``outage_class``, ``party``, ``feeder`` or ``hour_of_week``
+    (``dow`` 1 = Monday .. 7 and ``hour`` of ``time_off``).  Missing classes
+    and parties are reported as ``Unknown``.  Filters work as in
+    ``read_reliability_summary``.
+    """
+    where, params = _reliability_where(
+        {"region": region, "disco": disco, "area": area, "station": station},
+        condition="(o.date_off BETWEEN :start_date AND :end_date OR o.date_off BETWEEN :prev_start AND :prev_end)",
+    )
+    query = text(f"""
+        WITH o AS (
+            SELECT
+                CASE WHEN o.date_off BETWEEN :start_date AND :end_date THEN 'current' ELSE 'previous' END AS period,
+                COALESCE(o.outage_class, 'Unknown') AS outage_class,
+                COALESCE(o.party_responsible, 'Unknown') AS party_responsible,
+                o.feeder_id,
+                EXTRACT(ISODOW FROM o.date_off)::int AS dow,
+                EXTRACT(HOUR FROM o.time_off)::int AS hour,
+                EXTRACT(EPOCH FROM (o.date_on + o.time_on) - (o.date_off + o.time_off)) / 60.0 AS duration_min
+            FROM outages AS o
+            WHERE {where}
+        )
+        SELECT
+            CASE
+                WHEN GROUPING(outage_class) = 0 THEN 'outage_class'
+                WHEN GROUPING(party_responsible) = 0 THEN 'party'
+                WHEN GROUPING(feeder_id) = 0 THEN 'feeder'
+                WHEN GROUPING(dow) = 0 THEN 'hour_of_week'
+                ELSE 'total'
+            END AS level,
+            period, outage_class, party_responsible, feeder_id, dow, hour,
+            count(*) AS outages_count,
+            COALESCE(sum(duration_min), 0)::float8 AS total_outage_min,
+            avg(duration_min)::float8 AS avg_outage_min
+        FROM o
+        GROUP BY GROUPING SETS (
+            (period), (period, outage_class), (period, party_responsible), (period, feeder_id), (period, dow, hour)
+        )
+    """)
+    engine = get_read_engine()
+    data = pd.read_sql_query(query, engine, params={
+        "start_date": start_date, "end_date": end_date, "prev_start": prev_start, "prev_end": prev_end, **params,
+    })
+    return decode_dimensions(data, {"feeder": "feeder_33kv"})
+
+
+# -----------------------------
+# OUTAGE SEARCH (FULL TEXT)
+# -----------------------------
+# ``outages.search_vector`` is written by the outage upsert and GIN-indexed,
+# so a search is an index lookup over the whole history, not a str.contains
+# over a date range pulled into pandas.
+OUTAGE_SEARCH_LIMIT = 200
+
+
+def ensure_outage_search() -> None:
+    """Add, backfill and index ``outages.search_vector`` (one-time setup, see ``sync_dimensions.py``).
+
+    The GIN index is built with ``CREATE INDEX CONCURRENTLY`` outside a
+    transaction, so uploads keep writing to ``outages`` meanwhile; an
+    invalid index left by an interrupted build is dropped and rebuilt.
+    """
+    with get_engine().begin() as conn:
+        conn.execute(text("ALTER TABLE outages ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+    _backfill_outages("search_vector", _OUTAGE_SEARCH_VECTOR.format(t="outages"))
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        valid = conn.execute(text("""
+            SELECT i.indisvalid FROM pg_index AS i
+            WHERE i.indexrelid = to_regclass('ix_outages_search_vector')
+        """)).scalar()
+        if valid is False:
+            conn.execute(text("DROP INDEX CONCURRENTLY ix_outages_search_vector"))
+        if not valid:
+            conn.execute(text(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_outages_search_vector ON outages USING GIN (search_vector)"
+            ))
+    _mark_primary_write()
+
+
+@cached(ttl=CACHE_TTL)
+def search_outages(
+    terms: str,
+    region: Optional[str] = None,
+    disco: Optional[str] = None,
+    area: Optional[str] = None,
+    station: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = OUTAGE_SEARCH_LIMIT,
+) -> pd.DataFrame:
+    """Outages whose free text matches ``terms``, best matches first.
+
+    ``terms`` uses web-search syntax (``relay trip``, ``"cable fault"``,
+    ``vandalism or theft``, ``-rain``) with English stemming.  Hierarchy
+    filters work as in ``read_reliability_summary``; without dates the whole
+    history is searched.  ``snippet`` highlights the match in the remarks.
+    """
+    where, params = _reliability_where(
+        {"region": region, "disco": disco, "area": area, "station": station},
+        condition="o.search_vector @@ q.tsq",
+    )
+    if start_date:
+        where += " AND o.date_off >= :start_date"
+    if end_date:
+        where += " AND o.date_off <= :end_date"
+    query = text(f"""
+        WITH q AS (SELECT websearch_to_tsquery('{OUTAGE_SEARCH_CONFIG}', :terms) AS tsq),
+        hits AS (
+            SELECT o.id, ts_rank_cd(o.search_vector, q.tsq) AS rank
+            FROM outages AS o, q
+            WHERE {where}
+            ORDER BY rank DESC, o.date_off DESC, o.id DESC
+            LIMIT :limit
+        )
+        SELECT
+            o.id, h.rank, o.date_off, o.time_off, o.region_id, o.disco_id, o.area_id, o.station_id, o.feeder_id,
+            o.outage_class, o.event_indication, o.party_responsible, o.weather_condition,
+            ts_headline('{OUTAGE_SEARCH_CONFIG}', coalesce(o.remarks, ''), q.tsq,
+                        'StartSel=**, StopSel=**, MaxFragments=2, MaxWords=20, MinWords=5') AS snippet
+        FROM hits AS h
+        JOIN outages AS o ON o.id = h.id
+        CROSS JOIN q
+        ORDER BY h.rank DESC, o.date_off DESC, o.id DESC
+    """)
+    engine = get_read_engine()
+    data = pd.read_sql_query(query, engine, params={
+        "terms": terms, "start_date": start_date, "end_date": end_date, "limit": limit, **params,
+    })
+    return decode_dimensions(data, {
+        "region": "region", "disco": "disco", "area": "area", "station": "station", "feeder": "feeder_33kv",
+    })
@@ -0,0 +1,125 @@
+"""
+### FILE: utils/energy_not_served.py
+Energy-not-served (ENS) estimates from the real feeder load profile.
+
+Every outage interval is joined to the hourly slots of its feeder in the
+load cube: the intervals are expanded into (outage, hour) pairs with
+``np.repeat`` and the overlapping readings are gathered by index, so a year
+of outages is joined against a year of hourly load without per-outage
+queries or Python loops.
+
+While a feeder is out its own reading is usually zero or missing.  For those
+hours the feeder's typical load for the same hour of day (median of its
+positive readings around the range) is used instead, and only when that is
+unknown too does the typed-in ``last_load`` apply.  Feeders without a cube
+row at all are priced at ``last_load`` for the whole outage duration.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .cache import cached
+from .db import CACHE_TTL, read_outages
+from .load_cube import HOURS, LoadCube, get_load_cube
+
+# days of load around the outage range used for the typical-hour profile
+PROFILE_DAYS = 14
+# outages restored later than this after the range end are cut off
+MAX_OUTAGE_DAYS = 7
+
+
+def outage_intervals(outages: pd.DataFrame) -> pd.DataFrame:
+    """Add ``start_ts``/``end_ts`` timestamps built from the date/time columns."""
+    return outages.assign(
+        start_ts=pd.to_datetime(outages["date_off"].astype(str) + " " + outages["time_off"].astype(str), errors="coerce"),
+        end_ts=pd.to_datetime(outages["date_on"].astype(str) + " " + outages["time_on"].astype(str), errors="coerce"),
+    )
+
+
+def estimate_energy_not_served(outages: pd.DataFrame, cube: LoadCube, start_date: str, end_date: str) -> pd.DataFrame:
+    """Per-outage ENS (MWh) joined against the feeder load cube.
+
+    Returns one row per outage with ``outage_hours``, ``ens_mwh`` and
+    ``measured_pct`` (share of the outage hours priced from actual readings
+    rather than the typical-hour profile or ``last_load``).  ``ens_mwh`` is
+    NaN only when neither readings nor ``last_load`` can price the outage.
+    """
+    out = outage_intervals(outages)
+    lo = pd.Timestamp(start_date) - pd.Timedelta(days=PROFILE_DAYS)
+    hi = pd.Timestamp(end_date) + pd.Timedelta(days=max(PROFILE_DAYS, MAX_OUTAGE_DAYS))
+    values, dates = cube.window(lo, hi)
+    n = len(out)
+    result = out[["id", "feeder_33kv", "station", "party_responsible", "start_ts", "end_ts"]].copy()
+    if n == 0:
+        return result.assign(outage_hours=np.nan, ens_mwh=np.nan, measured_pct=np.nan)
+
+    flat = values.reshape(values.shape[0], -1)
+    origin = pd.Timestamp(dates[0]) if len(dates) else lo
+    horizon = float(flat.shape[1])
+
+    # typical load per feeder and hour of day, from positive readings only
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        profile = np.nanmedian(np.where(values > 0, values, np.nan), axis=1)
+
+    rows = pd.Index(cube.labels("feeder_id")).get_indexer(out["feeder_33kv"].astype(object))
+    if len(dates) == 0:
+        rows = np.full(n, -1)
+    # open outages count until now; outages stop at the cube window, or at
+    # the end of the loaded range for feeders the cube does not have
+    end_ts = out["end_ts"].fillna(pd.Timestamp.now())
+    s_h = ((out["start_ts"] - origin) / pd.Timedelta(hours=1)).to_numpy(dtype=float)
+    e_h = ((end_ts - origin) / pd.Timedelta(hours=1)).to_numpy(dtype=float)
+    e_h = np.minimum(e_h, np.where(rows >= 0, horizon, (hi + pd.Timedelta(days=1) - origin) / pd.Timedelta(hours=1)))
+    timed = ~np.isnan(s_h) & ~np.isnan(e_h) & (e_h > s_h) & (s_h >= 0)
+    valid = timed & (rows >= 0)
+    unmatched = timed & (rows < 0)
+
+    h0 = np.where(valid, np.floor(np.nan_to_num(s_h)), 0).astype(np.int64)
+    h1 = np.where(valid, np.ceil(np.nan_to_num(e_h)), 0).astype(np.int64)
+    counts = h1 - h0
+
+    # interval join: one (outage, hour) pair per overlapped hourly slot
+    idx = np.repeat(np.arange(n), counts)
+    hour = h0[idx] + np.arange(len(idx)) - np.repeat(np.cumsum(counts) - counts, counts)
+    overlap = np.minimum(e_h[idx], hour + 1) - np.maximum(s_h[idx], hour)
+    measured = flat[rows[idx], hour].astype(float)
+    use_measured = measured > 0
+    load = np.where(use_measured, measured, profile[rows[idx], hour % HOURS])
+    last_load = pd.to_numeric(out["last_load"], errors="coerce").to_numpy(dtype=float)
+    load = np.where(np.isnan(load), last_load[idx], load)
+
+    hours = np.bincount(idx, weights=overlap, minlength=n)
+    ens = np.bincount(idx, weights=np.nan_to_num(load * overlap), minlength=n)
+    priced = np.bincount(idx, weights=overlap * ~np.isnan(load), minlength=n)
+    measured_h = np.bincount(idx, weights=overlap * use_measured, minlength=n)
+
+    # feeders missing from the cube: last known load over the whole duration
+    duration = np.where(unmatched, e_h - s_h, np.nan)
+    hours = np.where(unmatched, duration, hours)
+    ens = np.where(unmatched, last_load * duration, ens)
+    priced = np.where(unmatched, ~np.isnan(last_load) * duration, priced)
+    measured_h = np.where(unmatched, 0.0, measured_h)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["outage_hours"] = np.where(timed, hours, np.nan)
+        result["ens_mwh"] = np.where(timed & (priced > 0), ens, np.nan)
+        result["measured_pct"] = np.where(timed, 100.0 * measured_h / hours, np.nan)
+    return result
+
+
+@cached(ttl=CACHE_TTL)
+def outage_energy_not_served(start_date: str, end_date: str, cube_version: int) -> pd.DataFrame:
+    """ENS for every outage starting in the range; ``cube_version`` keys the cache."""
+    return estimate_energy_not_served(read_outages(start_date, end_date), get_load_cube("feeder"), start_date, end_date)
+
+
+def summarize_energy_not_served(ens: pd.DataFrame, by: str, tariff: float = 0.0) -> pd.DataFrame:
+    """Total ENS, outage hours and revenue loss per ``by`` column, largest first."""
+    summary = ens.groupby(by, observed=True).agg(
+        outages_count=("id", "count"),
+        outage_hours=("outage_hours", "sum"),
+        ens_mwh=("ens_mwh", "sum"),
+    ).reset_index()
+    summary["revenue_loss"] = summary["ens_mwh"] * tariff
+    return summary.sort_values("ens_mwh", ascending=False).reset_index(drop=True)
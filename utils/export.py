@@ -0,0 +1,275 @@
+"""
+### FILE: utils/export.py
+Streaming export of filtered load and outage rows to CSV or Parquet.
+
+Rows never pass through ``pd.read_sql_query``: CSV exports use
+``COPY (query) TO STDOUT`` written straight into a temporary file, Parquet
+exports read a server-side cursor in fixed-size chunks and append one row
+group per chunk, so building the file needs no pandas frame.  When the user
+clicks, the finished file is handed to ``st.download_button`` as a
+file-backed reader (``ExportFile``), which Streamlit copies into its
+in-memory media store for the session.  Exports of more than
+``EXPORT_MAX_ROWS`` rows are therefore refused (``count_export_rows``) with a
+message asking for a narrower range instead of being cut short.
+"""
+import io
+import os
+import tempfile
+from datetime import date
+from typing import Dict, Optional, Tuple, Union
+
+import streamlit as st
+
+from .cache import cached
+from .db import CACHE_TTL, get_read_engine
+
+# rows per server-side fetch / Parquet row group
+CHUNK_ROWS = 100_000
+# rows per export; Streamlit holds the whole file in memory once served
+EXPORT_MAX_ROWS = int(os.getenv("EXPORT_MAX_ROWS", "1000000"))
+
+# source -> table, exported columns as (SQL expression, name, type), the date
+# column used for the range, sort order and the filterable columns
+EXPORT_SOURCES = {
+    "feeder_load": {
+        "table": "feeder_33kv_load",
+        "columns": [
+            ("reading_date", "reading_date", "date"),
+            ("reading_time", "reading_time", "string"),
+            ("region", "region", "string"),
+            ("area", "area", "string"),
+            ("station", "station", "string"),
+            ("feeder", "feeder_33kv", "string"),
+            ("customer", "customer", "string"),
+            ("load_mw::float8", "load_mw", "float"),
+        ],
+        "date_column": "reading_date",
+        "order": "reading_date, reading_time",
+        "filters": {"region": "region", "area": "area", "station": "station", "feeder_33kv": "feeder"},
+    },
+    "transformer_load": {
+        "table": "transformer_load",
+        "columns": [
+            ("reading_date", "reading_date", "date"),
+            ("reading_time", "reading_time", "string"),
+            ("region", "region", "string"),
+            ("area", "area", "string"),
+            ("station", "station", "string"),
+            ("transformer_nomenclature", "transformer_nomenclature", "string"),
+            ("load_mw::float8", "load_mw", "float"),
+        ],
+        "date_column": "reading_date",
+        "order": "reading_date, reading_time",
+        "filters": {"region": "region", "area": "area", "station": "station"},
+    },
+    "outages": {
+        "table": "outages",
+        "columns": [
+            ("id", "id", "int"),
+            ("disco", "disco", "string"),
+            ("region", "region", "string"),
+            ("area", "area", "string"),
+            ("station", "station", "string"),
+            ("feeder_33kv", "feeder_33kv", "string"),
+            ("date_off", "date_off", "date"),
+            ("time_off::text", "time_off", "string"),
+            ("date_on", "date_on", "date"),
+            ("time_on::text", "time_on", "string"),
+            ("duration_outage", "duration_outage", "string"),
+            ("outage_class", "outage_class", "string"),
+            ("last_load::float8", "last_load", "float"),
+            ("event_indication", "event_indication", "string"),
+            ("party_responsible", "party_responsible", "string"),
+            ("officer_confirming_interruption", "officer_confirming_interruption", "string"),
+            ("officer_confirming_restoration", "officer_confirming_restoration", "string"),
+            ("weather_condition", "weather_condition", "string"),
+            ("remarks", "remarks", "string"),
+        ],
+        "date_column": "date_off",
+        "order": "date_off, time_off",
+        "filters": {
+            "disco": "disco", "region": "region", "area": "area",
+            "station": "station", "feeder_33kv": "feeder_33kv",
+        },
+    },
+}
+
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def _export_where(source: str, start_date: str, end_date: str, filters: Optional[Dict[str, str]]):
+    """``WHERE`` clause (pyformat placeholders) and parameters of an export."""
+    if source not in EXPORT_SOURCES:
+        raise ValueError(f"Unknown export source: {source}")
+    spec = EXPORT_SOURCES[source]
+    where = [f"{spec['date_column']} BETWEEN %(start_date)s AND %(end_date)s"]
+    params = {"start_date": start_date, "end_date": end_date}
+    for key, value in (filters or {}).items():
+        if value is None or value == "All":
+            continue
+        if key not in spec["filters"]:
+            raise ValueError(f"{source} cannot be filtered by {key}")
+        where.append(f"{spec['filters'][key]} = %({key})s")
+        params[key] = str(value)
+    return " AND ".join(where), params
+
+
+def _export_sql(cur, source: str, start_date: str, end_date: str, filters: Optional[Dict[str, str]]) -> str:
+    """Render the export ``SELECT`` with literals bound (COPY takes no parameters)."""
+    spec = EXPORT_SOURCES[source]
+    where, params = _export_where(source, start_date, end_date, filters)
+    columns = ", ".join(f"{expr} AS {name}" for expr, name, _ in spec["columns"])
+    sql = f"SELECT {columns} FROM {spec['table']} WHERE {where} ORDER BY {spec['order']}"
+    return cur.mogrify(sql, params).decode("utf-8")
+
+
+@cached(ttl=CACHE_TTL)
+def count_export_rows(source: str, start_date: str, end_date: str, filters: Tuple = ()) -> int:
+    """Rows an export would contain, counted up to ``EXPORT_MAX_ROWS + 1``.
+
+    ``filters`` is a tuple of ``(column, value)`` pairs so the call can be cached.
+    """
+    where, params = _export_where(source, start_date, end_date, dict(filters))
+    raw_conn = get_read_engine().raw_connection()
+    try:
+        cur = raw_conn.cursor()
+        cur.execute(
+            f"SELECT count(*) FROM (SELECT 1 FROM {EXPORT_SOURCES[source]['table']} WHERE {where}"
+            f" LIMIT {EXPORT_MAX_ROWS + 1:d}) AS capped",
+            params,
+        )
+        return cur.fetchone()[0]
+    finally:
+        raw_conn.close()
+
+
+class ExportFile(io.BufferedReader):
+    """Read-only handle on a finished export; closes (and so frees) the file once fully read."""
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        data = super().read(size)
+        if size is None or size < 0:
+            self.close()
+        return data
+
+
+def stream_csv(fileobj, source: str, start_date: str, end_date: str, filters: Optional[Dict[str, str]] = None) -> None:
+    """Write the filtered rows as CSV (with header) into binary ``fileobj``."""
+    raw_conn = get_read_engine().raw_connection()
+    try:
+        cur = raw_conn.cursor()
+        sql = _export_sql(cur, source, start_date, end_date, filters)
+        cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH CSV HEADER", fileobj)
+    finally:
+        raw_conn.close()
+
+
+def _arrow_schema(source: str):
+    import pyarrow as pa
+
+    types = {"date": pa.date32(), "string": pa.string(), "float": pa.float64(), "int": pa.int64()}
+    return pa.schema([(name, types[kind]) for _, name, kind in EXPORT_SOURCES[source]["columns"]])
+
+
+def stream_parquet(fileobj, source: str, start_date: str, end_date: str, filters: Optional[Dict[str, str]] = None) -> None:
+    """Write the filtered rows as Parquet, one row group per ``CHUNK_ROWS`` fetch."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(source)
+    names = schema.names
+    raw_conn = get_read_engine().raw_connection()
+    try:
+        # named cursor = server-side cursor; rows arrive CHUNK_ROWS at a time
+        cur = raw_conn.cursor(name=f"export_{source}")
+        cur.itersize = CHUNK_ROWS
+        cur.execute(_export_sql(raw_conn.cursor(), source, start_date, end_date, filters))
+        with pq.ParquetWriter(fileobj, schema) as writer:
+            while True:
+                rows = cur.fetchmany(CHUNK_ROWS)
+                if not rows:
+                    break
+                columns = list(zip(*rows))
+                writer.write_table(pa.table(
+                    [pa.array(col, type=schema.field(i).type) for i, col in enumerate(columns)],
+                    names=names,
+                ))
+        cur.close()
+    finally:
+        raw_conn.rollback()
+        raw_conn.close()
+
+
+def export_file(source: str, fmt: str, start_date: str, end_date: str,
+                filters: Optional[Dict[str, str]] = None) -> ExportFile:
+    """Build an export in a temporary file and return a reader on it.
+
+    The file is unlinked as soon as it is reopened, so the disk space is
+    released when the reader is closed.  Raises ``ValueError`` when the
+    export exceeds ``EXPORT_MAX_ROWS``.
+    """
+    n_rows = count_export_rows(source, start_date, end_date, tuple(sorted((filters or {}).items())))
+    if n_rows > EXPORT_MAX_ROWS:
+        raise ValueError(f"Export exceeds {EXPORT_MAX_ROWS:,} rows; narrow the date range or filters")
+    with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as tmp:
+        path = tmp.name
+        try:
+            if fmt == "parquet":
+                stream_parquet(tmp, source, start_date, end_date, filters)
+            else:
+                stream_csv(tmp, source, start_date, end_date, filters)
+        except BaseException:
+            os.remove(path)
+            raise
+    try:
+        return ExportFile(io.FileIO(path, "rb"))
+    finally:
+        os.remove(path)  # POSIX keeps the open file readable
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def render_export(
+    source: str,
+    start_date: Union[str, date],
+    end_date: Union[str, date],
+    filters: Optional[Dict[str, str]] = None,
+    key: Optional[str] = None,
+) -> None:
+    """Export controls for the current page filters.
+
+    The file is only generated when the download button is clicked (deferred
+    ``data`` callable); reruns only run the capped, cached row count.
+    """
+    key = key or source
+    start_date, end_date = str(start_date), str(end_date)
+    with st.expander("Export data"):
+        formats = list(EXPORT_FORMATS) if parquet_available() else ["csv"]
+        fmt = st.radio("Format", options=formats, format_func=str.upper, horizontal=True, key=f"{key}_export_fmt")
+        active = {k: v for k, v in (filters or {}).items() if v is not None and v != "All"}
+        n_rows = count_export_rows(source, start_date, end_date, tuple(sorted(active.items())))
+        too_large = n_rows > EXPORT_MAX_ROWS
+        st.caption(
+            f"{source.replace('_', ' ')} rows from {start_date} to {end_date}"
+            + ("".join(f", {k} = {v}" for k, v in active.items()))
+            + (f": more than {EXPORT_MAX_ROWS:,}" if too_large else f": {n_rows:,}")
+        )
+        if too_large:
+            st.error(
+                f"Exports are limited to {EXPORT_MAX_ROWS:,} rows (EXPORT_MAX_ROWS). "
+                "Narrow the date range or filters to export."
+            )
+        st.download_button(
+            f"Download {fmt.upper()}",
+            data=lambda: export_file(source, fmt, start_date, end_date, active),
+            file_name=f"{source}_{start_date}_{end_date}.{fmt}",
+            mime=EXPORT_FORMATS[fmt],
+            key=f"{key}_export_btn",
+            disabled=too_large,
+        )
@@ -0,0 +1,53 @@
+"""
+### FILE: utils/figures.py
+Figure cache shared across reruns and sessions.
+
+Every widget interaction reruns the whole page, and building a Plotly
+Express figure (plus the aggregation feeding it) is often the most
+expensive stage of a rerun.  ``cached_figure`` keys each figure by its name,
+a version of its input data and the filter values, and only calls the
+builder when that key has not been seen:
+
+    fig = cached_figure(
+        ("region_hourly", cube.version, str(start_date), str(end_date), region),
+        lambda: px.line(...),
+    )
+
+Data versions are ``cube.version`` for load-cube pages and
+``data_token(frame)`` (a content hash) for frames read from the database.
+Exported images are cached the same way with ``cached_image``.
+
+Figures and images live in the process-wide reader cache
+(``utils.cache.cached_value``), so they are measured in bytes, count towards
+``CACHE_MAX_MB`` and are evicted together with the DataFrames by the same
+cost-aware policy; ``cache_stats()["bytes_by_function"]`` lists them under
+``utils.figures.cached_figure`` and ``utils.figures.cached_image``.
+
+Cached figures are shared: treat them as read-only (no ``update_layout``
+on a returned figure; do it inside the builder).
+"""
+import hashlib
+from typing import Any, Callable, Tuple
+
+import pandas as pd
+
+from .cache import cached_value
+
+
+def data_token(*frames: pd.DataFrame) -> str:
+    """Content hash of one or more frames, used as a data version in figure keys."""
+    digest = hashlib.md5()
+    for frame in frames:
+        digest.update(repr((frame.shape, list(frame.columns))).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def cached_figure(key: Tuple, build: Callable[[], Any]):
+    """Return the figure for ``key``, calling ``build()`` only on a miss."""
+    return cached_value((f"{__name__}.cached_figure",) + tuple(key), build)
+
+
+def cached_image(key: Tuple, fig, fmt: str = "png") -> bytes:
+    """Static image bytes of ``fig`` (via kaleido), cached under the figure's key."""
+    return cached_value((f"{__name__}.cached_image", fmt) + tuple(key), lambda: fig.to_image(format=fmt))
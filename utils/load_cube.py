@@ -0,0 +1,376 @@
+"""
+### FILE: utils/load_cube.py
+Dense (asset, day, hour) load cube persisted as memory-mapped files.
+
+The long-format frames returned by ``read_feeder_load`` and
+``read_transformer_load`` repeat every dimension per reading and need a
+groupby for each view.  The cube stores one float32 per asset-hour instead,
+so region/station/feeder views become array slices and reductions.
+
+Files live under ``LOAD_CUBE_DIR`` (default ``.load_cube/``), one folder per
+cube:
+
+* ``meta.json``      – origin date, sizes, the current file names and the
+  per-day digest of the source rows
+* ``assets-N.csv``   – asset keys and hierarchy ids, one row per cube row
+* ``values-N.f32``   – the memory-mapped ``(asset_capacity, day_capacity, 24)`` array
+
+Refreshes compare a per-day digest of the source rows (row count, load sum
+and key sum, ``read_load_digest``) with the stored one and re-read only the
+days that differ, so late corrections, newly keyed rows and new assets are
+picked up.  The digest covers only the last ``DIGEST_DAYS`` days of the cube
+and whatever follows them; changes to older history wait for the full
+rebuild that runs every ``FULL_REBUILD_SECONDS`` and after
+``request_rebuild`` (``sync_dimensions.py``).  When the cube outgrows its capacity a larger file
+is written and ``meta.json`` is swapped atomically, so open views stay valid.  All
+Streamlit sessions of a process share one cube object (``get_load_cube``) and
+processes share the mapped pages through the OS page cache.
+"""
+import json
+import os
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .db import CACHE_TTL, read_dimension, read_load_cells, read_load_digest, sync_dimension_keys, time_order
+
+try:  # POSIX only; without it concurrent processes rely on the atomic meta swap
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+LOAD_CUBE_DIR = os.getenv("LOAD_CUBE_DIR", ".load_cube")
+REFRESH_SECONDS = CACHE_TTL
+FULL_REBUILD_SECONDS = float(os.getenv("LOAD_CUBE_REBUILD_HOURS", "24")) * 3600
+DIGEST_DAYS = int(os.getenv("LOAD_CUBE_DIGEST_DAYS", "35"))
+REBUILD_MARKER = "rebuild"
+HOURS = len(time_order)
+
+# cube name -> source table, asset key columns and hierarchy id columns stored per asset
+CUBE_SPECS = {
+    "feeder": {
+        "table": "feeder_33kv_load",
+        "keys": ["feeder_id"], "attributes": ["region_id", "area_id", "station_id"],
+    },
+    "transformer": {
+        "table": "transformer_load",
+        "keys": ["station_id", "transformer_nomenclature"], "attributes": ["region_id", "area_id"],
+    },
+}
+
+
+@contextmanager
+def _file_lock(path: str):
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(path, ".lock"), "w") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _round_up(n: int, step: int) -> int:
+    return max(step, -(-n // step) * step)
+
+
+def _digest(frame: pd.DataFrame) -> Dict[str, list]:
+    """``read_load_digest`` frame as a JSON-safe ``{day: [rows, load sum, key sum]}`` dict."""
+    return {
+        str(day): [int(n_rows), None if pd.isna(load_sum) else float(load_sum), int(key_sum)]
+        for day, n_rows, load_sum, key_sum in frame.itertuples(index=False)
+    }
+
+
+def request_rebuild(root: str = LOAD_CUBE_DIR) -> None:
+    """Make the next refresh of every cube under ``root`` a full rebuild."""
+    for kind in CUBE_SPECS:
+        path = os.path.join(root, kind)
+        os.makedirs(path, exist_ok=True)
+        open(os.path.join(path, REBUILD_MARKER), "w").close()
+
+
+def nansum_cells(values: np.ndarray, axis) -> np.ndarray:
+    """``np.nansum`` that keeps NaN where every summed cell is missing."""
+    total = np.nansum(values, axis=axis)
+    missing = np.isnan(values).all(axis=axis)
+    if np.ndim(total):
+        total[missing] = np.nan
+    elif missing:
+        total = np.nan
+    return total
+
+
+def has_data(values: np.ndarray) -> np.ndarray:
+    """Boolean mask of the assets with at least one reading in ``values``."""
+    return ~np.isnan(values).all(axis=(1, 2))
+
+
+def hourly_frame(profile: np.ndarray) -> pd.DataFrame:
+    """Turn a 24-slot profile into the ``reading_time``/``load_mw`` frame used by the charts."""
+    return pd.DataFrame({"reading_time": time_order, "load_mw": profile})
+
+
+class LoadCube:
+    """Memory-mapped hourly load array for one asset type (see ``CUBE_SPECS``)."""
+
+    def __init__(self, kind: str, root: str = LOAD_CUBE_DIR):
+        if kind not in CUBE_SPECS:
+            raise ValueError(f"Unknown load cube: {kind}")
+        self.kind = kind
+        self.keys = CUBE_SPECS[kind]["keys"]
+        self.attributes = CUBE_SPECS[kind]["attributes"]
+        self.path = os.path.join(root, kind)
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._refreshed_at = float("-inf")
+        self._meta = None
+        self._data = None
+        self.assets = pd.DataFrame(columns=self.keys + self.attributes)
+        self._load()
+
+    # -- persistence -------------------------------------------------------
+    def _load(self) -> None:
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if self._meta is None or meta["version"] != self._meta["version"]:
+            shape = (meta["asset_capacity"], meta["day_capacity"], HOURS)
+            self._data = np.memmap(
+                os.path.join(self.path, meta["data_file"]), dtype=np.float32, mode="r+", shape=shape,
+            )
+            self.assets = pd.read_csv(
+                os.path.join(self.path, meta["assets_file"]),
+                dtype={"transformer_nomenclature": str},
+            )
+        self._meta = meta
+
+    def _write_meta(self, bump: bool = True, **changes) -> None:
+        old_files = {}
+        if self._meta is not None:
+            old_files = {k: self._meta[k] for k in ("data_file", "assets_file")}
+        meta = dict(self._meta or {}, **changes)
+        if bump:
+            meta["version"] = meta.get("version", 0) + 1
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+        self._meta = meta
+        for key, name in old_files.items():
+            if name != meta[key]:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass  # still mapped elsewhere (Windows); harmless
+
+    def _allocate(self, asset_capacity: int, day_capacity: int, version: int) -> np.memmap:
+        name = f"values-{version}.f32"
+        data = np.memmap(
+            os.path.join(self.path, name), dtype=np.float32, mode="w+",
+            shape=(asset_capacity, day_capacity, HOURS),
+        )
+        data[:] = np.nan
+        return data
+
+    # -- shape -------------------------------------------------------------
+    @property
+    def version(self) -> int:
+        """Increases with every refresh that changed the cube; use it in cache keys."""
+        return self._meta["version"] if self._meta else 0
+
+    @property
+    def n_assets(self) -> int:
+        return len(self.assets)
+
+    @property
+    def n_days(self) -> int:
+        return self._meta["n_days"] if self._meta else 0
+
+    @property
+    def origin(self) -> Optional[np.datetime64]:
+        return np.datetime64(self._meta["origin"], "D") if self._meta else None
+
+    @property
+    def values(self) -> np.ndarray:
+        """``(n_assets, n_days, 24)`` view of the mapped array, NaN where missing."""
+        if self._data is None:
+            return np.empty((0, 0, HOURS), dtype=np.float32)
+        return self._data[: self.n_assets, : self.n_days]
+
+    @property
+    def dates(self) -> np.ndarray:
+        if self._meta is None:
+            return np.empty(0, dtype="datetime64[D]")
+        return self.origin + np.arange(self.n_days)
+
+    def window(self, start_date, end_date) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(values, dates)`` for the inclusive date range, zero-copy."""
+        if self._meta is None:
+            return self.values, self.dates
+        lo = int((np.datetime64(pd.Timestamp(start_date).date(), "D") - self.origin).astype(int))
+        hi = int((np.datetime64(pd.Timestamp(end_date).date(), "D") - self.origin).astype(int)) + 1
+        lo, hi = max(lo, 0), min(max(hi, 0), self.n_days)
+        lo = min(lo, hi)
+        return self.values[:, lo:hi], self.dates[lo:hi]
+
+    def labels(self, column: str) -> np.ndarray:
+        """Per-asset names for a key or hierarchy column (ids are decoded)."""
+        data = self.assets[column]
+        if not column.endswith("_id"):
+            return data.to_numpy(dtype=object)
+        lookup = read_dimension(column[:-3])
+        if not data.dropna().isin(lookup.index).all():
+            # a name was added after the lookup was cached
+            read_dimension.clear()
+            lookup = read_dimension(column[:-3])
+        return lookup.reindex(data.to_numpy()).to_numpy(dtype=object)
+
+    # -- refresh -----------------------------------------------------------
+    def refresh(self, max_age: float = REFRESH_SECONDS, full: bool = False) -> "LoadCube":
+        """Pull changed readings from the database into the cube.
+
+        The digest of the last ``DIGEST_DAYS`` days and any later ones is
+        compared with the stored one and only the days that changed are
+        re-read.  The whole cube is rebuilt when ``full`` is set, when it does not exist
+        yet, when a changed day precedes its origin, every
+        ``FULL_REBUILD_SECONDS`` and after ``request_rebuild``.  Calls within
+        ``max_age`` seconds of the previous refresh return immediately.
+        """
+        with self._lock:
+            if not full and time.monotonic() - self._refreshed_at < max_age:
+                return self
+            try:
+                # key the rows loaded since the last refresh, or they would be missed
+                sync_dimension_keys([CUBE_SPECS[self.kind]["table"]])
+            except Exception as e:
+                warnings.warn(f"Could not resolve new {self.kind} load keys: {e}")
+            with _file_lock(self.path):
+                self._load()  # another process may have refreshed already
+                marker = os.path.join(self.path, REBUILD_MARKER)
+                requested = os.path.exists(marker)
+                # only the trailing days are compared, older history is left
+                # to the full rebuild
+                since = None if self._meta is None else str(self.dates[-1] - DIGEST_DAYS)
+                digest = _digest(read_load_digest(self.kind, since))
+                stored = (self._meta or {}).get("digest")
+                changed = sorted(
+                    day for day in digest.keys() | (stored or {}).keys()
+                    if (since is None or day >= since) and digest.get(day) != (stored or {}).get(day)
+                )
+                full = (
+                    full or requested or stored is None
+                    or time.time() - self._meta.get("built_at", 0) > FULL_REBUILD_SECONDS
+                    or (bool(changed) and np.datetime64(changed[0], "D") < self.origin)
+                )
+                if full:
+                    self._apply(read_load_cells(self.kind), None, digest)
+                elif changed:
+                    cells = read_load_cells(self.kind, changed)
+                    self._apply(cells, np.array(changed, dtype="datetime64[D]"), digest)
+                if requested:
+                    try:
+                        os.remove(marker)
+                    except FileNotFoundError:
+                        pass
+            self._refreshed_at = time.monotonic()
+        return self
+
+    def _apply(self, cells: pd.DataFrame, days: Optional[np.ndarray], digest: Dict[str, list]) -> None:
+        """Write ``cells`` for ``days`` (every day when ``None``); the version moves only on change."""
+        slots = pd.Categorical(cells["reading_time"], categories=time_order).codes
+        cells = cells[slots >= 0].assign(slot=slots[slots >= 0])
+        rebuild = days is None or self._meta is None
+        if rebuild and cells.empty:
+            return
+        dates = pd.to_datetime(cells["reading_date"]).to_numpy().astype("datetime64[D]")
+
+        # resolve cube rows: known assets keep their row, new ones are appended
+        # and a rebuild drops the assets that no longer have readings
+        assets = self.assets
+        latest = cells.drop_duplicates(self.keys, keep="last")[self.keys + self.attributes]
+        if rebuild and len(assets):
+            present = pd.MultiIndex.from_frame(assets[self.keys]).isin(pd.MultiIndex.from_frame(latest[self.keys]))
+            assets = assets[present].reset_index(drop=True)
+        known = pd.MultiIndex.from_frame(assets[self.keys])
+        pos = known.get_indexer(pd.MultiIndex.from_frame(latest[self.keys]))
+        assets_changed = len(assets) != self.n_assets or (pos < 0).any()
+        if (pos >= 0).any():
+            current = assets.iloc[pos[pos >= 0]][self.attributes].to_numpy()
+            incoming = latest[pos >= 0][self.attributes].to_numpy()
+            if not np.array_equal(current.astype(float), incoming.astype(float), equal_nan=True):
+                assets = assets.copy()
+                assets.iloc[pos[pos >= 0], [assets.columns.get_loc(c) for c in self.attributes]] = incoming
+                assets_changed = True
+        if (pos < 0).any():
+            assets = pd.concat([assets, latest[pos < 0]], ignore_index=True)
+        rows = pd.MultiIndex.from_frame(assets[self.keys]).get_indexer(pd.MultiIndex.from_frame(cells[self.keys]))
+
+        if rebuild:
+            origin = dates.min()
+            n_days = int((dates.max() - origin).astype(int)) + 1
+            columns = np.arange(n_days)
+        else:
+            origin = self.origin
+            columns = (days - origin).astype(np.int64)
+            n_days = max(self.n_days, int(columns.max()) + 1)
+
+        # re-pulled days are rebuilt off-map and copied in with one assignment,
+        # so readers never see a half-cleared window and deleted readings vanish
+        block = np.full((len(assets), len(columns), HOURS), np.nan, dtype=np.float32)
+        cell_columns = np.searchsorted(columns, (dates - origin).astype(np.int64))
+        block[rows, cell_columns, cells["slot"].to_numpy()] = cells["load_mw"].to_numpy(dtype=np.float32)
+
+        built = {"built_at": time.time()} if rebuild else {}
+        if not assets_changed and origin == self.origin and n_days == self.n_days:
+            current = self.values if rebuild else self.values[:, columns]
+            if np.array_equal(current, block, equal_nan=True):
+                self._write_meta(bump=False, digest=digest, **built)
+                return
+
+        version = (self._meta or {}).get("version", 0) + 1
+        data = self._data
+        data_file = (self._meta or {}).get("data_file")
+        if rebuild or len(assets) > data.shape[0] or n_days > data.shape[1]:
+            asset_capacity = _round_up(max(len(assets), int(data.shape[0] * 1.5) if not rebuild else 0), 32)
+            day_capacity = _round_up(max(n_days + 31, int(data.shape[1] * 1.25) if not rebuild else 0), 64)
+            new_data = self._allocate(asset_capacity, day_capacity, version)
+            if not rebuild:
+                new_data[: self.n_assets, : self.n_days] = self.values
+            data, data_file = new_data, f"values-{version}.f32"
+        if rebuild:
+            data[: len(assets), :n_days] = block
+        else:
+            data[: len(assets), columns] = block
+        data.flush()
+
+        assets_file = (self._meta or {}).get("assets_file")
+        if assets_changed:
+            assets_file = f"assets-{version}.csv"
+            assets.to_csv(os.path.join(self.path, assets_file), index=False)
+        self._data, self.assets = data, assets.reset_index(drop=True)
+        self._write_meta(
+            origin=str(origin), n_days=n_days,
+            asset_capacity=int(data.shape[0]), day_capacity=int(data.shape[1]),
+            data_file=data_file, assets_file=assets_file, digest=digest, **built,
+        )
+
+
+@st.cache_resource
+def _open_load_cube(kind: str) -> LoadCube:
+    return LoadCube(kind)
+
+
+def get_load_cube(kind: str) -> LoadCube:
+    """Return the process-wide cube for ``kind``, refreshed at most every 5 minutes."""
+    return _open_load_cube(kind).refresh()
@@ -0,0 +1,134 @@
+"""
+### FILE: utils/load_metrics.py
+Fleet-wide load factor, diversity and coincident-peak metrics.
+
+Works directly on the load cube: every asset, station, area and region is
+computed in one vectorized pass over the ``(asset, hour)`` matrix of the
+selected date range.
+
+Metrics per row:
+
+* ``peak_mw`` – highest hourly load (for groups: the coincident peak, i.e.
+  the peak of the summed load)
+* ``avg_mw`` / ``energy_mwh`` – mean hourly load and energy over the range
+* ``load_factor`` – ``avg_mw / peak_mw``
+* ``utilization_pct`` – share of reported hours in which the asset carried load
+* ``non_coincident_peak_mw`` – sum of the member assets' individual peaks
+* ``diversity_factor`` – ``non_coincident_peak_mw / peak_mw`` (groups only)
+* ``coincidence_factor`` – asset load at its station's peak hour divided by
+  the asset's own peak (assets only)
+"""
+import warnings
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from .cache import cached
+from .db import CACHE_TTL, read_dimension, time_order
+from .load_cube import HOURS, get_load_cube
+
+# hierarchy levels above the asset, most specific first
+GROUP_LEVELS = (("station", "station_id"), ("area", "area_id"), ("region", "region_id"))
+
+
+def _group_sum(flat: np.ndarray, codes: np.ndarray):
+    """Sum the rows of ``flat`` per group code, NaN where no member reported."""
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    rows = flat[order]
+    sums = np.add.reduceat(np.nan_to_num(rows), starts, axis=0)
+    reported = np.add.reduceat((~np.isnan(rows)).astype(np.int32), starts, axis=0)
+    sums[reported == 0] = np.nan
+    return sorted_codes[starts], sums
+
+
+def _peak_position(series: np.ndarray, dates: np.ndarray):
+    """Date and reading_time of each row's maximum."""
+    filled = np.where(np.isnan(series), -np.inf, series)
+    pos = filled.argmax(axis=1)
+    day, hour = np.divmod(pos, HOURS)
+    return dates[day].astype(object), np.asarray(time_order, dtype=object)[hour], pos
+
+
+def _basic_metrics(series: np.ndarray) -> Dict[str, np.ndarray]:
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        peak = np.nanmax(series, axis=1)
+        avg = np.nanmean(series, axis=1)
+        hours = (~np.isnan(series)).sum(axis=1)
+        return {
+            "peak_mw": peak,
+            "avg_mw": avg,
+            "energy_mwh": np.nansum(series, axis=1),
+            "load_factor": avg / peak,
+            "utilization_pct": 100.0 * (series > 0).sum(axis=1) / hours,
+            "hours_reported": hours,
+        }
+
+
+def _ranked(frame: pd.DataFrame, by: str = "peak_mw") -> pd.DataFrame:
+    frame = frame.sort_values(by, ascending=False, na_position="last").reset_index(drop=True)
+    frame.insert(0, "rank", np.arange(1, len(frame) + 1))
+    return frame
+
+
+@cached(ttl=CACHE_TTL)
+def fleet_load_metrics(kind: str, start_date: str, end_date: str, cube_version: int) -> Dict[str, pd.DataFrame]:
+    """Ranked metric tables for every asset and hierarchy level of a cube.
+
+    Returns ``{"asset": ..., "station": ..., "area": ..., "region": ...}``.
+    ``cube_version`` only keys the cache so results follow cube refreshes.
+    """
+    cube = get_load_cube(kind)
+    values, dates = cube.window(start_date, end_date)
+    flat = values.reshape(values.shape[0], -1)
+    active = ~np.isnan(flat).all(axis=1)
+    flat = flat[active].astype(np.float64)
+    assets = cube.assets[active].reset_index(drop=True)
+    if not len(flat):
+        return {}
+
+    if kind == "transformer":
+        asset_names = cube.labels("station_id")[active] + " / " + cube.labels("transformer_nomenclature")[active]
+    else:
+        asset_names = cube.labels("feeder_id")[active]
+
+    asset = pd.DataFrame({"asset": asset_names})
+    for level, column in GROUP_LEVELS:
+        asset[level] = cube.labels(column)[active]
+    asset_metrics = _basic_metrics(flat)
+    peak_date, peak_time, _ = _peak_position(flat, dates)
+    asset = asset.assign(**asset_metrics, peak_date=peak_date, peak_time=peak_time)
+
+    tables = {}
+    for level, column in GROUP_LEVELS:
+        codes = np.nan_to_num(assets[column].to_numpy(dtype=float), nan=-1).astype(np.int64)
+        known = codes >= 0
+        group_ids, series = _group_sum(flat[known], codes[known])
+        metrics = _basic_metrics(series)
+        g_date, g_time, g_pos = _peak_position(series, dates)
+        member_peaks = pd.Series(asset_metrics["peak_mw"][known]).groupby(codes[known])
+        non_coincident = member_peaks.sum().reindex(group_ids).to_numpy()
+        tables[level] = _ranked(pd.DataFrame({
+            level: read_dimension(level).reindex(group_ids).to_numpy(),
+            "members": member_peaks.size().reindex(group_ids).to_numpy(),
+            **metrics,
+            "non_coincident_peak_mw": non_coincident,
+            "diversity_factor": non_coincident / metrics["peak_mw"],
+            "peak_date": g_date,
+            "peak_time": g_time,
+        }))
+
+        if level == "station":
+            # each asset's load at the hour its station peaks
+            station_pos = pd.Series(g_pos, index=group_ids).reindex(codes).to_numpy()
+            hit = ~np.isnan(station_pos)
+            at_peak = np.full(len(flat), np.nan)
+            at_peak[hit] = flat[np.flatnonzero(hit), station_pos[hit].astype(np.int64)]
+            asset["load_at_station_peak_mw"] = at_peak
+            asset["coincidence_factor"] = at_peak / asset_metrics["peak_mw"]
+
+    tables["asset"] = _ranked(asset)
+    return tables
@@ -0,0 +1,72 @@
+"""
+### FILE: utils/outage_concurrency.py
+Sweep-line analysis of simultaneous outages.
+
+Each outage becomes a start event (+1 feeder, +last_load MW) and an end
+event (-1, -last_load).  Events are sorted once by (group, time, kind) and
+a single cumulative sum yields the step-function timeline of concurrent
+outages and lost load for every group: because each group's events sum to
+zero, the running total is back at zero whenever the next group starts.
+Overall cost is O(n log n) for the sort.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .energy_not_served import outage_intervals
+
+
+def concurrency_timeline(outages: pd.DataFrame, level: Optional[str] = None, now=None) -> pd.DataFrame:
+    """Step-function timeline of concurrent outages per ``level`` group.
+
+    ``level`` is a column of ``outages`` such as ``"station"`` or
+    ``"region"``; ``None`` treats the whole grid as one group.  Outages
+    without a restoration time are counted as ongoing until ``now``.
+    Returns ``[level, ts, concurrent, lost_mw]`` rows, one per change.
+    """
+    out = outage_intervals(outages)
+    group_col = level or "group"
+    groups = out[level].astype(object) if level else pd.Series("All", index=out.index)
+    end_ts = out["end_ts"].fillna(pd.Timestamp(now) if now is not None else pd.Timestamp.now())
+    valid = (out["start_ts"].notna() & (end_ts > out["start_ts"]) & groups.notna()).to_numpy()
+    if not valid.any():
+        return pd.DataFrame(columns=[group_col, "ts", "concurrent", "lost_mw"])
+
+    codes, names = pd.factorize(groups[valid])
+    load = pd.to_numeric(out["last_load"], errors="coerce").fillna(0).to_numpy(dtype=float)[valid]
+    n = len(codes)
+    group = np.concatenate([codes, codes])
+    ts = np.concatenate([out["start_ts"].to_numpy()[valid], end_ts.to_numpy()[valid]]).astype("datetime64[ns]")
+    # ends sort before starts at the same instant, so back-to-back outages do not overlap
+    kind = np.concatenate([np.ones(n, dtype=np.int8), np.zeros(n, dtype=np.int8)])
+    delta = np.where(kind == 1, 1, -1)
+    mw = np.concatenate([load, -load])
+
+    order = np.lexsort((kind, ts, group))
+    group, ts, delta, mw = group[order], ts[order], delta[order], mw[order]
+    concurrent = np.cumsum(delta)
+    lost = np.cumsum(mw)
+
+    # keep the state after the last event of each (group, ts)
+    last = np.r_[(group[1:] != group[:-1]) | (ts[1:] != ts[:-1]), True]
+    return pd.DataFrame({
+        group_col: np.asarray(names, dtype=object)[group[last]],
+        "ts": ts[last],
+        "concurrent": concurrent[last],
+        "lost_mw": np.round(lost[last], 6),
+    })
+
+
+def concurrency_peaks(timeline: pd.DataFrame, level: Optional[str] = None) -> pd.DataFrame:
+    """Peak concurrent outages and peak lost MW per group, worst first."""
+    group_col = level or "group"
+    if timeline.empty:
+        return pd.DataFrame(columns=[group_col, "peak_concurrent", "peak_concurrent_at", "peak_lost_mw", "peak_lost_at"])
+    grouped = timeline.groupby(group_col, sort=False)
+    by_count = timeline.loc[grouped["concurrent"].idxmax(), [group_col, "concurrent", "ts"]]
+    by_load = timeline.loc[grouped["lost_mw"].idxmax(), [group_col, "lost_mw", "ts"]]
+    peaks = by_count.rename(columns={"concurrent": "peak_concurrent", "ts": "peak_concurrent_at"}).merge(
+        by_load.rename(columns={"lost_mw": "peak_lost_mw", "ts": "peak_lost_at"}), on=group_col
+    )
+    return peaks.sort_values(["peak_concurrent", "peak_lost_mw"], ascending=False).reset_index(drop=True)
@@ -0,0 +1,47 @@
+"""
+### FILE: utils/outage_search.py
+Search box over the free-text outage columns (remarks, event indication,
+weather, confirming officers) for the outage pages.
+
+Matching and ranking run in PostgreSQL against the GIN-indexed
+``outages.search_vector`` (``utils.db.search_outages``), combined with the
+page's region/disco/area/station filters, over the whole history or only
+the selected date range.
+"""
+from datetime import date
+from typing import Dict, Optional, Union
+
+import streamlit as st
+
+from .db import OUTAGE_SEARCH_LIMIT, search_outages
+
+
+def render_outage_search(
+    start_date: Union[str, date],
+    end_date: Union[str, date],
+    filters: Optional[Dict[str, str]] = None,
+    key: str = "outage_search",
+) -> None:
+    """Search input and ranked results for the current page filters."""
+    st.subheader("Search outage records")
+    c1, c2 = st.columns([4, 1])
+    terms = c1.text_input(
+        "Remarks, event indication, weather or officer",
+        placeholder='e.g. relay trip, "cable fault", vandalism or theft, -rain',
+        key=f"{key}_terms",
+    ).strip()
+    in_range = c2.checkbox("Selected dates only", value=False, key=f"{key}_in_range",
+                           help="Unchecked searches the whole outage history")
+    if not terms:
+        return
+    results = search_outages(
+        terms, **(filters or {}),
+        start_date=str(start_date) if in_range else None,
+        end_date=str(end_date) if in_range else None,
+    )
+    if results.empty:
+        st.info(f"No outages match “{terms}”")
+        return
+    more = " (best matches shown)" if len(results) == OUTAGE_SEARCH_LIMIT else ""
+    st.caption(f"{len(results)} matching outages{more}, best match first")
+    st.dataframe(results, hide_index=True)
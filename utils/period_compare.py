@@ -0,0 +1,131 @@
+"""
+### FILE: utils/period_compare.py
+Period-over-period comparison shared by the load and outage pages.
+
+The comparison period has the length of the selected range and is shifted
+back by:
+
+* ``Previous period``       – the range length, i.e. the days just before it
+* ``Same period last year`` – 52 weeks (364 days), so weekdays line up
+
+Profiles are compared by hour of day and the outage heatmap by weekday and
+hour, so both periods line up by weekday even when a ``Previous period``
+shift is not a whole number of weeks.
+
+Load pages take the previous period from the load cube, which is a second
+slice of the mapped array and costs no query.  The outage page fetches both
+periods with one aggregated query (``read_outage_comparison``).
+``compare_values`` and ``metric_delta`` turn aligned figures into deltas and
+percentage changes.
+"""
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .load_cube import HOURS, LoadCube, hourly_frame
+
+COMPARISON_MODES = ("None", "Previous period", "Same period last year")
+PERIODS = ("current", "previous")
+
+
+def comparison_shift_days(start_date: date, end_date: date, mode: str) -> int:
+    """Days between a day of the selected range and its aligned comparison day."""
+    if mode == "Previous period":
+        return (end_date - start_date).days + 1
+    if mode == "Same period last year":
+        return 364
+    raise ValueError(f"Unknown comparison mode: {mode}")
+
+
+def previous_range(start_date: date, end_date: date, mode: str) -> Tuple[date, date]:
+    """Inclusive comparison range for ``mode``."""
+    shift = timedelta(days=comparison_shift_days(start_date, end_date, mode))
+    return start_date - shift, end_date - shift
+
+
+def previous_window(cube: LoadCube, dates: np.ndarray, shift_days: int) -> np.ndarray:
+    """Cube values for ``dates - shift_days``, shaped like the window of ``dates``.
+
+    A zero-copy view when the whole comparison range is inside the cube;
+    days before the cube origin come back as NaN.
+    """
+    if len(dates) == 0 or cube.origin is None:
+        return np.full((cube.n_assets, len(dates), HOURS), np.nan, dtype=np.float32)
+    idx = ((dates - np.timedelta64(shift_days, "D")) - cube.origin).astype(int)
+    inside = (idx >= 0) & (idx < cube.n_days)
+    if inside.all():
+        return cube.values[:, idx[0]: idx[-1] + 1]
+    values = np.full((cube.n_assets, len(dates), HOURS), np.nan, dtype=np.float32)
+    if inside.any():
+        values[:, inside] = cube.values[:, idx[inside][0]: idx[inside][-1] + 1]
+    return values
+
+
+def comparison_window(cube: LoadCube, dates: np.ndarray, start_date: date, end_date: date,
+                      mode: str) -> Optional[np.ndarray]:
+    """``previous_window`` for a comparison mode, ``None`` when comparison is off."""
+    if mode == "None":
+        return None
+    return previous_window(cube, dates, comparison_shift_days(start_date, end_date, mode))
+
+
+def pct_change(current, previous):
+    """Percentage change from ``previous``; NaN where it is zero or missing."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = 100.0 * (np.asarray(current, dtype=float) - previous) / np.abs(previous)
+    return np.where(np.isfinite(change), change, np.nan)
+
+
+def compare_values(current: pd.Series, previous: pd.Series, fill: Optional[float] = None) -> pd.DataFrame:
+    """Align two series on their index: ``current``, ``previous``, ``delta``, ``pct_change``.
+
+    ``fill`` replaces groups missing from one period (0 for counts); by
+    default they stay NaN, as for assets without readings.
+    """
+    table = pd.concat({"current": current, "previous": previous}, axis=1)
+    if fill is not None:
+        table = table.fillna(fill)
+    table["delta"] = table["current"] - table["previous"]
+    table["pct_change"] = pct_change(table["current"], table["previous"])
+    return table
+
+
+def compare_groups(data: pd.DataFrame, column: str, measure: str, fill: Optional[float] = 0) -> pd.DataFrame:
+    """``compare_values`` of ``measure`` per ``column`` for a long frame with a ``period`` column."""
+    wide = data.dropna(subset=[column]).pivot_table(
+        index=column, columns="period", values=measure, aggfunc="sum", observed=True
+    ).reindex(columns=list(PERIODS))
+    return compare_values(wide["current"], wide["previous"], fill).rename_axis(column).reset_index()
+
+
+def load_stats(grouped: Optional[np.ndarray]) -> Dict[str, float]:
+    """Max/avg/min of a load array, NaN when it is ``None`` or has no readings."""
+    if grouped is None or grouped.size == 0 or np.isnan(grouped).all():
+        return {"max": np.nan, "avg": np.nan, "min": np.nan}
+    return {"max": float(np.nanmax(grouped)), "avg": float(np.nanmean(grouped)), "min": float(np.nanmin(grouped))}
+
+
+def asset_means(values: np.ndarray) -> np.ndarray:
+    """Mean reading per asset of an ``(asset, day, hour)`` window, NaN without readings."""
+    counts = (~np.isnan(values)).sum(axis=(1, 2))
+    with np.errstate(invalid="ignore"):
+        return np.nansum(values, axis=(1, 2), dtype=np.float64) / np.where(counts > 0, counts, np.nan)
+
+
+def metric_delta(current: float, previous: float, fmt: str = "{:+,.3f}") -> Optional[str]:
+    """``st.metric`` delta text such as ``+1.250 (+4.2%)``; ``None`` without a previous value."""
+    if previous is None or not np.isfinite(previous):
+        return None
+    change = float(pct_change(current, previous))
+    text = fmt.format(current - previous)
+    return text if np.isnan(change) else f"{text} ({change:+.1f}%)"
+
+
+def comparison_profile(current: np.ndarray, previous: np.ndarray) -> pd.DataFrame:
+    """Long ``reading_time``/``load_mw``/``period`` frame of two 24-slot profiles for one chart."""
+    return pd.concat([
+        hourly_frame(current).assign(period=PERIODS[0]),
+        hourly_frame(previous).assign(period=PERIODS[1]),
+    ], ignore_index=True)
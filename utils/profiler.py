@@ -0,0 +1,111 @@
+"""
+### FILE: utils/profiler.py
+Per-stage render profiler for the pages.
+
+A page creates one profiler per rerun before ``login()`` and calls
+``mark(stage)`` at the end of each stage; the time since the previous mark
+is charged to that stage (repeated stages add up)::
+
+    prof = start_profiler("Region Load Analysis")
+    login()
+    prof.mark("login")
+    ...                       # query / cube window
+    prof.mark("fetch")
+    fig = px.line(...)
+    prof.mark("figure")
+    st.plotly_chart(fig)
+    prof.mark("chart")        # Plotly JSON serialization + send
+    ...
+    prof.finish()
+
+``finish()`` shows the breakdown to users listed in ``ADMIN_USERS`` and, when
+``PROFILE_LOG`` is set, appends one JSON record per rerun to that file.  The
+file is rotated to ``<PROFILE_LOG>.1`` once it exceeds ``PROFILE_LOG_MAX_MB``,
+so at most twice that is kept on disk.  Reruns cut short by
+``st.stop()`` never reach ``finish()``; they are logged with
+``"completed": false`` when the session's next rerun starts.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+import streamlit as st
+
+from .auth import is_admin
+
+# JSON lines file receiving one record per rerun; unset/empty disables logging
+PROFILE_LOG = os.getenv("PROFILE_LOG", "")
+PROFILE_LOG_MAX_MB = float(os.getenv("PROFILE_LOG_MAX_MB", "10"))
+
+_log_lock = threading.Lock()
+_SESSION_KEY = "_render_profiler"
+
+
+class RenderProfiler:
+    def __init__(self, page: str):
+        self.page = page
+        self.started = time.perf_counter()
+        self.wall_start = datetime.now().isoformat(timespec="seconds")
+        self._last = self.started
+        self.stages: Dict[str, float] = {}
+        self.finished = False
+
+    def mark(self, stage: str) -> None:
+        """Charge the time since the previous mark to ``stage``."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def record(self, completed: bool) -> Dict:
+        total = self._last - self.started
+        return {
+            "ts": self.wall_start,
+            "page": self.page,
+            "user": st.session_state.get("username"),
+            "completed": completed,
+            "total_ms": round(1000 * total, 2),
+            "stages_ms": {k: round(1000 * v, 2) for k, v in self.stages.items()},
+        }
+
+    def _write(self, completed: bool) -> None:
+        if not PROFILE_LOG:
+            return
+        line = json.dumps(self.record(completed))
+        try:
+            with _log_lock:
+                if os.path.exists(PROFILE_LOG) and os.path.getsize(PROFILE_LOG) >= PROFILE_LOG_MAX_MB * 1024 * 1024:
+                    os.replace(PROFILE_LOG, PROFILE_LOG + ".1")
+                with open(PROFILE_LOG, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except OSError:
+            pass
+
+    def finish(self) -> None:
+        """Log this rerun and render the breakdown for admins."""
+        self.mark("render")
+        self.finished = True
+        self._write(completed=True)
+        if is_admin():
+            record = self.record(completed=True)
+            with st.expander(f"⏱ Render profile: {record['total_ms']:.0f} ms"):
+                breakdown = pd.DataFrame(
+                    {"ms": record["stages_ms"]}
+                ).rename_axis("stage").reset_index()
+                breakdown["share_pct"] = (100 * breakdown["ms"] / max(record["total_ms"], 1e-9)).round(1)
+                st.dataframe(breakdown, hide_index=True)
+                st.caption(f"Appended to {PROFILE_LOG}" if PROFILE_LOG else "Logging disabled (set PROFILE_LOG to enable)")
+
+
+def start_profiler(page: str) -> RenderProfiler:
+    """Start profiling this rerun of ``page``; call before ``login()``."""
+    previous: Optional[RenderProfiler] = st.session_state.get(_SESSION_KEY)
+    if previous is not None and not previous.finished:
+        previous.finished = True
+        previous._write(completed=False)
+    profiler = RenderProfiler(page)
+    st.session_state[_SESSION_KEY] = profiler
+    return profiler
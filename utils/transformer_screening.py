@@ -0,0 +1,98 @@
+"""
+### FILE: utils/transformer_screening.py
+Fleet-wide transformer overload screening.
+
+Every transformer of the load cube is screened in one vectorized pass over
+the ``(transformer, hour)`` matrix of the selected range, against its
+capacity from ``transformer_ratings`` (``rating_mva * power_factor``):
+
+* ``p50/p95/p99_util_pct`` and ``peak_util_pct`` – utilization percentiles
+* ``hours_above_80`` / ``hours_above_100`` – hours loaded above 80% / 100%
+* ``longest_overload_h`` – longest run of consecutive hours above 100%;
+  a missing reading ends the run
+
+Transformers without a rating keep their load figures with NaN utilization
+and are ranked last.
+"""
+import warnings
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from .cache import cached
+from .db import CACHE_TTL, read_transformer_ratings
+from .load_cube import get_load_cube
+
+# utilization thresholds (% of capacity) counted in hours
+THRESHOLDS = (80, 100)
+PERCENTILES = (50, 95, 99)
+
+
+def longest_run(mask: np.ndarray) -> np.ndarray:
+    """Length of the longest run of ``True`` in each row of a 2-D boolean array."""
+    if mask.shape[1] == 0:
+        return np.zeros(mask.shape[0], dtype=np.int64)
+    count = np.cumsum(mask, axis=1)
+    # running count at the last False before each position
+    reset = np.maximum.accumulate(np.where(mask, 0, count), axis=1)
+    return (count - reset).max(axis=1)
+
+
+def screen_utilization(load: np.ndarray, capacity: np.ndarray) -> Dict[str, np.ndarray]:
+    """Screening metrics for ``load`` (assets x hours, MW) against ``capacity`` (MW per asset)."""
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        util = 100.0 * load / capacity[:, None]
+        metrics = {
+            "peak_mw": np.nanmax(load, axis=1),
+            "avg_mw": np.nanmean(load, axis=1),
+            "hours_reported": (~np.isnan(load)).sum(axis=1),
+            "peak_util_pct": np.nanmax(util, axis=1),
+        }
+        for pct, values in zip(PERCENTILES, np.nanpercentile(util, PERCENTILES, axis=1)):
+            metrics[f"p{pct}_util_pct"] = values
+        rated = ~np.isnan(capacity)
+        for threshold in THRESHOLDS:
+            hours = (util > threshold).sum(axis=1).astype(float)
+            metrics[f"hours_above_{threshold}"] = np.where(rated, hours, np.nan)
+        metrics["longest_overload_h"] = np.where(rated, longest_run(util > 100), np.nan)
+    return metrics
+
+
+@cached(ttl=CACHE_TTL)
+def fleet_transformer_screening(start_date: str, end_date: str, cube_version: int) -> pd.DataFrame:
+    """Ranked overload table for every transformer with readings in the range.
+
+    ``cube_version`` only keys the cache; clear this function after the
+    ratings change.
+    """
+    cube = get_load_cube("transformer")
+    values, _ = cube.window(start_date, end_date)
+    load = values.reshape(values.shape[0], -1)
+    active = ~np.isnan(load).all(axis=1)
+    if not active.any():
+        return pd.DataFrame()
+    load = load[active].astype(np.float64)
+    assets = cube.assets[active].reset_index(drop=True)
+
+    ratings = read_transformer_ratings()
+    rated = assets[["station_id", "transformer_nomenclature"]].merge(
+        ratings, on=["station_id", "transformer_nomenclature"], how="left"
+    )
+    capacity = (rated["rating_mva"] * rated["power_factor"]).to_numpy(dtype=float)
+
+    table = pd.DataFrame({
+        "station": cube.labels("station_id")[active],
+        "transformer_nomenclature": cube.labels("transformer_nomenclature")[active],
+        "area": cube.labels("area_id")[active],
+        "region": cube.labels("region_id")[active],
+        "rating_mva": rated["rating_mva"].to_numpy(dtype=float),
+        "capacity_mw": capacity,
+        **screen_utilization(load, capacity),
+    })
+    table = table.sort_values(
+        ["hours_above_100", "p99_util_pct", "peak_mw"], ascending=False, na_position="last"
+    ).reset_index(drop=True)
+    table.insert(0, "rank", np.arange(1, len(table) + 1))
+    return table